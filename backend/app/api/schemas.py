@@ -81,6 +81,18 @@ class WebsiteScanRequest(BaseModel):
     confirmed_permission: bool = False
     owner_confirmation: bool = False
     legal_responsibility: bool = False
+    max_age: Optional[int] = None  # Seconds; accept cached results up to this age (0 forces a rescan)
+    incremental: bool = False  # Rescan only components that changed since the previous scan
+
+
+class BatchScanRequest(BaseModel):
+    """Request to scan a portfolio of websites in one call."""
+    urls: List[str]
+    confirmed_permission: bool = False
+    owner_confirmation: bool = False
+    legal_responsibility: bool = False
+    max_age: Optional[int] = None  # Applied to every URL, see WebsiteScanRequest
+    incremental: bool = False  # Applied to every URL, see WebsiteScanRequest
 
 
 class WebsiteScanResponse(BaseModel):
@@ -123,6 +135,13 @@ class WebsiteScanResponse(BaseModel):
     
     scan_duration_ms: int
     recommendations: List[str]
+    
+    # Result cache
+    cached: bool = False  # True when the whole report was served from a previous scan
+    cache_age_seconds: Optional[int] = None
+    reused_components: List[str] = []
+    timing_breakdown: Optional[Dict[str, int]] = None  # {"stage.ssl_tls": ms, "tls.handshake": ms, ...}
+    delta: Optional[Dict[str, Any]] = None  # Incremental rescans: changes since the previous scan
 
 
 class WebsiteScanHistoryResponse(BaseModel):
@@ -168,3 +187,35 @@ class ScanProgressResponse(BaseModel):
     has_error: bool = False
     error_message: Optional[str] = None
     is_cancelled: bool = False
+    stage_timings: Optional[Dict[str, Any]] = None  # {stage: {"status", "duration_ms"}}
+
+
+# Scan Job Queue Schemas
+
+class ScanJobResponse(BaseModel):
+    """Status of a queued website scan."""
+    scan_id: str  # Progress tracking UUID
+    url: str
+    status: str  # queued, running, completed, failed, cancelled
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error_message: Optional[str] = None
+    queue_depth: int  # Jobs currently waiting for a worker
+    progress_url: str
+    result_url: str
+
+
+class ScanQueueStatsResponse(BaseModel):
+    """Scan worker pool and queue statistics."""
+    workers: int
+    busy_workers: int
+    queue_depth: int
+    max_queue: int
+    accepting: bool
+    tracked_jobs: int
+    accepted: int
+    rejected: int
+    completed: int
+    failed: int
+    cancelled: int
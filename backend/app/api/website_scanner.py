@@ -4,26 +4,53 @@ Orchestrates passive security assessments with ethical safeguards.
 Enhanced with deep vulnerability analysis, compliance mapping, and report generation.
 """
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
+import asyncio
 import time
 import json
 
-from ..api.schemas import WebsiteScanRequest, WebsiteScanResponse, ScanProgressResponse
+from ..api.schemas import (
+    BatchScanRequest,
+    WebsiteScanRequest,
+    WebsiteScanResponse,
+    ScanProgressResponse,
+    ScanJobResponse,
+    ScanQueueStatsResponse,
+)
 from ..db.database import SessionLocal
 from ..db.models import WebsiteScan
-from ..security.safety_validator import SafetyValidator
+from ..security.safety_validator import SafetyValidator, get_safety_validator
+from ..security.cancellation import CancellationToken, ScanCancelledError, get_cancellation_registry
+from ..security.scan_timer import ScanTimer
+from ..security.dns_cache import dns_cache_stats
+from ..security.rate_limiter import rate_limit_message
 from ..services.progress_tracker import ProgressTracker
-from ..security.http_scanner import HTTPSecurityScanner
-from ..security.ssl_scanner import SSLTLSScanner
-from ..security.dns_scanner import DNSSecurityScanner
-from ..security.tech_detector import TechnologyDetector
-from ..security.owasp_assessor import OWASPAssessor
-from ..security.risk_scorer import RiskScorer
-from ..security.vulnerability_engine import AdvancedVulnerabilityEngine
+from ..services.progress_events import get_progress_broker, is_terminal_event
+from ..services.batch_scanner import (
+    BATCH_MAX_URLS,
+    batch_rate_limit_key,
+    get_batch_limiter,
+    get_batch_rate_limiter,
+)
+from ..services.scan_cache import ScanResultCache, normalize_scan_url
+from ..services.scan_analysis import load_scan_analysis, store_analysis, stored_analysis
+from ..services.incremental_scan import IncrementalScanPlanner, build_scan_delta, collect_change_signals
+from ..services.scan_jobs import QueueFullError, ScanJob, get_scan_job_queue
+from ..services.scan_metrics import build_timing_breakdown, get_scan_latency_metrics
+from ..services.maintenance_scheduler import get_maintenance_scheduler
+from ..services.scan_pipeline import (
+    SCAN_COMPONENTS,
+    StageProgress,
+    StageScheduler,
+    build_website_scan_stages,
+    create_fetch_context,
+    get_stage_executor,
+)
 from ..services.pdf_generator import PDFReportGenerator
 
 router = APIRouter()
@@ -61,228 +88,648 @@ async def scan_website(request: WebsiteScanRequest, http_request: Request):
         WebsiteScanResponse with comprehensive security report
     
     Raises:
-        HTTPException: If validation fails or scanning error occurs
+        HTTPException: 429 with Retry-After if the client is rate limited;
+            other codes if validation fails or a scanning error occurs
     """
-    start_time = time.time()
-    
     # Extract client IP
     client_ip = http_request.client.host if http_request.client else "unknown"
     
     # Initialize database session
     db = next(get_db())
     
-    # Initialize progress tracker
-    tracker = ProgressTracker(db)
-    scan_id = tracker.create_scan(request.url)
+    try:
+        # Initialize progress tracker
+        tracker = ProgressTracker(db)
+        scan_id = tracker.create_scan(request.url)
+        
+        return await _run_website_scan(request, client_ip, db, tracker, scan_id)
+    except ScanCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        db.close()
+
+
+async def _run_website_scan(
+    request: WebsiteScanRequest,
+    client_ip: str,
+    db: Session,
+    tracker: ProgressTracker,
+    scan_id: str,
+    rate_limit_checked: bool = False
+) -> WebsiteScanResponse:
+    """
+    Execute the full scan pipeline for a scan already registered with the tracker.
+    
+    Shared by the synchronous /scan-website endpoint and the scan job workers
+    (whose submissions were rate limited before queueing: rate_limit_checked).
+    
+    Raises:
+        HTTPException: If validation fails or scanning error occurs
+        ScanCancelledError: If the scan was cancelled via /scan-progress/{scan_id}/cancel
+    """
+    start_time = time.time()
+    cancellations = get_cancellation_registry()
+    cancel_token = cancellations.create(scan_id)
+    timer = ScanTimer()
     
     try:
+        # A queued scan may have been cancelled before a worker picked it up
+        cancel_token.raise_if_cancelled()
+        
         # ===== STEP 1: SAFETY VALIDATION =====
         tracker.update_progress(scan_id, 1, 0)  # Step 1, substep 0
-        validator = SafetyValidator()
+        validator = get_safety_validator()
         
         # Comprehensive validation including rate limiting, URL validation, and permission checks
-        is_valid, error_message, validation_metadata = validator.validate_scan_request(
-            url=request.url,
-            client_ip=client_ip,
-            confirmed_permission=request.confirmed_permission,
-            owner_confirmation=request.owner_confirmation,
-            legal_responsibility=request.legal_responsibility
-        )
+        # (target DNS is resolved asynchronously; approved addresses are pinned for the scanners)
+        with timer.span("validation"):
+            if rate_limit_checked:
+                validation_metadata = {"client_ip": client_ip, "validations_passed": ["rate_limit"]}
+                is_valid, error_message = await validator.validate_target(
+                    request.url,
+                    request.confirmed_permission,
+                    request.owner_confirmation,
+                    request.legal_responsibility,
+                    validation_metadata
+                )
+            else:
+                is_valid, error_message, validation_metadata = await validator.validate_scan_request(
+                    url=request.url,
+                    client_ip=client_ip,
+                    confirmed_permission=request.confirmed_permission,
+                    owner_confirmation=request.owner_confirmation,
+                    legal_responsibility=request.legal_responsibility
+                )
         
         if not is_valid:
             tracker.set_error(scan_id, error_message)
+            if validation_metadata.get("blocked_reason") == "rate_limit":
+                raise HTTPException(
+                    status_code=429,
+                    detail=error_message,
+                    headers={"Retry-After": str(validation_metadata["retry_after"])}
+                )
             raise HTTPException(
                 status_code=403 if "permission" in error_message.lower() else 400,
                 detail=error_message
             )
         
-        # ===== STEP 2: PASSIVE SECURITY SCANS =====
-        tracker.update_progress(scan_id, 2, 0)  # Step 2 - HTTP Headers
-        scan_results = {}
-        errors = []
-        
-        # HTTP Headers Scan
-        try:
-            http_scanner = HTTPSecurityScanner()
-            scan_results["http_headers"] = http_scanner.scan(request.url)
-            tracker.update_progress(scan_id, 2, 3)  # Midway through HTTP scan
-        except Exception as e:
-            errors.append(f"HTTP scan failed: {str(e)}")
-            scan_results["http_headers"] = {"error": str(e)}
-        
-        # SSL/TLS Scan
-        tracker.update_progress(scan_id, 3, 0)  # Step 3 - SSL/TLS
-        try:
-            ssl_scanner = SSLTLSScanner()
-            scan_results["ssl_tls"] = ssl_scanner.scan(request.url)
-            tracker.update_progress(scan_id, 3, 2)  # SSL scan complete
-        except Exception as e:
-            errors.append(f"SSL scan failed: {str(e)}")
-            scan_results["ssl_tls"] = {"error": str(e)}
-        
-        # DNS Security Scan
-        tracker.update_progress(scan_id, 4, 0)  # Step 4 - DNS Security
-        try:
-            dns_scanner = DNSSecurityScanner()
-            scan_results["dns_security"] = dns_scanner.scan(request.url)
-            tracker.update_progress(scan_id, 4, 4)  # DNS scan complete
-        except Exception as e:
-            errors.append(f"DNS scan failed: {str(e)}")
-            scan_results["dns_security"] = {"error": str(e)}
-        
-        # Technology Detection
-        tracker.update_progress(scan_id, 5, 0)  # Step 5 - Technology Detection
-        try:
-            tech_detector = TechnologyDetector()
-            scan_results["technologies"] = tech_detector.scan(request.url)
-            tracker.update_progress(scan_id, 5, 3)  # Tech detection complete
-        except Exception as e:
-            errors.append(f"Tech detection failed: {str(e)}")
-            scan_results["technologies"] = {"error": str(e)}
-        
-        # ===== STEP 3: RISK SCORING =====
-        tracker.update_progress(scan_id, 6, 0)  # Step 6 - Risk Calculation
-        risk_scorer = RiskScorer()
-        risk_analysis = risk_scorer.calculate_risk(scan_results)
-        tracker.update_progress(scan_id, 6, 1)  # Risk weighing done
-        
-        # ===== STEP 4: OWASP TOP 10 MAPPING =====
-        owasp_assessor = OWASPAssessor()
-        owasp_findings = owasp_assessor.assess(
-            scan_results.get("http_headers", {}),
-            scan_results.get("ssl_tls", {}),
-            scan_results.get("dns_security", {}),
-            scan_results.get("technologies", {})
-        )
-        
-        # ===== STEP 4.5: DEEP VULNERABILITY ANALYSIS =====
-        vuln_engine = AdvancedVulnerabilityEngine()
-        vulnerability_analysis = vuln_engine.analyze(
-            scan_results.get("http_headers", {}),
-            scan_results.get("ssl_tls", {}),
-            scan_results.get("dns_security", {}),
-            scan_results.get("technologies", {})
-        )
-        
-        # ===== STEP 5: GENERATE EXECUTIVE SUMMARY =====
-        tracker.update_progress(scan_id, 7, 0)  # Step 7 - Report Generation
-        scan_duration = time.time() - start_time
-        scan_duration_ms = int(scan_duration * 1000)
-        
-        # ===== STEP 6: COMPILE RECOMMENDATIONS =====
-        recommendations = []
-        
-        # HTTP Headers recommendations
-        if "http_headers" in scan_results and "missing_headers" in scan_results["http_headers"]:
-            for header in scan_results["http_headers"]["missing_headers"]:
-                rec = scan_results["http_headers"]["recommendations"].get(header, "Add this header")
-                recommendations.append(f"[HTTP] {header}: {rec}")
-        
-        # SSL/TLS recommendations  
-        if "ssl_tls" in scan_results and not scan_results["ssl_tls"].get("error"):
-            ssl_data = scan_results["ssl_tls"]
-            if not ssl_data.get("valid_certificate", True):
-                recommendations.append("[SSL] Obtain a valid SSL certificate from a trusted CA")
-            if ssl_data.get("tls_version", "") < "TLSv1.2":
-                recommendations.append("[SSL] Upgrade to TLS 1.2 or higher")
-        
-        # DNS recommendations
-        if "dns_security" in scan_results and not scan_results["dns_security"].get("error"):
-            dns_data = scan_results["dns_security"]
-            if not dns_data.get("spf_record"):
-                recommendations.append("[DNS] Add SPF record to prevent email spoofing")
-            if not dns_data.get("dmarc_record"):
-                recommendations.append("[DNS] Add DMARC record for email authentication")
-        
-        # Calculate component grades
-        http_grade = scan_results.get("http_headers", {}).get("grade", "N/A")
-        ssl_grade = scan_results.get("ssl_tls", {}).get("grade", "N/A")
-        dns_grade = scan_results.get("dns_security", {}).get("grade", "N/A")
-        tech_grade = "B"  # Default tech grade
-        
-        # Extract issue counts from risk breakdown
-        risk_breakdown = risk_analysis.get("risk_breakdown", {})
-        critical_count = len(risk_breakdown.get("critical_issues", []))
-        high_count = len(risk_breakdown.get("high_issues", []))
-        medium_count = len(risk_breakdown.get("medium_issues", []))
-        
-        # ===== STEP 7: SAVE TO DATABASE =====
-        import json
-        
-        website_scan = WebsiteScan(
-            url=request.url,
-            client_ip=client_ip,
-            risk_score=risk_analysis["weighted_risk_score"],
-            risk_level=risk_analysis["overall_risk_level"],
-            overall_grade=risk_analysis["overall_grade"],
-            http_scan_json=json.dumps(scan_results.get("http_headers", {})),
-            ssl_scan_json=json.dumps(scan_results.get("ssl_tls", {})),
-            dns_scan_json=json.dumps(scan_results.get("dns_security", {})),
-            tech_scan_json=json.dumps(scan_results.get("technologies", {})),
-            owasp_assessment_json=json.dumps(owasp_findings),
-            scan_duration_ms=scan_duration_ms,
-            scanned_at=datetime.utcnow(),
-            permission_confirmed=request.confirmed_permission,
-            owner_confirmed=request.owner_confirmation,
-            legal_accepted=request.legal_responsibility
+        return await _scan_validated_target(
+            request, client_ip, db, tracker, scan_id, start_time, cancel_token, timer
         )
         
-        db.add(website_scan)
-        db.commit()
-        db.refresh(website_scan)
-        
-        # Mark scan as complete
-        tracker.complete_scan(scan_id)
-        
-        # ===== STEP 8: BUILD RESPONSE =====
-        # Get security summary from risk analysis
-        security_summary = risk_analysis.get("security_summary", {})
-        security_posture = security_summary.get("security_posture", "UNKNOWN")
-        
-        response = WebsiteScanResponse(
-            scan_id=website_scan.id,
-            url=request.url,
-            scan_timestamp=datetime.utcnow().isoformat(),
-            progress_scan_id=str(scan_id),  # Return progress tracking UUID
-            risk_score=risk_analysis["weighted_risk_score"],
-            risk_level=risk_analysis["overall_risk_level"],
-            overall_grade=risk_analysis["overall_grade"],
-            security_posture=security_posture,
-            http_grade=http_grade,
-            ssl_grade=ssl_grade,
-            dns_grade=dns_grade,
-            tech_grade=tech_grade,
-            owasp_compliance_score=owasp_findings.get("compliance_score", 0),
-            compliant_categories=owasp_findings.get("compliant_count", 0),
-            non_compliant_categories=owasp_findings.get("non_compliant_count", 0),
-            top_risks=risk_analysis.get("top_risks", []),
-            critical_issues_count=critical_count,
-            high_issues_count=high_count,
-            http_scan=scan_results.get("http_headers"),
-            ssl_scan=scan_results.get("ssl_tls"),
-            dns_scan=scan_results.get("dns_security"),
-            tech_scan=scan_results.get("technologies"),
-            owasp_assessment=owasp_findings,
-            risk_analysis=risk_analysis,
-            vulnerability_analysis=vulnerability_analysis,
-            scan_duration_ms=scan_duration_ms,
-            recommendations=recommendations
-        )
-        
-        return response
-        
-    except HTTPException:
+    except (HTTPException, ScanCancelledError):
         raise
     except Exception as e:
         db.rollback()
-        if 'scan_id' in locals():
-            tracker.set_error(scan_id, str(e))
+        tracker.set_error(scan_id, str(e))
         raise HTTPException(
             status_code=500,
             detail=f"Scan failed: {str(e)}"
         )
     finally:
+        cancellations.release(scan_id)
+
+
+async def _scan_validated_target(
+    request: WebsiteScanRequest,
+    client_ip: str,
+    db: Session,
+    tracker: ProgressTracker,
+    scan_id: str,
+    start_time: float,
+    cancel_token: Optional[CancellationToken] = None,
+    timer: Optional[ScanTimer] = None
+) -> WebsiteScanResponse:
+    """
+    Run the scan pipeline, persist the results and build the response.
+    
+    The target must already have passed SafetyValidator checks. Stage and
+    network sub-step durations are stored with the scan and fed into the
+    latency histograms.
+    
+    Raises:
+        ScanCancelledError: If cancel_token is cancelled before the pipeline finishes
+    """
+    timer = timer or ScanTimer()
+    result_cache = ScanResultCache(db)
+    planner = None
+    tracker.update_progress(scan_id, 2, 0)
+    
+    if request.incremental:
+        # ===== INCREMENTAL RESCAN =====
+        # Cheap probes (conditional GET, TLS fingerprint, SOA serial) decide
+        # which components of the previous scan are still valid
+        cached_scan = result_cache.latest_scan(request.url)
+        fresh_components = {}
+        if cached_scan is not None:
+            planner = IncrementalScanPlanner(request.url, cached_scan, cancel_token, timer)
+            fresh_components = await planner.plan(get_stage_executor())
+        fully_cached = False
+        fetch_context = planner.fetch_context if planner else None
+    else:
+        # ===== RESULT CACHE =====
+        # Reuse still-fresh components of a recent scan of the same (normalized) URL
+        cached_scan, fresh_components = result_cache.lookup(request.url, request.max_age)
+        fully_cached = cached_scan is not None and len(fresh_components) == len(SCAN_COMPONENTS)
+        fetch_context = None
+    
+    fetch_context = fetch_context or create_fetch_context(request.url, fresh_components, cancel_token, timer)
+    
+    # Every component reused: the stored analysis still applies if the engines are unchanged
+    cached_analysis = None
+    if cached_scan is not None and len(fresh_components) == len(SCAN_COMPONENTS):
+        cached_analysis = stored_analysis(cached_scan)
+    
+    # ===== STEPS 2-4.5: CONCURRENT SCAN PIPELINE =====
+    # HTTP, SSL/TLS, DNS and technology scans run concurrently; risk scoring,
+    # OWASP mapping and vulnerability analysis start once all four are done.
+    stages = build_website_scan_stages(
+        request.url, fresh_components, cancel_token, timer, fetch_context, cached_analysis
+    )
+    scheduler = StageScheduler(stages)
+    try:
+        stage_results = await scheduler.run(
+            on_stage_complete=StageProgress(tracker, scan_id, stages),
+            cancel_token=cancel_token
+        )
+    finally:
+        # Partial timings are kept for cancelled and failed scans
+        tracker.record_stage_timings(scan_id, scheduler.timings)
+    
+    scan_results = {component: stage_results[component] for component in SCAN_COMPONENTS}
+    risk_analysis = stage_results["risk_analysis"]
+    owasp_findings = stage_results["owasp_assessment"]
+    vulnerability_analysis = stage_results["vulnerability_analysis"]
+    
+    # ===== STEP 5: GENERATE EXECUTIVE SUMMARY =====
+    tracker.update_progress(scan_id, 7, 0)  # Step 7 - Report Generation
+    scan_duration = time.time() - start_time
+    scan_duration_ms = int(scan_duration * 1000)
+    timing_breakdown = build_timing_breakdown(
+        scheduler.timings, timer, scan_duration_ms, [*fresh_components, *(cached_analysis or {})]
+    )
+    
+    # ===== STEP 6: COMPILE RECOMMENDATIONS =====
+    recommendations = []
+    
+    # HTTP Headers recommendations
+    if "http_headers" in scan_results and "missing_headers" in scan_results["http_headers"]:
+        for header in scan_results["http_headers"]["missing_headers"]:
+            rec = scan_results["http_headers"]["recommendations"].get(header, "Add this header")
+            recommendations.append(f"[HTTP] {header}: {rec}")
+    
+    # SSL/TLS recommendations  
+    if "ssl_tls" in scan_results and not scan_results["ssl_tls"].get("error"):
+        ssl_data = scan_results["ssl_tls"]
+        if not ssl_data.get("valid_certificate", True):
+            recommendations.append("[SSL] Obtain a valid SSL certificate from a trusted CA")
+        if ssl_data.get("tls_version", "") < "TLSv1.2":
+            recommendations.append("[SSL] Upgrade to TLS 1.2 or higher")
+    
+    # DNS recommendations
+    if "dns_security" in scan_results and not scan_results["dns_security"].get("error"):
+        dns_data = scan_results["dns_security"]
+        if not dns_data.get("spf_record"):
+            recommendations.append("[DNS] Add SPF record to prevent email spoofing")
+        if not dns_data.get("dmarc_record"):
+            recommendations.append("[DNS] Add DMARC record for email authentication")
+    
+    # Calculate component grades
+    http_grade = scan_results.get("http_headers", {}).get("grade", "N/A")
+    ssl_grade = scan_results.get("ssl_tls", {}).get("grade", "N/A")
+    dns_grade = scan_results.get("dns_security", {}).get("grade", "N/A")
+    tech_grade = "B"  # Default tech grade
+    
+    # Extract issue counts from risk breakdown
+    risk_breakdown = risk_analysis.get("risk_breakdown", {})
+    critical_count = len(risk_breakdown.get("critical_issues", []))
+    high_count = len(risk_breakdown.get("high_issues", []))
+    medium_count = len(risk_breakdown.get("medium_issues", []))
+    
+    # ===== STEP 7: SAVE TO DATABASE =====
+    if fully_cached:
+        # Every component is still fresh: serve the stored scan, don't insert a duplicate
+        website_scan = cached_scan
+        scan_duration_ms = cached_scan.scan_duration_ms or 0
+        timing_breakdown = json.loads(cached_scan.timing_breakdown_json) if cached_scan.timing_breakdown_json else None
+    else:
+        previous_signals = (
+            json.loads(cached_scan.change_signals_json)
+            if cached_scan is not None and cached_scan.change_signals_json else {}
+        )
+        # Components revalidated by an incremental rescan count as freshly scanned
+        component_expires = (
+            result_cache.expiries(scan_results, None, {}) if planner
+            else result_cache.expiries(scan_results, cached_scan, fresh_components)
+        )
+        website_scan = _save_website_scan(
+            db, request, client_ip, scan_results, risk_analysis, owasp_findings,
+            vulnerability_analysis, scan_duration_ms, component_expires, timing_breakdown,
+            collect_change_signals(scan_results, fetch_context, previous_signals, fresh_components)
+        )
+        get_scan_latency_metrics().observe(timing_breakdown)
+    
+    # Mark scan as complete
+    tracker.complete_scan(scan_id)
+    
+    # ===== STEP 8: BUILD RESPONSE =====
+    # Get security summary from risk analysis
+    security_summary = risk_analysis.get("security_summary", {})
+    security_posture = security_summary.get("security_posture", "UNKNOWN")
+    
+    response = WebsiteScanResponse(
+        scan_id=website_scan.id,
+        url=request.url,
+        scan_timestamp=datetime.utcnow().isoformat(),
+        progress_scan_id=str(scan_id),  # Return progress tracking UUID
+        risk_score=risk_analysis["weighted_risk_score"],
+        risk_level=risk_analysis["overall_risk_level"],
+        overall_grade=risk_analysis["overall_grade"],
+        security_posture=security_posture,
+        http_grade=http_grade,
+        ssl_grade=ssl_grade,
+        dns_grade=dns_grade,
+        tech_grade=tech_grade,
+        owasp_compliance_score=owasp_findings.get("compliance_score", 0),
+        compliant_categories=owasp_findings.get("compliant_count", 0),
+        non_compliant_categories=owasp_findings.get("non_compliant_count", 0),
+        top_risks=risk_analysis.get("top_risks", []),
+        critical_issues_count=critical_count,
+        high_issues_count=high_count,
+        http_scan=scan_results.get("http_headers"),
+        ssl_scan=scan_results.get("ssl_tls"),
+        dns_scan=scan_results.get("dns_security"),
+        tech_scan=scan_results.get("technologies"),
+        owasp_assessment=owasp_findings,
+        risk_analysis=risk_analysis,
+        vulnerability_analysis=vulnerability_analysis,
+        scan_duration_ms=scan_duration_ms,
+        recommendations=recommendations,
+        cached=fully_cached,
+        cache_age_seconds=int((datetime.utcnow() - cached_scan.scanned_at).total_seconds()) if fresh_components else None,
+        reused_components=list(fresh_components),
+        timing_breakdown=timing_breakdown,
+        delta=build_scan_delta(cached_scan, scan_results, risk_analysis, planner.statuses) if planner else None
+    )
+    
+    return response
+
+
+def _save_website_scan(
+    db: Session,
+    request: WebsiteScanRequest,
+    client_ip: str,
+    scan_results: Dict[str, Any],
+    risk_analysis: Dict[str, Any],
+    owasp_findings: Dict[str, Any],
+    vulnerability_analysis: Dict[str, Any],
+    scan_duration_ms: int,
+    component_expires: Dict[str, str],
+    timing_breakdown: Dict[str, int],
+    change_signals: Dict[str, Any]
+) -> WebsiteScan:
+    """Persist a completed scan and return the stored row."""
+    website_scan = WebsiteScan(
+        url=request.url,
+        normalized_url=normalize_scan_url(request.url),
+        client_ip=client_ip,
+        risk_score=risk_analysis["weighted_risk_score"],
+        risk_level=risk_analysis["overall_risk_level"],
+        overall_grade=risk_analysis["overall_grade"],
+        http_scan_json=json.dumps(scan_results.get("http_headers", {})),
+        ssl_scan_json=json.dumps(scan_results.get("ssl_tls", {})),
+        dns_scan_json=json.dumps(scan_results.get("dns_security", {})),
+        tech_scan_json=json.dumps(scan_results.get("technologies", {})),
+        component_expires_json=json.dumps(component_expires),
+        change_signals_json=json.dumps(change_signals),
+        scan_duration_ms=scan_duration_ms,
+        timing_breakdown_json=json.dumps(timing_breakdown),
+        scanned_at=datetime.utcnow(),
+        permission_confirmed=request.confirmed_permission,
+        owner_confirmed=request.owner_confirmation,
+        legal_accepted=request.legal_responsibility
+    )
+    store_analysis(website_scan, {
+        "risk_analysis": risk_analysis,
+        "owasp_assessment": owasp_findings,
+        "vulnerability_analysis": vulnerability_analysis,
+    })
+    
+    db.add(website_scan)
+    db.commit()
+    db.refresh(website_scan)
+    
+    return website_scan
+
+
+@router.post("/scan-website/batch")
+async def scan_website_batch(request: BatchScanRequest, http_request: Request):
+    """
+    Bulk security assessment of a portfolio of websites (PASSIVE CHECKS ONLY).
+    
+    URLs are scanned concurrently through the same pipeline as /scan-website,
+    under a global and a per-host concurrency cap. Each result is streamed as
+    one NDJSON line as soon as it is ready, in completion order:
+    
+        {"index": 0, "url": "...", "status": "completed", "scan_id": "...", "error": null, "result": {...}}
+    
+    `status` is "completed", "rejected" (failed safety validation), "failed"
+    or "cancelled" (via /scan-progress/{scan_id}/cancel).
+    Every URL counts against the client's batch quota (see batch_scanner);
+    every URL is still checked individually by SafetyValidator. Scans still
+    running when the client disconnects are cancelled.
+    
+    Args:
+        request: BatchScanRequest with URLs and permission confirmation
+        http_request: FastAPI request object for IP extraction
+    
+    Returns:
+        StreamingResponse of NDJSON result lines
+    
+    Raises:
+        HTTPException: 400 for an empty or oversized batch; 429 with
+            Retry-After if the batch exceeds the client's remaining quota
+    """
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    
+    # Deduplicate while preserving submission order
+    urls = list(dict.fromkeys(url.strip() for url in request.urls if url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds maximum of {BATCH_MAX_URLS} URLs")
+    
+    validator = get_safety_validator()
+    rate_limit = await get_batch_rate_limiter().check_async(batch_rate_limit_key(client_ip), cost=len(urls))
+    if not rate_limit.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=rate_limit_message(rate_limit.retry_after),
+            headers={"Retry-After": str(rate_limit.retry_after)}
+        )
+    
+    limiter = get_batch_limiter()
+    
+    async def scan_one(index: int, url: str) -> Dict[str, Any]:
+        async with limiter.slot(url):
+            return await _scan_batch_target(index, url, request, client_ip, validator)
+    
+    async def stream_results():
+        tasks = [asyncio.ensure_future(scan_one(index, url)) for index, url in enumerate(urls)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                line = await next_result
+                yield json.dumps(jsonable_encoder(line)) + "\n"
+        finally:
+            # Client went away or batch finished: stop anything still pending
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+async def _scan_batch_target(
+    index: int,
+    url: str,
+    request: BatchScanRequest,
+    client_ip: str,
+    validator: SafetyValidator
+) -> Dict[str, Any]:
+    """Validate and scan one URL of a batch, returning its NDJSON line."""
+    line = {"index": index, "url": url, "status": None, "scan_id": None, "error": None, "result": None}
+    
+    is_valid, error_message = await validator.validate_target(
+        url,
+        request.confirmed_permission,
+        request.owner_confirmation,
+        request.legal_responsibility
+    )
+    if not is_valid:
+        line["status"] = "rejected"
+        line["error"] = error_message
+        return line
+    
+    scan_request = WebsiteScanRequest(
+        url=url,
+        confirmed_permission=request.confirmed_permission,
+        owner_confirmation=request.owner_confirmation,
+        legal_responsibility=request.legal_responsibility,
+        max_age=request.max_age,
+        incremental=request.incremental
+    )
+    
+    db = next(get_db())
+    cancellations = get_cancellation_registry()
+    
+    try:
+        tracker = ProgressTracker(db)
+        scan_id = tracker.create_scan(url)
+        line["scan_id"] = scan_id
+        
+        cancel_token = cancellations.create(scan_id)
+        try:
+            line["result"] = await _scan_validated_target(
+                scan_request, client_ip, db, tracker, scan_id, time.time(), cancel_token
+            )
+            line["status"] = "completed"
+        except asyncio.CancelledError:
+            # The batch was abandoned: stop the scan's stages and I/O too,
+            # which keep running on the stage executor otherwise
+            cancel_token.cancel()
+            tracker.cancel_scan(scan_id)
+            raise
+        except ScanCancelledError as e:
+            line["status"] = "cancelled"
+            line["error"] = str(e)
+        except Exception as e:
+            db.rollback()
+            tracker.set_error(scan_id, str(e))
+            line["status"] = "failed"
+            line["error"] = f"Scan failed: {str(e)}"
+    finally:
+        if line["scan_id"] is not None:
+            cancellations.release(line["scan_id"])
         db.close()
+    
+    return line
+
+
+@router.post("/scan-jobs", response_model=ScanJobResponse, status_code=202)
+async def submit_scan_job(request: WebsiteScanRequest, http_request: Request):
+    """
+    Queue a website security scan and return immediately.
+    
+    The scan runs on the bounded scan worker pool. Track it with
+    `/scan-progress/{scan_id}` and fetch the finished report from
+    `/scan-jobs/{scan_id}/result`.
+    
+    Args:
+        request: WebsiteScanRequest with URL and permission confirmation
+        http_request: FastAPI request object for IP extraction
+    
+    Returns:
+        Queued job information including the progress scan_id
+    
+    Raises:
+        HTTPException: 429 with Retry-After if the client is rate limited;
+            503 with Retry-After if the scan queue is full
+    """
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    queue = get_scan_job_queue()
+    
+    async def run_scan():
+        job_db = next(get_db())
+        try:
+            return await _run_website_scan(
+                request, client_ip, job_db, ProgressTracker(job_db), scan_id, rate_limit_checked=True
+            )
+        finally:
+            job_db.close()
+    
+    try:
+        # Apply backpressure before registering anything
+        queue.check_capacity()
+        
+        # Rate limited clients never take a queue slot
+        rate_limit = await get_safety_validator().rate_limiter.check_async(client_ip)
+        if not rate_limit.allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=rate_limit_message(rate_limit.retry_after),
+                headers={"Retry-After": str(rate_limit.retry_after)}
+            )
+        
+        db = next(get_db())
+        try:
+            scan_id = ProgressTracker(db).create_scan(request.url)
+        finally:
+            db.close()
+        
+        job = queue.submit(scan_id, request.url, run_scan)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(queue.estimated_wait_seconds())}
+        )
+    
+    return _build_job_response(job)
+
+
+@router.get("/scan-jobs/stats", response_model=ScanQueueStatsResponse)
+async def get_scan_queue_stats():
+    """
+    Get scan queue depth, worker utilisation and backpressure state.
+    
+    Returns:
+        Queue statistics
+    """
+    return ScanQueueStatsResponse(**get_scan_job_queue().stats())
+
+
+@router.get("/scan-jobs/{scan_id}", response_model=ScanJobResponse)
+async def get_scan_job(scan_id: str):
+    """
+    Get the status of a queued website scan.
+    
+    Args:
+        scan_id: UUID returned by POST /scan-jobs
+    
+    Returns:
+        Job status (queued, running, completed, failed, cancelled)
+    """
+    job = get_scan_job_queue().get(scan_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    
+    return _build_job_response(job)
+
+
+@router.get("/scan-jobs/{scan_id}/result", response_model=WebsiteScanResponse)
+async def get_scan_job_result(scan_id: str):
+    """
+    Get the finished report of a queued website scan.
+    
+    Args:
+        scan_id: UUID returned by POST /scan-jobs
+    
+    Returns:
+        WebsiteScanResponse when complete, or 202 with the job status while pending
+    """
+    queue = get_scan_job_queue()
+    job = queue.get(scan_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    
+    if job.status in (ScanJob.FAILED, ScanJob.CANCELLED):
+        raise HTTPException(status_code=job.error_status_code or 500, detail=job.error_message)
+    
+    if job.status != ScanJob.COMPLETED:
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(_build_job_response(job)),
+            headers={"Retry-After": "2"}
+        )
+    
+    return job.result
+
+
+def _build_job_response(job: ScanJob) -> ScanJobResponse:
+    """Convert a ScanJob into its API representation."""
+    queue = get_scan_job_queue()
+    return ScanJobResponse(
+        **job.to_dict(),
+        queue_depth=queue.queue_depth(),
+        progress_url=f"/scan-progress/{job.scan_id}",
+        result_url=f"/scan-jobs/{job.scan_id}/result"
+    )
+
+
+@router.get("/scan-metrics/latency")
+async def get_scan_latency():
+    """
+    Get latency histograms of scan stages and network sub-steps.
+    
+    Spans are named like the stored timing breakdown: "stage.<name>" for
+    pipeline stages, "tls.connect", "tls.handshake", "http.ttfb",
+    "http.body_read", "dns.<record>", "validation" and "total". Bucket
+    counts are cumulative; percentiles are bucket upper bounds.
+    
+    Returns:
+        Per-span count, sum, mean, max, p50/p95/p99 and bucket counts
+    """
+    return get_scan_latency_metrics().snapshot()
+
+
+@router.get("/scan-metrics/dns-cache")
+async def get_dns_cache_stats():
+    """
+    Get statistics of the shared DNS cache used by target validation,
+    the TLS scanner and the DNS security scanner.
+    
+    Returns:
+        Cached entry count and hit/miss counters
+    """
+    return dns_cache_stats()
+
+
+@router.get("/scan-metrics/maintenance")
+async def get_maintenance_status():
+    """
+    Get the status of the background database maintenance.
+    
+    Maintenance deletes scan progress, email/URL check history and website
+    scan reports past their retention period in small batches, then returns
+    the freed pages to the filesystem with an incremental vacuum.
+    
+    Returns:
+        Schedule, retention policies, run count and the last run's report
+        (rows deleted and remaining per table, bytes reclaimed, database size)
+    """
+    return get_maintenance_scheduler().status()
 
 
 @router.get("/scan-history")
@@ -343,6 +790,8 @@ async def get_scan_details(scan_id: int):
         if not scan:
             raise HTTPException(status_code=404, detail="Scan not found")
         
+        analysis = load_scan_analysis(db, scan)
+        
         return {
             "scan_id": scan.id,
             "url": scan.url,
@@ -353,8 +802,11 @@ async def get_scan_details(scan_id: int):
             "ssl_scan": json.loads(scan.ssl_scan_json) if scan.ssl_scan_json else {},
             "dns_scan": json.loads(scan.dns_scan_json) if scan.dns_scan_json else {},
             "tech_scan": json.loads(scan.tech_scan_json) if scan.tech_scan_json else {},
-            "owasp_assessment": json.loads(scan.owasp_assessment_json) if scan.owasp_assessment_json else {},
+            "owasp_assessment": analysis["owasp_assessment"],
+            "risk_analysis": analysis["risk_analysis"],
+            "vulnerability_analysis": analysis["vulnerability_analysis"],
             "scan_duration_ms": scan.scan_duration_ms,
+            "timing_breakdown": json.loads(scan.timing_breakdown_json) if scan.timing_breakdown_json else None,
             "scanned_at": scan.scanned_at.isoformat(),
             "client_ip": scan.client_ip
         }
@@ -387,10 +839,118 @@ async def get_scan_progress(scan_id: str):
         db.close()
 
 
+# Interval between keep-alive messages on idle progress streams (seconds)
+PROGRESS_KEEPALIVE_SECONDS = 15
+
+
+def _progress_snapshot(scan_id: str):
+    """Current progress of a scan, or None if the scan is unknown."""
+    db = SessionLocal()
+    try:
+        return ProgressTracker(db).get_progress(scan_id)
+    finally:
+        db.close()
+
+
+async def _progress_events(snapshot: Dict[str, Any], queue: asyncio.Queue):
+    """
+    Yield the progress snapshot, then every pushed update until the scan
+    reaches a terminal state. Yields None when no event arrived within the
+    keep-alive interval.
+
+    The queue must be subscribed before the snapshot is taken so no update
+    is lost in between.
+    """
+    yield snapshot
+    if is_terminal_event(snapshot):
+        return
+
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield None
+            continue
+        yield event
+        if is_terminal_event(event):
+            return
+
+
+@router.get("/scan-progress/{scan_id}/events")
+async def stream_scan_progress(scan_id: str):
+    """
+    Stream real-time progress of a website scan as Server-Sent Events.
+    
+    Each event carries the same payload as GET /scan-progress/{scan_id}.
+    The stream ends once the scan completes, fails or is cancelled.
+    
+    Args:
+        scan_id: UUID of the scan
+    """
+    broker = get_progress_broker()
+    queue = broker.subscribe(scan_id)
+    
+    snapshot = _progress_snapshot(scan_id)
+    if snapshot is None:
+        broker.unsubscribe(scan_id, queue)
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    async def event_stream():
+        try:
+            async for event in _progress_events(snapshot, queue):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(scan_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/scan-progress/{scan_id}")
+async def scan_progress_websocket(websocket: WebSocket, scan_id: str):
+    """
+    Push real-time progress of a website scan over a WebSocket.
+    
+    Sends the current state on connect, then every update; the server closes
+    the socket once the scan completes, fails or is cancelled.
+    """
+    broker = get_progress_broker()
+    queue = broker.subscribe(scan_id)
+    
+    try:
+        await websocket.accept()
+        snapshot = _progress_snapshot(scan_id)
+        if snapshot is None:
+            await websocket.close(code=4404, reason="Scan not found")
+            return
+        
+        async for event in _progress_events(snapshot, queue):
+            if event is None:
+                await websocket.send_json({"type": "keep-alive"})
+            else:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(scan_id, queue)
+
+
 @router.post("/scan-progress/{scan_id}/cancel")
 async def cancel_scan(scan_id: str):
     """
-    Cancel a running website scan.
+    Cancel a running or queued website scan.
+    
+    Remaining stages are skipped and in-flight HTTP, TLS and DNS requests
+    are aborted, so the scan releases its worker right away. A scan running
+    in another worker process is flagged in the database and stops at its
+    next stage boundary.
     
     Args:
         scan_id: UUID of the scan to cancel
@@ -432,12 +992,11 @@ async def generate_report(scan_id: int):
         http_scan = json.loads(scan.http_scan_json) if scan.http_scan_json else {}
         ssl_scan = json.loads(scan.ssl_scan_json) if scan.ssl_scan_json else {}
         dns_scan = json.loads(scan.dns_scan_json) if scan.dns_scan_json else {}
-        tech_scan = json.loads(scan.tech_scan_json) if scan.tech_scan_json else {}
-        owasp_data = json.loads(scan.owasp_assessment_json) if scan.owasp_assessment_json else {}
         
-        # Re-run vulnerability analysis for the report
-        vuln_engine = AdvancedVulnerabilityEngine()
-        vulnerability_analysis = vuln_engine.analyze(http_scan, ssl_scan, dns_scan, tech_scan)
+        # Stored analysis (recomputed only if the analysis engines changed)
+        analysis = load_scan_analysis(db, scan)
+        owasp_data = analysis["owasp_assessment"]
+        vulnerability_analysis = analysis["vulnerability_analysis"]
         
         # Build scan_data dict for report
         scan_data = {
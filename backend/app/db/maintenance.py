@@ -0,0 +1,126 @@
+"""
+Database housekeeping primitives: batched retention deletes and
+incremental vacuum.
+
+Old rows are deleted oldest first in small batches, each in its own short
+transaction, so pruning a large table never holds SQLite's single write
+lock for long and concurrent scans keep writing between batches. The age
+column must be indexed for each batch to be an index range scan.
+
+Deleted rows leave free pages inside the file. With auto_vacuum set to
+INCREMENTAL those pages can be returned to the filesystem a few at a time
+(PRAGMA incremental_vacuum) instead of rewriting the whole file with VACUUM.
+"""
+import time
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Column
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+# Rows deleted per transaction
+RETENTION_DELETE_BATCH_SIZE = 500
+
+# Pause between batches so other writers can take the lock (seconds)
+RETENTION_BATCH_PAUSE_SECONDS = 0.05
+
+# Free pages released per incremental vacuum transaction
+VACUUM_PAGES_PER_STEP = 1000
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def delete_older_than(
+    db: Session,
+    model,
+    column: Column,
+    cutoff: datetime,
+    batch_size: int = RETENTION_DELETE_BATCH_SIZE,
+    pause_seconds: float = RETENTION_BATCH_PAUSE_SECONDS
+) -> int:
+    """
+    Delete rows whose column is older than cutoff, in batches.
+
+    Args:
+        db: Session to delete with (committed after every batch)
+        model: Mapped class with an integer `id` primary key
+        column: Indexed timestamp column of the model
+        cutoff: Rows with column < cutoff are deleted
+        batch_size: Rows per transaction
+        pause_seconds: Sleep between batches
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted = 0
+    while True:
+        ids = [
+            row.id for row in
+            db.query(model.id).filter(column < cutoff).order_by(column).limit(batch_size)
+        ]
+        if not ids:
+            break
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause_seconds)
+    return deleted
+
+
+def database_pages(engine: Engine) -> Dict[str, int]:
+    """Page size, total pages and free pages of the database file."""
+    with engine.connect() as conn:
+        return {
+            "page_size": conn.exec_driver_sql("PRAGMA page_size").scalar(),
+            "page_count": conn.exec_driver_sql("PRAGMA page_count").scalar(),
+            "freelist_count": conn.exec_driver_sql("PRAGMA freelist_count").scalar(),
+        }
+
+
+def enable_incremental_vacuum(engine: Engine) -> bool:
+    """
+    Switch the database to auto_vacuum=INCREMENTAL.
+
+    The mode of an existing database only changes with a full VACUUM, which
+    rewrites the file once (and blocks writers meanwhile).
+
+    Returns:
+        True if the database was converted, False if it already was incremental
+    """
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == AUTO_VACUUM_INCREMENTAL:
+            return False
+
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def incremental_vacuum(engine: Engine, pages_per_step: int = VACUUM_PAGES_PER_STEP) -> int:
+    """
+    Release every free page, pages_per_step per transaction.
+
+    Has no effect unless auto_vacuum is INCREMENTAL.
+
+    Returns:
+        Number of pages released
+    """
+    released = 0
+    while True:
+        with engine.begin() as conn:
+            before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if not before:
+                break
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages_per_step)})")
+            after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if after >= before:
+            break
+        released += before - after
+    return released
@@ -0,0 +1,36 @@
+"""
+Lightweight schema upgrades for existing SQLite databases.
+
+Base.metadata.create_all only creates missing tables; it never alters a table
+that already exists. This adds columns and indexes introduced after a
+database was first created so older cyberguardx.db files keep working.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+
+
+def upgrade_schema(engine: Engine):
+    """Add missing nullable columns and missing indexes to existing tables."""
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    # SQLite cannot add a NOT NULL column without a default
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
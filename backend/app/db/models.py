@@ -13,7 +13,7 @@ class ScanHistory(Base):
     email_breached = Column(Boolean, nullable=False)
     phishing_score = Column(Float, nullable=True)
     risk_level = Column(String, nullable=False)
-    scanned_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    scanned_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # Retention cutoff
     
     # Enhanced breach information
     pwned_count = Column(Integer, nullable=True, default=0)  # Number of breaches
@@ -28,6 +28,7 @@ class WebsiteScan(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False, index=True)
+    normalized_url = Column(String, nullable=True, index=True)  # Result cache key
     client_ip = Column(String, nullable=False)
     
     # Overall risk assessment
@@ -41,10 +42,16 @@ class WebsiteScan(Base):
     dns_scan_json = Column(Text, nullable=True)   # DNS security scan
     tech_scan_json = Column(Text, nullable=True)  # Technology detection
     owasp_assessment_json = Column(Text, nullable=True)  # OWASP Top 10 mapping
+    risk_analysis_json = Column(Text, nullable=True)  # RiskScorer output
+    vulnerability_analysis_json = Column(Text, nullable=True)  # AdvancedVulnerabilityEngine output
+    analysis_engine_version = Column(String, nullable=True)  # Engines that produced the stored analysis
+    component_expires_json = Column(Text, nullable=True)  # Per-component cache expiry (ISO timestamps)
+    change_signals_json = Column(Text, nullable=True)  # ETag/body hash, cert fingerprint, SOA serial for incremental rescans
     
     # Metadata
     scan_duration_ms = Column(Integer, nullable=True)  # Scan duration in milliseconds
-    scanned_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    timing_breakdown_json = Column(Text, nullable=True)  # Per-stage/sub-step durations {span: ms}
+    scanned_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # Retention cutoff
     
     # Legal/safety tracking
     permission_confirmed = Column(Boolean, default=False)
@@ -66,7 +73,7 @@ class ScanProgress(Base):
     step_details = Column(Text, nullable=True)  # JSON with sub-steps
     
     # Timing
-    start_time = Column(DateTime, default=datetime.utcnow, nullable=False)
+    start_time = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # Retention cutoff
     last_update = Column(DateTime, default=datetime.utcnow, nullable=False)
     estimated_seconds_remaining = Column(Integer, nullable=True)
     
@@ -77,3 +84,6 @@ class ScanProgress(Base):
     
     # Cancellation
     is_cancelled = Column(Boolean, default=False)
+    
+    # Per-stage status and duration (partial if the scan was cancelled or failed)
+    stage_timings_json = Column(Text, nullable=True)
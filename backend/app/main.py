@@ -1,11 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import email_checker, history, url_checker, website_scanner, password_checker
 from app.db.database import Base, engine
 from app.db import models  # noqa: F401
+from app.db.migrations import upgrade_schema
+from app.services.maintenance_scheduler import get_maintenance_scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema upgrades run on startup, not whenever the module is imported
+    upgrade_schema(engine)
+    # Retention deletes and incremental vacuum run in the background
+    scheduler = get_maintenance_scheduler()
+    scheduler.start()
+    yield
+    scheduler.stop()
+
 
-app = FastAPI(title="CyberGuardX")
+app = FastAPI(title="CyberGuardX", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
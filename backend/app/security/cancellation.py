@@ -0,0 +1,125 @@
+"""
+Cooperative Scan Cancellation
+
+A CancellationToken is created per scan and passed down the scan pipeline.
+Cancelling it skips stages that have not started and aborts in-flight I/O:
+scanners register closers for their open sockets/responses, which are
+invoked immediately on cancellation so blocked reads fail fast instead of
+running into their timeouts.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class ScanCancelledError(Exception):
+    """Raised when work is attempted on a cancelled scan."""
+
+
+class CancellationToken:
+    """Thread-safe, one-shot cancellation signal with abort callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Signal cancellation and run every registered abort callback once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            self._invoke(callback)
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            ScanCancelledError: If the scan has been cancelled
+        """
+        if self._event.is_set():
+            raise ScanCancelledError("Scan was cancelled")
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback on cancellation (immediately if already cancelled).
+
+        Typically closes a socket or response so blocking I/O aborts.
+
+        Returns:
+            Function removing the callback once the guarded I/O is done
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+
+        self._invoke(callback)
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @staticmethod
+    def _invoke(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception:
+            # Aborting I/O is best effort; the owner handles the resulting error
+            pass
+
+
+class CancellationRegistry:
+    """Cancellation tokens of active scans, keyed by scan_id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, CancellationToken] = {}
+
+    def create(self, scan_id: str) -> CancellationToken:
+        """Get the scan's token, creating it if needed."""
+        with self._lock:
+            token = self._tokens.get(scan_id)
+            if token is None:
+                token = self._tokens[scan_id] = CancellationToken()
+            return token
+
+    def get(self, scan_id: str) -> Optional[CancellationToken]:
+        with self._lock:
+            return self._tokens.get(scan_id)
+
+    def cancel(self, scan_id: str) -> bool:
+        """
+        Cancel an active scan.
+
+        Returns:
+            True if the scan had a token (was queued or running)
+        """
+        token = self.get(scan_id)
+        if token is None:
+            return False
+        token.cancel()
+        return True
+
+    def release(self, scan_id: str):
+        """Forget a finished scan's token."""
+        with self._lock:
+            self._tokens.pop(scan_id, None)
+
+
+# Global registry instance
+_cancellation_registry = CancellationRegistry()
+
+
+def get_cancellation_registry() -> CancellationRegistry:
+    """Get the global scan cancellation registry."""
+    return _cancellation_registry
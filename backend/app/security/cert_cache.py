@@ -0,0 +1,152 @@
+"""
+Certificate Analysis Cache
+
+Sites behind shared infrastructure (CDNs, hosting platforms, wildcard
+certificates) present the same leaf certificate. Its parsed details - subject,
+issuer, validity window, serial, SAN list - are cached process-wide, keyed by
+the SHA-256 fingerprint of the leaf certificate, so a batch scan parses each
+distinct certificate once. An entry expires at the certificate's notAfter.
+
+Only facts of the certificate itself are cached. Everything that depends on
+the connection (chain validation, hostname match, TLS version, cipher) still
+comes from each scan's own handshake, and the time-relative grading inputs
+(days until expiry, expired, expires soon) are recomputed on every lookup.
+"""
+
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Distinct certificates kept; least recently used entries are evicted first
+CERT_CACHE_MAX_ENTRIES = 4096
+
+# Certificates expiring within this many days are reported as expiring soon
+EXPIRES_SOON_DAYS = 30
+
+_CERT_DATE_FORMAT = '%b %d %H:%M:%S %Y %Z'
+
+
+def certificate_fingerprint(der_cert: bytes) -> str:
+    """SHA-256 fingerprint (hex) of a DER-encoded certificate."""
+    return hashlib.sha256(der_cert).hexdigest()
+
+
+def analyze_certificate(cert: Dict, fingerprint: str) -> Dict[str, any]:
+    """
+    Parse the details of a certificate as returned by SSLSocket.getpeercert().
+
+    Returns:
+        Time-independent certificate analysis; not_before/not_after are datetimes
+    """
+    subject = dict(x[0] for x in cert.get('subject', []))
+    issuer = dict(x[0] for x in cert.get('issuer', []))
+    return {
+        "common_name": subject.get('commonName', 'Unknown'),
+        "organization": subject.get('organizationName', 'Unknown'),
+        "issuer": issuer.get('organizationName', 'Unknown'),
+        "not_before": datetime.datetime.strptime(cert['notBefore'], _CERT_DATE_FORMAT),
+        "not_after": datetime.datetime.strptime(cert['notAfter'], _CERT_DATE_FORMAT),
+        "serial_number": cert.get('serialNumber', 'Unknown'),
+        "version": cert.get('version', 'Unknown'),
+        "subject_alt_names": [name[1] for name in cert.get('subjectAltName', [])],
+        "fingerprint_sha256": fingerprint,
+    }
+
+
+def certificate_details(analysis: Dict[str, any], now: Optional[datetime.datetime] = None) -> Dict[str, any]:
+    """
+    Certificate details as reported in scan results, with the expiry fields
+    computed for the current time.
+    """
+    now = now or datetime.datetime.utcnow()
+    days_until_expiry = (analysis["not_after"] - now).days
+    return {
+        "common_name": analysis["common_name"],
+        "organization": analysis["organization"],
+        "issuer": analysis["issuer"],
+        "valid_from": analysis["not_before"].isoformat(),
+        "valid_until": analysis["not_after"].isoformat(),
+        "days_until_expiry": days_until_expiry,
+        "expired": days_until_expiry < 0,
+        "expires_soon": 0 <= days_until_expiry < EXPIRES_SOON_DAYS,
+        "serial_number": analysis["serial_number"],
+        "version": analysis["version"],
+        "subject_alt_names": list(analysis["subject_alt_names"]),
+        "fingerprint_sha256": analysis["fingerprint_sha256"],
+    }
+
+
+class CertificateAnalysisCache:
+    """Thread-safe LRU cache of certificate analyses, expiring at notAfter."""
+
+    def __init__(self, max_entries: int = CERT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, any]]:
+        """Cached analysis of a certificate, or None if unknown or past notAfter."""
+        with self._lock:
+            analysis = self._entries.get(fingerprint)
+            if analysis is not None and analysis["not_after"] <= datetime.datetime.utcnow():
+                del self._entries[fingerprint]
+                analysis = None
+            if analysis is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self._hits += 1
+            return analysis
+
+    def put(self, fingerprint: str, analysis: Dict[str, any]):
+        """Cache an analysis until the certificate's notAfter (expired certificates are not cached)."""
+        if analysis["not_after"] <= datetime.datetime.utcnow():
+            return
+        with self._lock:
+            self._entries[fingerprint] = analysis
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_analyze(self, der_cert: bytes, decode: Callable[[], Dict]) -> Tuple[Dict[str, any], bool]:
+        """
+        Analysis of a leaf certificate, decoded and parsed only on a cache miss.
+
+        Args:
+            der_cert: DER-encoded leaf certificate (the cache key is its fingerprint)
+            decode: Returns the decoded certificate, e.g. SSLSocket.getpeercert
+
+        Returns:
+            (analysis, True if it came from the cache)
+        """
+        fingerprint = certificate_fingerprint(der_cert)
+        analysis = self.get(fingerprint)
+        if analysis is not None:
+            return analysis, True
+        analysis = analyze_certificate(decode(), fingerprint)
+        self.put(fingerprint, analysis)
+        return analysis, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and hit/miss counters."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+# Global cache instance
+_cert_cache = CertificateAnalysisCache()
+
+
+def get_cert_cache() -> CertificateAnalysisCache:
+    """Get the shared certificate analysis cache."""
+    return _cert_cache
@@ -0,0 +1,192 @@
+"""
+Shared DNS Cache
+
+One process-wide, TTL-honoring DNS cache used by the target validator, the
+connection layer (TLS scanner address resolution) and the DNS security
+scanner, so a batch of related scans queries each record once per TTL
+instead of once per stage and scan.
+
+Built on dnspython's thread-safe LRUCache, which every resolver created here
+shares: answers are kept for their TTL, NXDOMAIN and empty answers are
+cached negatively (for the SOA minimum TTL of the response), and hits and
+misses are counted.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+
+# Cached (name, type) answers; least recently used entries are evicted first
+DNS_CACHE_MAX_ENTRIES = 50000
+
+# Lookup timeout for address resolution (seconds)
+ADDRESS_LOOKUP_TIMEOUT = 5.0
+
+# Address records, in order of preference
+ADDRESS_RECORD_TYPES = ("A", "AAAA")
+
+_dns_cache = dns.resolver.LRUCache(DNS_CACHE_MAX_ENTRIES)
+
+
+def get_dns_cache() -> dns.resolver.LRUCache:
+    """Get the shared DNS answer cache."""
+    return _dns_cache
+
+
+# Shared resolvers (created on first use); callers pass their timeout per lookup as `lifetime`
+_resolver: Optional[dns.resolver.Resolver] = None
+_async_resolver: Optional[dns.asyncresolver.Resolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> dns.resolver.Resolver:
+    """Get the shared blocking resolver, backed by the shared cache."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = dns.resolver.Resolver()
+            _resolver.cache = _dns_cache
+        return _resolver
+
+
+def get_async_resolver() -> dns.asyncresolver.Resolver:
+    """Get the shared async resolver, backed by the shared cache."""
+    global _async_resolver
+    with _resolver_lock:
+        if _async_resolver is None:
+            _async_resolver = dns.asyncresolver.Resolver()
+            _async_resolver.cache = _dns_cache
+        return _async_resolver
+
+
+def resolve_host(hostname: str, port: int, timeout: float = ADDRESS_LOOKUP_TIMEOUT) -> List[Tuple[int, Tuple]]:
+    """
+    Resolve a hostname to socket addresses through the shared cache.
+
+    IPv4 (A) addresses come first, then IPv6 (AAAA). IP literals are returned
+    as is. Single-label names (localhost, search-domain hosts) go to the
+    system resolver, uncached. A name that does not exist or has no address
+    fails from the cache (negative answers are kept for the SOA minimum TTL)
+    without asking the system resolver again; the system resolver is only
+    used when no DNS server is usable at all. A timeout for one address
+    family is ignored when the other family returned addresses.
+
+    Returns:
+        [(address family, socket address)]
+
+    Raises:
+        socket.gaierror: If the hostname does not resolve
+    """
+    literal = _ip_literal(hostname, port)
+    if literal is not None:
+        return literal
+    if "." not in hostname.rstrip("."):
+        return _system_resolve(hostname, port)
+
+    resolver = get_resolver()
+    addresses = []
+    timed_out = False
+    try:
+        for rdtype in ADDRESS_RECORD_TYPES:
+            try:
+                answers = resolver.resolve(hostname, rdtype, lifetime=timeout)
+            except dns.resolver.NoAnswer:
+                continue
+            except dns.exception.Timeout:
+                # Only fatal if the other family has no addresses either
+                timed_out = True
+                continue
+            addresses.extend(socket_address(rdata.address, port) for rdata in answers)
+    except dns.resolver.NXDOMAIN:
+        raise socket.gaierror(socket.EAI_NONAME, f"{hostname} does not exist")
+    except (dns.resolver.NoNameservers, dns.resolver.NoResolverConfiguration):
+        return _system_resolve(hostname, port)
+
+    if addresses:
+        return addresses
+    if timed_out:
+        raise socket.gaierror(socket.EAI_AGAIN, f"DNS lookup for {hostname} timed out")
+    raise socket.gaierror(socket.EAI_NONAME, f"{hostname} has no address records")
+
+
+async def resolve_host_async(
+    hostname: str,
+    port: int,
+    timeout: float = ADDRESS_LOOKUP_TIMEOUT
+) -> List[Tuple[int, Tuple]]:
+    """
+    Non-blocking resolve_host: A and AAAA are queried concurrently.
+
+    Returns:
+        [(address family, socket address)], IPv4 first
+
+    Raises:
+        socket.gaierror: If the hostname does not resolve
+    """
+    literal = _ip_literal(hostname, port)
+    if literal is not None:
+        return literal
+    if "." not in hostname.rstrip("."):
+        return await _system_resolve_async(hostname, port)
+
+    resolver = get_async_resolver()
+    lookups = await asyncio.gather(
+        *(resolver.resolve(hostname, rdtype, lifetime=timeout) for rdtype in ADDRESS_RECORD_TYPES),
+        return_exceptions=True
+    )
+    addresses = []
+    for answers in lookups:
+        if isinstance(answers, dns.resolver.NXDOMAIN):
+            raise socket.gaierror(socket.EAI_NONAME, f"{hostname} does not exist")
+        if isinstance(answers, BaseException):
+            # NoAnswer or a timeout for one family, or no usable nameserver
+            continue
+        addresses.extend(socket_address(rdata.address, port) for rdata in answers)
+
+    if addresses:
+        return addresses
+    if any(isinstance(answers, (dns.resolver.NoNameservers, dns.resolver.NoResolverConfiguration))
+           for answers in lookups):
+        return await _system_resolve_async(hostname, port)
+    if any(isinstance(answers, dns.exception.Timeout) for answers in lookups):
+        raise socket.gaierror(socket.EAI_AGAIN, f"DNS lookup for {hostname} timed out")
+    raise socket.gaierror(socket.EAI_NONAME, f"{hostname} has no address records")
+
+
+def _ip_literal(hostname: str, port: int) -> Optional[List[Tuple[int, Tuple]]]:
+    try:
+        return [socket_address(str(ipaddress.ip_address(hostname)), port)]
+    except ValueError:
+        return None
+
+
+def socket_address(ip: str, port: int) -> Tuple[int, Tuple]:
+    """(address family, socket address) for an IP address string."""
+    if ":" in ip:
+        return socket.AF_INET6, (ip, port, 0, 0)
+    return socket.AF_INET, (ip, port)
+
+
+def _system_resolve(hostname: str, port: int) -> List[Tuple[int, Tuple]]:
+    return [
+        (family, address)
+        for family, _, _, _, address in socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    ]
+
+
+async def _system_resolve_async(hostname: str, port: int) -> List[Tuple[int, Tuple]]:
+    infos = await asyncio.get_running_loop().getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    return [(family, address) for family, _, _, _, address in infos]
+
+
+def dns_cache_stats() -> Dict[str, int]:
+    """Entry count and hit/miss counters of the shared cache."""
+    statistics = _dns_cache.get_statistics_snapshot()
+    return {"entries": len(_dns_cache.data), "hits": statistics.hits, "misses": statistics.misses}
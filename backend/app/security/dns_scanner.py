@@ -3,14 +3,29 @@ DNS Security Scanner
 
 Performs PASSIVE DNS lookups for security records.
 Only queries public DNS servers - NO ATTACKS.
+
+All record lookups of a scan are issued concurrently through an async
+resolver under one deadline, so the stage takes about one round trip instead
+of the sum of every lookup. Lookups that fail or run out of time leave their
+record reported as absent and are listed in "failed_lookups".
 """
 
+import asyncio
 import dns.resolver
 import dns.exception
 from typing import Dict, List, Optional
 from datetime import datetime
 from urllib.parse import urlparse
 
+from .cancellation import CancellationToken
+from .dns_cache import get_async_resolver
+from .scan_timer import ScanTimer
+from .spf_evaluator import SPF_LOOKUP_LIMIT, SPFExpander, spf_records
+
+
+# Overall budget for every lookup of one scan (individual lookups also stop at `timeout`)
+DNS_STAGE_DEADLINE_SECONDS = 6.0
+
 
 class DNSSecurityScanner:
     """
@@ -20,22 +35,97 @@ class DNSSecurityScanner:
     NO ZONE TRANSFERS, NO EXPLOITS.
     """
     
-    def __init__(self, timeout: float = 5.0):
+    def __init__(
+        self,
+        timeout: float = 5.0,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[ScanTimer] = None,
+        deadline_seconds: float = DNS_STAGE_DEADLINE_SECONDS
+    ):
         self.timeout = timeout
-        self.resolver = dns.resolver.Resolver()
-        self.resolver.timeout = timeout
-        self.resolver.lifetime = timeout
+        self.deadline_seconds = deadline_seconds
+        self.cancel_token = cancel_token
+        self.timer = timer or ScanTimer()
+        self.resolver = get_async_resolver()
+        self._record_ttls: List[int] = []
+        self._failed_lookups: List[Dict[str, str]] = []
+        self._deadline = 0.0
+    
+    async def _resolve(self, name: str, rdtype: str):
+        """
+        Resolve a record within the stage deadline, remembering its TTL for
+        result freshness and any failure other than a missing record.
+        
+        Answers (and missing records) come from the shared DNS cache while
+        their TTL lasts; min_ttl then reflects the TTL the record was stored with.
+        """
+        remaining = self._deadline - asyncio.get_running_loop().time()
+        try:
+            if remaining <= 0:
+                raise dns.exception.Timeout()
+            answers = await self.resolver.resolve(name, rdtype, lifetime=min(self.timeout, remaining))
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            raise
+        except Exception as e:
+            error = "timeout" if isinstance(e, dns.exception.Timeout) else type(e).__name__
+            self._failed_lookups.append({"name": name, "type": rdtype, "error": error})
+            raise
+        if answers.rrset is not None:
+            self._record_ttls.append(answers.rrset.ttl)
+        return answers
+    
+    async def _timed(self, span: str, lookup):
+        with self.timer.span(span):
+            return await lookup
+    
+    async def _run_lookups(self, lookups: Dict[str, any]) -> Dict[str, any]:
+        """
+        Run lookup coroutines concurrently under the stage deadline.
+        
+        Args:
+            lookups: {timer span name: coroutine}
+            
+        Returns:
+            {timer span name: lookup result}
+            
+        Raises:
+            ScanCancelledError: If the scan is cancelled meanwhile
+        """
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.time() + self.deadline_seconds
+        
+        gathered = asyncio.gather(*(self._timed(span, lookup) for span, lookup in lookups.items()))
+        # Cancellation arrives from another thread (or already happened): abort every pending lookup
+        unregister = (
+            self.cancel_token.register(lambda: loop.call_soon_threadsafe(gathered.cancel))
+            if self.cancel_token is not None else (lambda: None)
+        )
+        try:
+            results = await gathered
+        except asyncio.CancelledError:
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            raise
+        finally:
+            unregister()
+        return dict(zip(lookups, results))
     
     def scan(self, url: str) -> Dict[str, any]:
         """
         Scan DNS configuration for security records.
         
+        Blocks until done; call from a worker thread (async callers use scan_async).
+        
         Args:
             url: Target URL to scan
             
         Returns:
             Dictionary with DNS security scan results
         """
+        return asyncio.run(self.scan_async(url))
+    
+    async def scan_async(self, url: str) -> Dict[str, any]:
+        """Scan DNS configuration for security records (see scan)."""
         result = {
             "url": url,
             "scan_timestamp": datetime.utcnow().isoformat(),
@@ -52,28 +142,43 @@ class DNSSecurityScanner:
             "score": 0,
             "issues": [],
             "recommendations": [],
-            "risk_points": 0
+            "risk_points": 0,
+            "soa_serial": None,
+            "min_ttl": None,
+            "failed_lookups": [],
+            "complete": True
         }
+        self._record_ttls = []
+        self._failed_lookups = []
         
         try:
             parsed = urlparse(url)
             domain = parsed.netloc.split(':')[0]
             result["domain"] = domain
             
-            # Check SPF record
-            result["spf"] = self._check_spf(domain)
-            
-            # Check DMARC record
-            result["dmarc"] = self._check_dmarc(domain)
-            
-            # Check MX records (for DKIM context)
-            result["mx_records"] = self._check_mx(domain)
+            # SPF, DMARC, MX (for DKIM context), CAA, DNSSEC and the zone serial
+            # (unchanged serial means unchanged records, for incremental rescans)
+            lookups = await self._run_lookups({
+                "dns.spf": self._check_spf(domain),
+                "dns.dmarc": self._check_dmarc(domain),
+                "dns.mx": self._check_mx(domain),
+                "dns.caa": self._check_caa(domain),
+                "dns.dnssec": self._check_dnssec(domain),
+                "dns.soa": self._soa_serial(domain),
+            })
+            result["spf"] = lookups["dns.spf"]
+            result["dmarc"] = lookups["dns.dmarc"]
+            result["mx_records"] = lookups["dns.mx"]
+            result["caa_records"] = lookups["dns.caa"]
+            result["dnssec"] = lookups["dns.dnssec"]
+            result["soa_serial"] = lookups["dns.soa"]
             
-            # Check CAA records
-            result["caa_records"] = self._check_caa(domain)
+            # Records of failed lookups are reported as absent
+            result["failed_lookups"] = list(self._failed_lookups)
+            result["complete"] = not self._failed_lookups
             
-            # Check DNSSEC
-            result["dnssec"] = self._check_dnssec(domain)
+            # Shortest TTL bounds how long these results stay accurate
+            result["min_ttl"] = min(self._record_ttls) if self._record_ttls else None
             
             # Analyze results and calculate risk
             issues = []
@@ -85,6 +190,9 @@ class DNSSecurityScanner:
             elif result["spf"]["too_permissive"]:
                 issues.append("SPF record too permissive (allows +all)")
                 risk_points += 12
+            if result["spf"].get("errors"):
+                issues.append(f"SPF record fails evaluation: {result['spf']['errors'][0]}")
+                risk_points += 6
             
             if not result["dmarc"]["present"]:
                 issues.append("No DMARC record configured")
@@ -125,7 +233,7 @@ class DNSSecurityScanner:
         
         return result
     
-    def _check_spf(self, domain: str) -> Dict[str, any]:
+    async def _check_spf(self, domain: str) -> Dict[str, any]:
         """Check for SPF (Sender Policy Framework) record."""
         result = {
             "present": False,
@@ -135,23 +243,31 @@ class DNSSecurityScanner:
         }
         
         try:
-            answers = self.resolver.resolve(domain, 'TXT')
+            answers = await self._resolve(domain, 'TXT')
+            records = spf_records(answers)
             
-            for rdata in answers:
-                txt_string = str(rdata).strip('"')
+            if records:
+                txt_string = records[0]
+                result["present"] = True
+                result["record"] = txt_string
                 
-                if txt_string.startswith('v=spf1'):
-                    result["present"] = True
-                    result["record"] = txt_string
-                    
-                    # Check if too permissive
-                    if '+all' in txt_string or '?all' in txt_string:
-                        result["too_permissive"] = True
-                    
-                    # Extract mechanisms
-                    mechanisms = txt_string.split()[1:]  # Skip 'v=spf1'
-                    result["mechanisms"] = mechanisms
-                    break
+                # Extract mechanisms
+                mechanisms = txt_string.split()[1:]  # Skip 'v=spf1'
+                result["mechanisms"] = mechanisms
+                
+                # Follow include:/redirect= and count lookups against the RFC 7208 limits
+                evaluation = await SPFExpander(self._resolve).expand(domain, txt_string, answers.rrset.ttl)
+                if len(records) > 1:
+                    evaluation["errors"].insert(0, f"{domain} has {len(records)} SPF records")
+                result.update(evaluation)
+                
+                # Check if too permissive (directly, via redirect or via an included +all)
+                if (
+                    '+all' in txt_string or '?all' in txt_string
+                    or evaluation["all_qualifier"] in ('+', '?')
+                    or evaluation["permissive_includes"]
+                ):
+                    result["too_permissive"] = True
         
         except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
             pass
@@ -160,7 +276,7 @@ class DNSSecurityScanner:
         
         return result
     
-    def _check_dmarc(self, domain: str) -> Dict[str, any]:
+    async def _check_dmarc(self, domain: str) -> Dict[str, any]:
         """Check for DMARC (Domain-based Message Authentication) record."""
         result = {
             "present": False,
@@ -173,7 +289,7 @@ class DNSSecurityScanner:
         
         try:
             dmarc_domain = f'_dmarc.{domain}'
-            answers = self.resolver.resolve(dmarc_domain, 'TXT')
+            answers = await self._resolve(dmarc_domain, 'TXT')
             
             for rdata in answers:
                 txt_string = str(rdata).strip('"')
@@ -203,12 +319,43 @@ class DNSSecurityScanner:
         
         return result
     
-    def _check_mx(self, domain: str) -> List[str]:
+    def soa_serial(self, domain: str) -> Optional[int]:
+        """
+        Serial of the SOA record of the zone containing the domain.
+        
+        Zone operators bump the serial on every change, so it is a cheap
+        signal of whether any record of the zone may have changed.
+        """
+        async def lookup():
+            return (await self._run_lookups({"dns.soa": self._soa_serial(domain)}))["dns.soa"]
+        
+        try:
+            return asyncio.run(lookup())
+        except Exception:
+            return None
+    
+    async def _soa_serial(self, domain: str) -> Optional[int]:
+        name = domain.rstrip('.')
+        
+        try:
+            # Walk up from the domain to its zone apex
+            while name:
+                try:
+                    answers = await self._resolve(name, 'SOA')
+                    return answers[0].serial
+                except dns.resolver.NoAnswer:
+                    name = name.partition('.')[2]
+        except Exception:
+            pass
+        
+        return None
+    
+    async def _check_mx(self, domain: str) -> List[str]:
         """Check MX (Mail Exchange) records."""
         mx_records = []
         
         try:
-            answers = self.resolver.resolve(domain, 'MX')
+            answers = await self._resolve(domain, 'MX')
             mx_records = [str(rdata.exchange) for rdata in answers]
         except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
             pass
@@ -217,12 +364,12 @@ class DNSSecurityScanner:
         
         return mx_records
     
-    def _check_caa(self, domain: str) -> List[Dict[str, str]]:
+    async def _check_caa(self, domain: str) -> List[Dict[str, str]]:
         """Check CAA (Certificate Authority Authorization) records."""
         caa_records = []
         
         try:
-            answers = self.resolver.resolve(domain, 'CAA')
+            answers = await self._resolve(domain, 'CAA')
             
             for rdata in answers:
                 caa_records.append({
@@ -237,7 +384,7 @@ class DNSSecurityScanner:
         
         return caa_records
     
-    def _check_dnssec(self, domain: str) -> Dict[str, any]:
+    async def _check_dnssec(self, domain: str) -> Dict[str, any]:
         """Check if DNSSEC is enabled."""
         result = {
             "enabled": False,
@@ -246,7 +393,7 @@ class DNSSecurityScanner:
         
         try:
             # Check for DNSKEY record (indicates DNSSEC)
-            answers = self.resolver.resolve(domain, 'DNSKEY')
+            answers = await self._resolve(domain, 'DNSKEY')
             
             if answers:
                 result["enabled"] = True
@@ -292,6 +439,21 @@ class DNSSecurityScanner:
                 "impact": "Attackers can send email claiming to be from your domain"
             })
         
+        if scan_result["spf"].get("lookup_limit_exceeded"):
+            recommendations.append({
+                "priority": "HIGH",
+                "issue": f"SPF record needs {scan_result['spf']['lookup_count']} DNS lookups",
+                "fix": f"Flatten or remove include: mechanisms to stay within {SPF_LOOKUP_LIMIT} lookups",
+                "impact": "Receivers return a permanent error, so SPF fails for all mail from your domain"
+            })
+        elif scan_result["spf"].get("errors"):
+            recommendations.append({
+                "priority": "MEDIUM",
+                "issue": "SPF record fails evaluation",
+                "fix": f"Fix the SPF record: {scan_result['spf']['errors'][0]}",
+                "impact": "Receivers may treat the SPF record as invalid"
+            })
+        
         if not scan_result["dmarc"]["present"]:
             recommendations.append({
                 "priority": "HIGH",
@@ -0,0 +1,328 @@
+"""
+Domain Policy Engine
+
+Decides which domains may be scanned from the rules in
+data/domain_policy.json:
+
+- test_domains: explicitly scannable test targets (relaxed permission checks)
+- allow: in-scope domains, e.g. a customer's scope list
+- block: prohibited domains or whole TLDs (e.g. "gov")
+
+A rule matches the domain and all of its subdomains ("*.example.com" matches
+subdomains only). Rules are compiled into a trie of reversed labels, so a
+lookup walks the domain's labels once - time proportional to the domain
+length, however many rules there are. The most specific matching rule wins;
+on a tie, block beats test_domains beats allow. With "default": "block" only
+domains matched by an allow or test_domains rule may be scanned.
+
+Public-suffix aware: allow and test_domains rules that are public suffixes
+(com, co.uk, github.io, ...) are rejected, as they would open up every site
+registered under them. Suffixes come from data/public_suffix_list.dat.
+
+The policy file is re-read when it changes (checked every few seconds), so
+scope and block lists can be updated without a restart. A file that fails to
+load leaves the previous policy in force.
+"""
+
+import ipaddress
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+POLICY_PATH = DATA_DIR / "domain_policy.json"
+PUBLIC_SUFFIX_PATH = DATA_DIR / "public_suffix_list.dat"
+
+# How often the policy file is checked for changes (seconds)
+POLICY_RELOAD_INTERVAL_SECONDS = 5
+
+# Rule actions
+BLOCK = "block"
+TEST_DOMAIN = "test_domain"
+ALLOW = "allow"
+
+# Tie-break between rules for the same domain: stricter first
+_PRIORITY = {BLOCK: 0, TEST_DOMAIN: 1, ALLOW: 2}
+
+# Trie node keys besides labels (labels are never empty and never contain "!")
+_RULE = ""
+_WILDCARD = "*"
+_EXCEPTION = "!"
+
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().lower().rstrip(".")
+
+
+def _reversed_labels(domain: str) -> List[str]:
+    return normalize_domain(domain).split(".")[::-1]
+
+
+def _node(root: Dict, labels: Iterable[str]) -> Dict:
+    """Trie node for the reversed labels, created as needed."""
+    node = root
+    for label in labels:
+        node = node.setdefault(label, {})
+    return node
+
+
+class PublicSuffixList:
+    """Public suffix rules (publicsuffix.org format) in a reversed-label trie."""
+
+    def __init__(self, rules: Iterable[str]):
+        self._root: Dict = {}
+        for line in rules:
+            rule = line.split()[0] if line.strip() else ""
+            if not rule or rule.startswith("//"):
+                continue
+            if rule.startswith("!"):
+                _node(self._root, _reversed_labels(rule[1:]))[_EXCEPTION] = True
+            elif rule.startswith("*."):
+                _node(self._root, _reversed_labels(rule[2:]))[_WILDCARD] = True
+            else:
+                _node(self._root, _reversed_labels(rule))[_RULE] = True
+
+    @classmethod
+    def from_file(cls, path: Path = PUBLIC_SUFFIX_PATH) -> "PublicSuffixList":
+        with open(path, encoding="utf-8") as f:
+            return cls(f)
+
+    def suffix_length(self, domain: str, implicit_tld: bool = True) -> int:
+        """
+        Number of labels of the domain's public suffix.
+        
+        With implicit_tld (the PSL's default "*" rule) any TLD counts as a
+        public suffix; without it, only listed suffixes do (0 if none matches).
+        """
+        labels = _reversed_labels(domain)
+        node = self._root
+        length = 1 if implicit_tld else 0
+        for depth, label in enumerate(labels, start=1):
+            if _WILDCARD in node:
+                length = max(length, depth)
+            node = node.get(label)
+            if node is None:
+                break
+            if _EXCEPTION in node:
+                return depth - 1
+            if _RULE in node:
+                length = max(length, depth)
+        return length
+
+    def is_public_suffix(self, domain: str, implicit_tld: bool = True) -> bool:
+        return self.suffix_length(domain, implicit_tld) >= len(_reversed_labels(domain))
+
+    def registrable_domain(self, domain: str) -> Optional[str]:
+        """Public suffix plus one label (e.g. example.co.uk), or None for a public suffix itself."""
+        labels = normalize_domain(domain).split(".")
+        length = self.suffix_length(domain)
+        if length >= len(labels):
+            return None
+        return ".".join(labels[-(length + 1):])
+
+
+class PolicyDecision:
+    """Outcome of evaluating one domain against the policy."""
+
+    def __init__(self, action: Optional[str], rule: Optional[str] = None, reason: Optional[str] = None):
+        # BLOCK, TEST_DOMAIN, ALLOW, or None when no rule matched (default allow)
+        self.action = action
+        self.rule = rule
+        self.reason = reason
+
+    @property
+    def allowed(self) -> bool:
+        return self.action != BLOCK
+
+    @property
+    def is_test_domain(self) -> bool:
+        return self.action == TEST_DOMAIN
+
+
+class DomainPolicy:
+    """Compiled allow/block rules."""
+
+    def __init__(
+        self,
+        test_domains: Iterable[str] = (),
+        allow: Iterable[str] = (),
+        block: Iterable[str] = (),
+        default: str = ALLOW,
+        public_suffixes: Optional[PublicSuffixList] = None
+    ):
+        """
+        Args:
+            test_domains, allow, block: Rules ("example.com" or "*.example.com";
+                IP addresses match exactly)
+            default: ALLOW or BLOCK for domains no rule matches
+            public_suffixes: Suffix list used to reject over-broad allow rules
+
+        Raises:
+            ValueError: If default is not ALLOW or BLOCK
+        """
+        if default not in (ALLOW, BLOCK):
+            raise ValueError(f"Invalid default action: {default}")
+        self.default = default
+        self.public_suffixes = public_suffixes
+        # Rules that were rejected, with the reason
+        self.errors: List[str] = []
+        self.rule_count = 0
+        self._root: Dict = {}
+        self._addresses: Dict[str, Tuple[str, str]] = {}
+
+        for action, rules in ((BLOCK, block), (TEST_DOMAIN, test_domains), (ALLOW, allow)):
+            for rule in rules:
+                self._add(normalize_domain(rule), action)
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Path = POLICY_PATH,
+        public_suffixes: Optional[PublicSuffixList] = None
+    ) -> "DomainPolicy":
+        """
+        Raises:
+            OSError, ValueError: If the file cannot be read or is invalid
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            test_domains=data.get("test_domains", []),
+            allow=data.get("allow", []),
+            block=data.get("block", []),
+            default=data.get("default", ALLOW),
+            public_suffixes=public_suffixes,
+        )
+
+    def _add(self, rule: str, action: str):
+        if not rule:
+            return
+        if _is_ip_address(rule):
+            self._set(self._addresses, rule, (action, rule))
+            return
+
+        subdomains_only = rule.startswith("*.")
+        domain = rule[2:] if subdomains_only else rule
+        # Listed suffixes only: special-use names such as localhost remain valid rules
+        if (
+            action != BLOCK and self.public_suffixes is not None
+            and self.public_suffixes.is_public_suffix(domain, implicit_tld=False)
+        ):
+            self.errors.append(f"Rule {rule} ignored: it covers a public suffix")
+            return
+        self._set(_node(self._root, _reversed_labels(domain)), _WILDCARD if subdomains_only else _RULE, (action, rule))
+
+    def _set(self, node: Dict, key: str, value: Tuple[str, str]):
+        existing = node.get(key)
+        if existing is None or _PRIORITY[value[0]] < _PRIORITY[existing[0]]:
+            node[key] = value
+            self.rule_count += existing is None
+
+    def evaluate(self, domain: str) -> PolicyDecision:
+        """Decide whether a domain (or IP address) may be scanned."""
+        domain = normalize_domain(domain)
+        if _is_ip_address(domain):
+            match = self._addresses.get(domain)
+        else:
+            match = self._longest_match(domain)
+
+        if match is None:
+            if self.default == BLOCK:
+                return PolicyDecision(BLOCK, reason="Domain is outside the configured scanning scope")
+            return PolicyDecision(None)
+
+        action, rule = match
+        if action == BLOCK:
+            return PolicyDecision(BLOCK, rule, _block_reason(rule))
+        return PolicyDecision(action, rule)
+
+    def _longest_match(self, domain: str) -> Optional[Tuple[str, str]]:
+        node = self._root
+        match = None
+        for label in _reversed_labels(domain):
+            # "*.parent" rules match any label below parent
+            if _WILDCARD in node:
+                match = node[_WILDCARD]
+            node = node.get(label)
+            if node is None:
+                break
+            if _RULE in node:
+                match = node[_RULE]
+        return match
+
+
+def _is_ip_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _block_reason(rule: str) -> str:
+    if "." not in rule:
+        return f"Scanning .{rule} domains is prohibited without explicit authorization"
+    return f"Scanning {rule} is prohibited without explicit authorization"
+
+
+class DomainPolicyStore:
+    """Serves the current policy, reloading the file when it changes."""
+
+    def __init__(
+        self,
+        path: Path = POLICY_PATH,
+        public_suffix_path: Path = PUBLIC_SUFFIX_PATH,
+        reload_interval: float = POLICY_RELOAD_INTERVAL_SECONDS
+    ):
+        self.path = path
+        self.public_suffix_path = public_suffix_path
+        self.reload_interval = reload_interval
+        # Error of the last failed reload (the previous policy stays in force)
+        self.load_error: Optional[str] = None
+        self._policy: Optional[DomainPolicy] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> DomainPolicy:
+        """Current policy (checks the file for changes at most every reload_interval)."""
+        if self._policy is not None and time.monotonic() < self._next_check:
+            return self._policy
+        # One thread reloads; the others keep using the current policy meanwhile
+        if not self._lock.acquire(blocking=self._policy is None):
+            return self._policy
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            self._reload_if_changed()
+            return self._policy
+        finally:
+            self._lock.release()
+
+    def _reload_if_changed(self):
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature and self._policy is not None:
+                return
+            public_suffixes = PublicSuffixList.from_file(self.public_suffix_path)
+            self._policy = DomainPolicy.from_file(self.path, public_suffixes)
+            self._signature = signature
+            self.load_error = None
+        except (OSError, ValueError) as e:
+            self.load_error = f"Domain policy not reloaded: {e}"
+            if self._policy is None:
+                # Nothing to fall back on: block everything rather than scan unchecked
+                self._policy = DomainPolicy(default=BLOCK)
+
+
+# Global policy store (file loaded on first use)
+_domain_policy_store = DomainPolicyStore()
+
+
+def get_domain_policy() -> DomainPolicy:
+    """Get the current domain policy."""
+    return _domain_policy_store.get()
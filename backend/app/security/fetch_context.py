@@ -0,0 +1,254 @@
+"""
+Shared Per-Scan Fetch Context
+
+Fetches the target URL ONCE per scan and shares the response with every
+consumer (HTTP headers scanner, technology detector, HSTS check).
+PASSIVE - a single standard GET request following redirects, sent through
+the shared pooled HTTP client. Consumers that only need headers can use
+headers-only mode: a HEAD request, falling back to a GET that is closed as
+soon as its headers arrive. Every fetch is capped in bytes and in time.
+"""
+
+import codecs
+import re
+import threading
+import time
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .cancellation import CancellationToken
+from .http_client import PooledHTTPClient, StreamedResponse, get_http_client
+from .scan_timer import ScanTimer
+
+
+DEFAULT_USER_AGENT = "CyberGuardX-SecurityScanner/1.0 (Educational/Research)"
+
+# Only the first 50KB of the body is ever analyzed
+DEFAULT_MAX_BODY_BYTES = 50000
+
+# Hard cap on one fetch: redirects, headers and body read together
+DEFAULT_MAX_FETCH_SECONDS = 15
+
+# A <meta> charset declaration must appear within the first 1024 bytes (HTML prescan)
+CHARSET_SNIFF_BYTES = 1024
+
+_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+
+def _known_codec(name: Optional[str]) -> Optional[str]:
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+def detect_charset(content_type: Optional[str], body: bytes) -> str:
+    """
+    Charset of a response body, checked in browser order: byte order mark,
+    Content-Type charset, <meta> charset near the top of the page, UTF-8.
+    """
+    for bom, charset in _BYTE_ORDER_MARKS:
+        if body.startswith(bom):
+            return charset
+    declared = _HEADER_CHARSET.search(content_type or "")
+    charset = _known_codec(declared.group(1)) if declared else None
+    if charset:
+        return charset
+    meta = _META_CHARSET.search(body[:CHARSET_SNIFF_BYTES])
+    charset = _known_codec(meta.group(1).decode("ascii")) if meta else None
+    return charset or "utf-8"
+
+
+class FetchedResponse:
+    """Immutable snapshot of a fetched response: headers, status and a bounded body prefix."""
+
+    def __init__(
+        self,
+        url: str,
+        final_url: str,
+        status_code: int,
+        headers: CaseInsensitiveDict,
+        body: bytes,
+        encoding: Optional[str],
+        redirect_chain: List[Dict[str, any]],
+        elapsed_ms: int,
+        headers_only: bool = False
+    ):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+        self.redirect_chain = redirect_chain
+        self.elapsed_ms = elapsed_ms
+        # True if only the headers were fetched (body is empty)
+        self.headers_only = headers_only
+
+    @cached_property
+    def text(self) -> str:
+        """Body prefix decoded once with the detected charset."""
+        # Not final: a multi-byte character cut off by the byte cap is dropped, not replaced
+        decoder = codecs.getincrementaldecoder(self.encoding or "utf-8")(errors="replace")
+        return decoder.decode(self.body, final=False)
+
+
+class FetchContext:
+    """
+    Per-scan single-fetch context.
+
+    The first consumer to call get() performs the request; concurrent
+    consumers wait for it and receive the same response. A failed fetch
+    re-raises the same exception for every consumer so each scanner keeps
+    its own error reporting.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: int = 10,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        user_agent: str = DEFAULT_USER_AGENT,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[ScanTimer] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+        http_client: Optional[PooledHTTPClient] = None,
+        headers_only: bool = False,
+        max_fetch_seconds: float = DEFAULT_MAX_FETCH_SECONDS
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.user_agent = user_agent
+        self.cancel_token = cancel_token
+        self.timer = timer or ScanTimer()
+        # e.g. If-None-Match / If-Modified-Since for incremental rescans
+        self.extra_headers = extra_headers or {}
+        self.http_client = http_client or get_http_client()
+        # Header consumers only (HTTP headers, HSTS): skip the body entirely
+        self.headers_only = headers_only
+        self.max_fetch_seconds = max_fetch_seconds
+        self._lock = threading.Lock()
+        self._response: Optional[FetchedResponse] = None
+        self._error: Optional[Exception] = None
+        self._fetched = False
+
+    def get(self) -> FetchedResponse:
+        """
+        Return the shared response, fetching it on first use.
+
+        Raises:
+            requests.exceptions.RequestException: If the fetch failed
+            ScanCancelledError: If the scan was cancelled before or during the fetch
+        """
+        with self._lock:
+            if not self._fetched:
+                try:
+                    self._response = self._fetch()
+                except Exception as e:
+                    self._error = e
+                self._fetched = True
+
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+    def peek(self) -> Optional[FetchedResponse]:
+        """The response if it has already been fetched successfully, without fetching."""
+        with self._lock:
+            return self._response
+
+    def _fetch(self) -> FetchedResponse:
+        """Fetch the page, or only its headers in headers-only mode."""
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        if not self.headers_only:
+            return self._request("GET", read_body=True)
+
+        # HEAD first; some servers reject or mishandle it, so retry those
+        # with a GET whose connection is closed as soon as the headers arrive
+        response = self._request("HEAD", read_body=False)
+        if response.status_code >= 400:
+            response = self._request("GET", read_body=False)
+        return response
+
+    def _request(self, method: str, read_body: bool) -> FetchedResponse:
+        """Follow the redirect chain once and capture headers plus a bounded body prefix."""
+        started = time.perf_counter()
+        with self.http_client.stream(
+            self.url,
+            method=method,
+            headers={'User-Agent': self.user_agent, **self.extra_headers},
+            timeout=min(self.timeout, self.max_fetch_seconds)
+        ) as response:
+            # Headers of the final hop are in: includes DNS, connect, TLS and redirects
+            self.timer.record("http.ttfb", (time.perf_counter() - started) * 1000)
+
+            body = self._read_body(response, started) if read_body else b""
+            return FetchedResponse(
+                url=self.url,
+                final_url=response.url,
+                status_code=response.status_code,
+                headers=response.headers,
+                body=body,
+                encoding=detect_charset(response.headers.get("Content-Type"), body) if read_body else None,
+                redirect_chain=response.history,
+                elapsed_ms=int((time.perf_counter() - started) * 1000),
+                headers_only=not read_body
+            )
+
+    def _read_body(self, response: StreamedResponse, started: float) -> bytes:
+        """
+        Read at most max_body_bytes of the body within the fetch time cap.
+
+        Raises:
+            requests.exceptions.Timeout: If the time cap ran out mid-body
+            ScanCancelledError: If the scan was cancelled mid-body
+        """
+        # A slow-drip body would otherwise hold the worker for timeout
+        # seconds per chunk: abort the connection when the cap runs out
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            response.abort()
+
+        remaining = self.max_fetch_seconds - (time.perf_counter() - started)
+        watchdog = threading.Timer(max(remaining, 0), expire)
+        watchdog.daemon = True
+        watchdog.start()
+        unregister = lambda: None
+        if self.cancel_token is not None:
+            unregister = self.cancel_token.register(response.abort)
+
+        # Stop reading at the cap: the rest of the page is never downloaded
+        body = bytearray()
+        try:
+            with self.timer.span("http.body_read"):
+                for chunk in response.iter_content(chunk_size=min(8192, self.max_body_bytes)):
+                    if self.cancel_token is not None:
+                        self.cancel_token.raise_if_cancelled()
+                    body += chunk[:self.max_body_bytes - len(body)]
+                    if len(body) >= self.max_body_bytes:
+                        break
+        except requests.exceptions.RequestException:
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            if not expired.is_set():
+                raise
+        finally:
+            watchdog.cancel()
+            unregister()
+
+        if expired.is_set():
+            raise requests.exceptions.Timeout(f"Response body not received within {self.max_fetch_seconds}s")
+        return bytes(body)
@@ -0,0 +1,382 @@
+"""
+Shared Pooled HTTP Client
+
+Every outbound scanner request goes through one process-wide client, so
+repeated requests to the same host reuse kept-alive connections instead of
+paying for a new TCP connection and TLS handshake each time (batch scans of
+many URLs on one host benefit most).
+
+Backends:
+- requests/urllib3 (default): per-host connection pools of bounded size.
+- httpx with HTTP/2 (optional): used when HTTP2_ENABLED is set and the
+  `httpx[http2]` extra is installed; requests to one host are multiplexed
+  over a single connection.
+
+Both backends raise requests exceptions, so scanners keep one set of
+error handlers. Cookies are never stored: one scan target must not see
+cookies set by another.
+
+Hosts that target validation pinned (see target_pins) are always fetched
+through the requests backend, whose connection pools connect only to the
+pinned addresses; httpx resolves names itself, so it only serves unpinned
+hosts. Redirects are followed here rather than by the backends: every hop
+to a host that was not validated yet is checked like a scan target (domain
+policy, no private addresses) and pinned before it is requested.
+"""
+
+import http.cookiejar
+import socket
+import ssl
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection as urllib3_connection
+
+from .safety_validator import TargetValidator
+from .target_pins import get_target_pins
+
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# ===== CLIENT CONFIGURATION =====
+# Number of hosts whose connection pools are kept alive
+POOL_HOSTS = 100
+# Kept-alive connections per host
+POOL_MAXSIZE_PER_HOST = 8
+# Wait for a free connection instead of exceeding the per-host limit
+POOL_BLOCK = True
+# Negotiate HTTP/2 when the httpx[http2] extra is installed
+HTTP2_ENABLED = False
+# Redirect hops followed before giving up
+MAX_REDIRECTS = 10
+
+# Statuses whose Location header is followed
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+RedirectValidator = Callable[[str], Tuple[bool, Optional[str], List[str]]]
+
+
+class RedirectBlockedError(requests.exceptions.ConnectionError):
+    """Raised when a redirect points to a target that may not be scanned."""
+
+
+class StreamedResponse:
+    """Backend-independent view of a response whose body is still being streamed."""
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: CaseInsensitiveDict,
+        history: List[Dict[str, any]],
+        chunks: Callable[[int], Iterable[bytes]],
+        abort: Callable[[], None]
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        # Redirect hops as [{"url": ..., "status_code": ...}]
+        self.history = history
+        self._chunks = chunks
+        self._abort = abort
+
+    def iter_content(self, chunk_size: int = 8192) -> Iterable[bytes]:
+        """Iterate over the body in chunks of up to chunk_size bytes."""
+        return self._chunks(chunk_size)
+
+    def abort(self):
+        """Unblock a pending body read from another thread."""
+        self._abort()
+
+
+class _PinnedConnectionMixin:
+    """Connects to the addresses target validation pinned for the host, if any."""
+
+    def _new_conn(self) -> socket.socket:
+        addresses = get_target_pins().addresses(self.host)
+        if addresses is None:
+            return super()._new_conn()
+
+        # Same errors as urllib3's own connect, trying each approved address in turn
+        error = None
+        for address in addresses:
+            try:
+                return urllib3_connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+            except socket.timeout as e:
+                error = ConnectTimeoutError(
+                    self, f"Connection to {self.host} ({address}) timed out. (connect timeout={self.timeout})"
+                )
+                error.__cause__ = e
+            except OSError as e:
+                error = NewConnectionError(self, f"Failed to establish a new connection to {address}: {e}")
+                error.__cause__ = e
+        raise error
+
+
+class PinnedHTTPConnection(_PinnedConnectionMixin, HTTPConnection):
+    pass
+
+
+class PinnedHTTPSConnection(_PinnedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class PinnedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = PinnedHTTPConnection
+
+
+class PinnedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = PinnedHTTPSConnection
+
+
+class PinnedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools honor the validated target pins."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": PinnedHTTPConnectionPool,
+            "https": PinnedHTTPSConnectionPool,
+        }
+
+
+class PooledHTTPClient:
+    """
+    Thread-safe HTTP client with keep-alive connection pooling.
+
+    Use one shared instance (get_http_client()) so pools are reused across
+    scans; pass a dedicated instance to scanners only for isolation.
+    """
+
+    def __init__(
+        self,
+        pool_hosts: int = POOL_HOSTS,
+        pool_maxsize: int = POOL_MAXSIZE_PER_HOST,
+        http2: bool = HTTP2_ENABLED,
+        redirect_validator: Optional[RedirectValidator] = None
+    ):
+        """
+        Args:
+            pool_hosts: Number of hosts whose connection pools are kept alive
+            pool_maxsize: Kept-alive connections per host
+            http2: Use httpx with HTTP/2 for unpinned hosts (if installed)
+            redirect_validator: Checks a redirect URL, returning (allowed,
+                reason, addresses to pin); defaults to the scan target checks
+        """
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.redirect_validator = redirect_validator or TargetValidator.is_allowed_redirect
+        reject_cookies = http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+
+        if self.http2:
+            self._client = httpx.Client(
+                http2=True,
+                verify=True,  # Validate SSL certificates
+                cookies=http.cookiejar.CookieJar(reject_cookies),
+                limits=httpx.Limits(
+                    max_connections=pool_hosts * pool_maxsize,
+                    max_keepalive_connections=pool_hosts,
+                ),
+            )
+
+        # Pinned hosts always use the requests backend
+        self._session = requests.Session()
+        self._session.cookies = requests.cookies.RequestsCookieJar(reject_cookies)
+        adapter = PinnedHTTPAdapter(
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_maxsize,
+            pool_block=POOL_BLOCK,
+            max_retries=0,
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    @contextmanager
+    def stream(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        timeout: float,
+        method: str = "GET"
+    ) -> Iterator[StreamedResponse]:
+        """
+        Request a URL following redirects, yielding once the final headers are in.
+
+        Each redirect hop to another host without a pin is validated and
+        pinned first; the hop is refused if the target may not be scanned.
+        Hops back to the requested host (already validated by the caller)
+        are followed as is.
+
+        The connection returns to the pool when the block exits (it is
+        discarded instead if the body was not read to the end).
+
+        Raises:
+            RedirectBlockedError: If a redirect points to a prohibited target
+            requests.exceptions.RequestException: On connection, TLS or timeout errors
+        """
+        history = []
+        origin_host = (urlparse(url).hostname or "").lower()
+        for _ in range(MAX_REDIRECTS + 1):
+            with self._send(method, url, headers, timeout) as response:
+                location = response.headers.get("location")
+                if response.status_code not in REDIRECT_STATUSES or not location:
+                    response.history = history
+                    yield response
+                    return
+                history.append({"url": response.url, "status_code": response.status_code})
+                url = urljoin(response.url, location)
+            if response.status_code == 303 and method != "HEAD":
+                method = "GET"
+            self._approve_redirect(url, origin_host)
+
+        raise requests.exceptions.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects")
+
+    def _approve_redirect(self, url: str, origin_host: str):
+        """
+        Validate and pin a redirect target before it is requested.
+
+        Test domains get no exemption here: a redirect only reaches a host
+        other than the requested one if every address it resolves to is public.
+
+        Raises:
+            RedirectBlockedError: If the target may not be scanned
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise RedirectBlockedError(f"Redirect to unsupported URL refused: {url}")
+        if parsed.hostname.lower() == origin_host:
+            return
+        if get_target_pins().addresses(parsed.hostname) is not None:
+            return
+        allowed, reason, addresses = self.redirect_validator(url)
+        if not allowed:
+            raise RedirectBlockedError(f"Redirect to {parsed.hostname} refused: {reason}")
+        get_target_pins().pin(parsed.hostname, addresses)
+
+    @contextmanager
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: float
+    ) -> Iterator[StreamedResponse]:
+        """Send one request without following redirects."""
+        if self.http2 and get_target_pins().addresses(urlparse(url).hostname or "") is None:
+            with self._stream_httpx(method, url, headers, timeout) as response:
+                yield response
+            return
+
+        with self._session.request(
+            method,
+            url,
+            headers=headers,
+            timeout=timeout,
+            allow_redirects=False,
+            verify=True,  # Validate SSL certificates
+            stream=True
+        ) as response:
+            yield StreamedResponse(
+                url=response.url,
+                status_code=response.status_code,
+                headers=CaseInsensitiveDict(response.headers),
+                history=[],
+                chunks=response.iter_content,
+                abort=lambda: _shutdown_connection(response)
+            )
+
+    @contextmanager
+    def _stream_httpx(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: float
+    ) -> Iterator[StreamedResponse]:
+        def chunks(chunk_size: int) -> Iterator[bytes]:
+            with _as_requests_errors():
+                yield from response.iter_bytes(chunk_size)
+
+        with _as_requests_errors():
+            context = self._client.stream(method, url, headers=headers, timeout=timeout, follow_redirects=False)
+            response = context.__enter__()
+        try:
+            yield StreamedResponse(
+                url=str(response.url),
+                status_code=response.status_code,
+                headers=CaseInsensitiveDict(response.headers),
+                history=[],
+                chunks=chunks,
+                abort=response.close
+            )
+        finally:
+            context.__exit__(None, None, None)
+
+
+def _shutdown_connection(response: requests.Response):
+    """Unblock a pending body read by shutting down the response's connection."""
+    # The connection only belongs to the response until the body is read;
+    # once released to the pool there is no read left to unblock
+    connection = response.raw.connection
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return
+    # The pool discards the dropped connection instead of reusing it
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError as exc:
+        print(f"Warning: Failed to abort connection to {response.url}: {exc}")
+
+
+@contextmanager
+def _as_requests_errors():
+    """Re-raise httpx errors as the equivalent requests exceptions."""
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.ConnectError as e:
+        if _caused_by_ssl(e):
+            raise requests.exceptions.SSLError(str(e)) from e
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    except (httpx.TransportError, httpx.TooManyRedirects) as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+
+def _caused_by_ssl(error: BaseException) -> bool:
+    while error is not None:
+        if isinstance(error, ssl.SSLError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+# Global client instance (created on first use)
+_http_client: Optional[PooledHTTPClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Get the shared pooled HTTP client used by all scanners."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = PooledHTTPClient()
+        return _http_client
@@ -10,6 +10,9 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from urllib.parse import urlparse
 
+from .fetch_context import FetchContext
+from .http_client import PooledHTTPClient
+
 
 class SecurityHeader:
     """Represents a security header with grading criteria."""
@@ -284,16 +287,18 @@ class HTTPSecurityScanner:
     NO PAYLOADS, NO EXPLOITS.
     """
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, http_client: Optional[PooledHTTPClient] = None):
         self.timeout = timeout
+        self.http_client = http_client
         self.user_agent = "CyberGuardX-SecurityScanner/1.0 (Educational/Research)"
     
-    def scan(self, url: str) -> Dict[str, any]:
+    def scan(self, url: str, fetch_context: Optional[FetchContext] = None) -> Dict[str, any]:
         """
         Scan website for HTTP security headers.
         
         Args:
             url: Target URL to scan
+            fetch_context: Shared per-scan response (fetched here if not given)
             
         Returns:
             Dictionary with scan results
@@ -313,17 +318,18 @@ class HTTPSecurityScanner:
         }
         
         try:
-            # Make PASSIVE request (standard GET)
-            response = requests.get(
-                url,
-                timeout=self.timeout,
-                headers={'User-Agent': self.user_agent},
-                allow_redirects=True,
-                verify=True  # Validate SSL certificates
-            )
+            # Make PASSIVE request (standard GET), shared with other scanners
+            if fetch_context is None:
+                # Only headers are analyzed: don't download the body
+                fetch_context = FetchContext(
+                    url, timeout=self.timeout, user_agent=self.user_agent,
+                    http_client=self.http_client, headers_only=True
+                )
+            response = fetch_context.get()
             
             result["status_code"] = response.status_code
-            result["final_url"] = response.url
+            result["final_url"] = response.final_url
+            result["redirect_chain"] = response.redirect_chain
             
             # Analyze each security header
             header_results = {}
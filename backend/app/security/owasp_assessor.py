@@ -122,6 +122,9 @@ class OWASPAssessor:
     industry-standard vulnerability classifications.
     """
     
+    # Bump whenever the mapping changes; stored assessments from other versions are recomputed
+    ENGINE_VERSION = "1.0"
+    
     def __init__(self):
         self.owasp_categories = OWASPTop10.CATEGORIES
     
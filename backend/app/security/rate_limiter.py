@@ -0,0 +1,170 @@
+"""
+Cross-Worker Scan Rate Limiter
+
+Limits how many scans a client may start per time window. State lives in a
+small SQLite database shared by every worker process on the host, so limits
+hold no matter which uvicorn worker serves a request.
+
+Uses the generic cell rate algorithm (GCRA), a token bucket stored as one
+timestamp per client: the "theoretical arrival time" at which the client's
+bucket is full again. A check reads and updates that single row in one
+write transaction (O(1), atomic across processes), gives an exact
+Retry-After when blocked, and a row is useless - and purged - once its
+timestamp has passed, so the table only holds recently active clients.
+
+A check may wait up to BUSY_TIMEOUT_SECONDS for another process's write
+lock, so async callers use check_async, which runs it on a worker thread
+instead of stalling the event loop.
+
+This is the only scan-path state shared by every worker; the scan job
+queue, live progress and cancellation tokens are per process (see
+"Deployment Model" in TECHNICAL_DOCS.md).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+
+# Shared store (relative to the working directory, like the main database)
+RATE_LIMIT_DB_PATH = "./cyberguardx_ratelimit.db"
+
+# Scans allowed per client per window
+RATE_LIMIT_SCANS = 1
+RATE_LIMIT_WINDOW_SECONDS = 600
+
+# Expired rows are purged at most this often (seconds)
+PURGE_INTERVAL_SECONDS = 60
+
+# How long a check waits for another process holding the write lock (seconds)
+BUSY_TIMEOUT_SECONDS = 5
+
+
+class RateLimitResult:
+    """Outcome of one rate limit check."""
+
+    def __init__(self, allowed: bool, retry_after: int = 0, remaining: int = 0):
+        self.allowed = allowed
+        # Seconds until the next scan is allowed (0 if allowed now)
+        self.retry_after = retry_after
+        # Scans still allowed right now after this one
+        self.remaining = remaining
+
+
+class ScanRateLimiter:
+    """Token-bucket rate limiter keyed by client, shared across processes."""
+
+    def __init__(
+        self,
+        db_path: str = RATE_LIMIT_DB_PATH,
+        limit: int = RATE_LIMIT_SCANS,
+        window_seconds: float = RATE_LIMIT_WINDOW_SECONDS
+    ):
+        """
+        Args:
+            db_path: SQLite file shared by every worker process
+            limit: Scans allowed per window (also the burst size)
+            window_seconds: Window length
+        """
+        self.db_path = db_path
+        self.limit = limit
+        self.window_seconds = window_seconds
+        # Each scan "costs" one emission interval of the window
+        self._interval = window_seconds / limit
+        self._local = threading.local()
+        self._next_purge = 0.0
+
+    def check(self, key: str, cost: int = 1) -> RateLimitResult:
+        """
+        Consume `cost` scans for a client if its limit allows.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+            cost: Scans to consume
+
+        Returns:
+            RateLimitResult; nothing is consumed when not allowed
+        """
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0], now) if row else now
+            new_tat = tat + self._interval * cost
+            allowed_at = new_tat - self.window_seconds
+            if allowed_at > now:
+                return RateLimitResult(False, retry_after=int(allowed_at - now) + 1)
+            connection.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, new_tat)
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + PURGE_INTERVAL_SECONDS
+                connection.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+        remaining = int((now + self.window_seconds - new_tat) / self._interval)
+        return RateLimitResult(True, remaining=max(remaining, 0))
+
+    async def check_async(self, key: str, cost: int = 1) -> RateLimitResult:
+        """check() without blocking the event loop (waits for the write lock on a worker thread)."""
+        return await asyncio.to_thread(self.check, key, cost)
+    
+    def can_scan(self, ip_address: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check if IP address can perform a scan (consumes one scan if so).
+
+        Args:
+            ip_address: Client IP address
+
+        Returns:
+            Tuple of (can_scan: bool, reason: str if blocked)
+        """
+        result = self.check(ip_address)
+        if result.allowed:
+            return True, None
+        return False, rate_limit_message(result.retry_after)
+
+    def reset(self, key: Optional[str] = None):
+        """Forget one client's history, or every client's."""
+        connection = self._connection()
+        with connection:
+            if key is None:
+                connection.execute("DELETE FROM rate_limits")
+            else:
+                connection.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (reopened in forked worker processes)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            # Transactions are managed explicitly (BEGIN IMMEDIATE)
+            connection = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_tat ON rate_limits (tat)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+def rate_limit_message(retry_after: int) -> str:
+    minutes = -(-retry_after // 60)  # Round up
+    if minutes > 1:
+        return f"Rate limit exceeded. Please wait {minutes} minutes before scanning again."
+    return f"Rate limit exceeded. Please wait {retry_after} seconds before scanning again."
+
+
+# Global limiter (connections open on first use)
+_rate_limiter = ScanRateLimiter()
+
+
+def get_rate_limiter() -> ScanRateLimiter:
+    """Get the shared scan rate limiter."""
+    return _rate_limiter
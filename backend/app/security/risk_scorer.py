@@ -20,6 +20,9 @@ class RiskScorer:
     - Technology vulnerabilities (weight: 20%)
     """
     
+    # Bump whenever scoring changes; stored risk analyses from other versions are recomputed
+    ENGINE_VERSION = "1.0"
+    
     # Weighted importance of each scan component
     WEIGHTS = {
         "http": 0.30,      # 30% - HTTP headers are important but not critical
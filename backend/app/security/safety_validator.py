@@ -9,75 +9,22 @@ All scans MUST pass through this validator before execution.
 
 import ipaddress
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 import socket
 
-
-class ScanRateLimiter:
-    """Rate limiting to prevent abuse and ensure ethical scanning."""
-    
-    def __init__(self):
-        self._scan_history: Dict[str, datetime] = {}
-        self._rate_limit_minutes = 10
-    
-    def can_scan(self, ip_address: str) -> Tuple[bool, Optional[str]]:
-        """
-        Check if IP address can perform a scan.
-        
-        Args:
-            ip_address: Client IP address
-            
-        Returns:
-            Tuple of (can_scan: bool, reason: str if blocked)
-        """
-        now = datetime.utcnow()
-        
-        if ip_address in self._scan_history:
-            last_scan = self._scan_history[ip_address]
-            time_since_last = now - last_scan
-            
-            if time_since_last < timedelta(minutes=self._rate_limit_minutes):
-                remaining = self._rate_limit_minutes - (time_since_last.seconds // 60)
-                return False, f"Rate limit exceeded. Please wait {remaining} minutes before scanning again."
-        
-        # Record this scan attempt
-        self._scan_history[ip_address] = now
-        return True, None
-    
-    def clear_old_entries(self):
-        """Clean up scan history older than rate limit window."""
-        now = datetime.utcnow()
-        cutoff = now - timedelta(minutes=self._rate_limit_minutes * 2)
-        
-        self._scan_history = {
-            ip: timestamp 
-            for ip, timestamp in self._scan_history.items() 
-            if timestamp > cutoff
-        }
+from .dns_cache import resolve_host, resolve_host_async
+from .domain_policy import get_domain_policy
+from .rate_limiter import ScanRateLimiter, get_rate_limiter, rate_limit_message
+from .target_pins import get_target_pins
 
 
 class TargetValidator:
     """Validates scan targets to prevent illegal or unethical scanning."""
     
-    # Whitelist for testing (safe domains that explicitly allow scanning)
-    ALLOWED_TEST_DOMAINS = [
-        'example.com',
-        'example.org',
-        'example.net',
-        'localhost',
-        '127.0.0.1',
-        'scanme.nmap.org',  # Explicitly allows scanning
-        'testphp.vulnweb.com',  # Security testing site
-    ]
-    
-    # Blocked top-level domains (government, military, critical infrastructure)
-    BLOCKED_TLDS = [
-        '.gov',
-        '.mil',
-        '.edu',  # Educational institutions require permission
-    ]
+    # Test domains that explicitly allow scanning, in-scope and blocked domains
+    # (e.g. .gov/.mil/.edu) are configured in data/domain_policy.json (see domain_policy)
     
     # Private IP ranges (RFC 1918)
     PRIVATE_IP_RANGES = [
@@ -85,6 +32,16 @@ class TargetValidator:
         ipaddress.IPv4Network('172.16.0.0/12'),
         ipaddress.IPv4Network('192.168.0.0/16'),
         ipaddress.IPv4Network('127.0.0.0/8'),  # Loopback
+        ipaddress.IPv4Network('169.254.0.0/16'),  # Link-local (cloud metadata endpoints)
+        ipaddress.IPv4Network('0.0.0.0/8'),
+    ]
+    
+    # Private IPv6 ranges
+    PRIVATE_IPV6_RANGES = [
+        ipaddress.IPv6Network('::1/128'),  # Loopback
+        ipaddress.IPv6Network('::/128'),
+        ipaddress.IPv6Network('fc00::/7'),  # Unique local
+        ipaddress.IPv6Network('fe80::/10'),  # Link-local
     ]
     
     @staticmethod
@@ -122,49 +79,97 @@ class TargetValidator:
             return False, f"URL parsing error: {str(e)}"
     
     @classmethod
-    def is_allowed_target(cls, url: str) -> Tuple[bool, Optional[str]]:
+    async def is_allowed_target(cls, url: str) -> Tuple[bool, Optional[str], List[str]]:
         """
         Check if target is allowed for scanning.
         
+        Resolves A and AAAA records without blocking the event loop and
+        rejects the target if ANY returned address is private/internal.
+        
         Args:
             url: Target URL to validate
             
         Returns:
-            Tuple of (is_allowed: bool, reason: str if blocked)
+            Tuple of (is_allowed: bool, reason: str if blocked,
+            approved IP addresses - empty for whitelisted test domains)
         """
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.split(':')[0]  # Remove port
+            domain = urlparse(url).netloc.split(':')[0]  # Remove port
+            blocked = cls._check_domain_policy(domain)
+            if blocked is not None:
+                return blocked
             
-            # Check if domain is in whitelist
-            if any(allowed in domain for allowed in cls.ALLOWED_TEST_DOMAINS):
-                return True, None
+            # Resolve every address (shared TTL-honoring cache)
+            try:
+                resolved = await resolve_host_async(domain, 0)
+            except socket.gaierror:
+                return False, "Cannot resolve domain name", []
+            return cls._check_addresses(resolved)
             
-            # Check for blocked TLDs
-            for blocked_tld in cls.BLOCKED_TLDS:
-                if domain.endswith(blocked_tld):
-                    return False, f"Scanning {blocked_tld} domains is prohibited without explicit authorization"
+        except Exception as e:
+            return False, f"Target validation error: {str(e)}", []
+    
+    @classmethod
+    def is_allowed_redirect(cls, url: str) -> Tuple[bool, Optional[str], List[str]]:
+        """
+        Blocking variant of is_allowed_target for redirect targets.
+        
+        Called by the HTTP client (on a scanner thread) for every redirect
+        hop to a host that has not been validated yet. Unlike a requested
+        target, a redirect target listed as a test domain still has its
+        addresses checked: a public site must not be able to redirect the
+        scanner to localhost or another internal address.
+        
+        Returns:
+            Tuple of (is_allowed: bool, reason: str if blocked, approved IP addresses)
+        """
+        try:
+            domain = urlparse(url).hostname or ""
+            decision = get_domain_policy().evaluate(domain)
+            if not decision.allowed:
+                return False, decision.reason, []
             
-            # Try to resolve IP address
             try:
-                ip_str = socket.gethostbyname(domain)
-                ip = ipaddress.IPv4Address(ip_str)
-                
-                # Check if IP is private/internal
-                for private_range in cls.PRIVATE_IP_RANGES:
-                    if ip in private_range and domain not in ['localhost', '127.0.0.1']:
-                        return False, "Scanning private/internal IP addresses is prohibited"
-                
+                resolved = resolve_host(domain, 0)
             except socket.gaierror:
-                return False, "Cannot resolve domain name"
-            except Exception as e:
-                return False, f"IP validation error: {str(e)}"
-            
-            # If not whitelisted, require explicit permission confirmation
-            return True, None
+                return False, "Cannot resolve redirect target", []
+            return cls._check_addresses(resolved)
             
         except Exception as e:
-            return False, f"Target validation error: {str(e)}"
+            return False, f"Redirect validation error: {str(e)}", []
+    
+    @staticmethod
+    def _check_domain_policy(domain: str) -> Optional[Tuple[bool, Optional[str], List[str]]]:
+        """Decision for test and blocked domains; None if the addresses must be checked."""
+        decision = get_domain_policy().evaluate(domain)
+        if decision.is_test_domain:
+            return True, None, []
+        if not decision.allowed:
+            return False, decision.reason, []
+        return None
+    
+    @classmethod
+    def _check_addresses(cls, resolved: List[Tuple[int, Tuple]]) -> Tuple[bool, Optional[str], List[str]]:
+        """Approve resolved socket addresses unless ANY of them is private/internal."""
+        try:
+            addresses = list(dict.fromkeys(address[0] for _, address in resolved))
+            for address in addresses:
+                if cls.is_private_address(address):
+                    return False, "Scanning private/internal IP addresses is prohibited", []
+        except Exception as e:
+            return False, f"IP validation error: {str(e)}", []
+        
+        # If not whitelisted, require explicit permission confirmation
+        return True, None, addresses
+    
+    @classmethod
+    def is_private_address(cls, address: str) -> bool:
+        """Whether an IPv4/IPv6 address lies in a private, loopback or link-local range."""
+        ip = ipaddress.ip_address(address)
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        ranges = cls.PRIVATE_IP_RANGES if ip.version == 4 else cls.PRIVATE_IPV6_RANGES
+        return any(ip in private_range for private_range in ranges)
     
     @staticmethod
     def validate_permission(url: str, confirmed_permission: bool, owner_confirmation: bool, legal_responsibility: bool) -> Tuple[bool, Optional[str]]:
@@ -183,8 +188,8 @@ class TargetValidator:
         parsed = urlparse(url)
         domain = parsed.netloc.split(':')[0]
         
-        # Whitelisted domains don't require all confirmations
-        if any(allowed in domain for allowed in TargetValidator.ALLOWED_TEST_DOMAINS):
+        # Whitelisted test domains don't require all confirmations
+        if get_domain_policy().evaluate(domain).is_test_domain:
             if not confirmed_permission:
                 return False, "You must acknowledge scanning terms even for test domains"
             return True, None
@@ -209,11 +214,12 @@ class SafetyValidator:
     CRITICAL: All website scans MUST pass through this validator.
     """
     
-    def __init__(self):
-        self.rate_limiter = ScanRateLimiter()
+    def __init__(self, rate_limiter: Optional[ScanRateLimiter] = None):
+        # Shared by every worker process unless a dedicated limiter is passed
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         self.target_validator = TargetValidator()
     
-    def validate_scan_request(
+    async def validate_scan_request(
         self,
         url: str,
         client_ip: str,
@@ -232,7 +238,8 @@ class SafetyValidator:
             legal_responsibility: User accepts legal responsibility
             
         Returns:
-            Tuple of (is_valid: bool, error_message: str if invalid, validation_metadata: dict)
+            Tuple of (is_valid: bool, error_message: str if invalid, validation_metadata: dict);
+            a rate limited request has blocked_reason "rate_limit" and retry_after (seconds)
         """
         metadata = {
             "timestamp": datetime.utcnow().isoformat(),
@@ -242,25 +249,61 @@ class SafetyValidator:
         }
         
         # Step 1: Rate limiting check
-        can_scan, rate_msg = self.rate_limiter.can_scan(client_ip)
-        if not can_scan:
+        rate_limit = await self.rate_limiter.check_async(client_ip)
+        if not rate_limit.allowed:
             metadata["blocked_reason"] = "rate_limit"
-            return False, rate_msg, metadata
+            metadata["retry_after"] = rate_limit.retry_after
+            return False, rate_limit_message(rate_limit.retry_after), metadata
         metadata["validations_passed"].append("rate_limit")
         
+        # Steps 2-4: Target and permission checks
+        is_valid, error_message = await self.validate_target(
+            url, confirmed_permission, owner_confirmation, legal_responsibility, metadata
+        )
+        return is_valid, error_message, metadata
+    
+    async def validate_target(
+        self,
+        url: str,
+        confirmed_permission: bool = False,
+        owner_confirmation: bool = False,
+        legal_responsibility: bool = False,
+        metadata: Optional[Dict[str, any]] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Validate a single scan target without consuming rate limit.
+        
+        Used directly by batch scans, which are charged to a separate
+        per-URL batch quota up front. The addresses an authorized target resolved
+        to are pinned, so the scanners connect to exactly those addresses.
+        
+        Args:
+            url: Target URL to scan
+            confirmed_permission: User confirmed they have permission
+            owner_confirmation: User confirmed ownership or written permission
+            legal_responsibility: User accepts legal responsibility
+            metadata: Optional validation metadata dict to record results in
+            
+        Returns:
+            Tuple of (is_valid: bool, error_message: str if invalid)
+        """
+        if metadata is None:
+            metadata = {"validations_passed": []}
+        
         # Step 2: URL format validation
         is_valid_url, url_msg = self.target_validator.is_valid_url(url)
         if not is_valid_url:
             metadata["blocked_reason"] = "invalid_url"
-            return False, url_msg, metadata
+            return False, url_msg
         metadata["validations_passed"].append("url_format")
         
         # Step 3: Target allowlist check
-        is_allowed, target_msg = self.target_validator.is_allowed_target(url)
+        is_allowed, target_msg, addresses = await self.target_validator.is_allowed_target(url)
         if not is_allowed:
             metadata["blocked_reason"] = "blocked_target"
-            return False, target_msg, metadata
+            return False, target_msg
         metadata["validations_passed"].append("target_allowed")
+        metadata["resolved_addresses"] = addresses
         
         # Step 4: Legal permission validation
         has_permission, permission_msg = self.target_validator.validate_permission(
@@ -268,12 +311,13 @@ class SafetyValidator:
         )
         if not has_permission:
             metadata["blocked_reason"] = "missing_permission"
-            return False, permission_msg, metadata
+            return False, permission_msg
         metadata["validations_passed"].append("legal_permission")
         
-        # All validations passed
+        # All validations passed: scanners connect only to the approved addresses
+        get_target_pins().pin(urlparse(url).hostname, addresses)
         metadata["scan_authorized"] = True
-        return True, None, metadata
+        return True, None
     
     def get_legal_disclaimer(self) -> Dict[str, any]:
         """
@@ -323,7 +367,7 @@ def get_safety_validator() -> SafetyValidator:
     return _safety_validator
 
 
-def validate_scan(
+async def validate_scan(
     url: str,
     client_ip: str,
     confirmed_permission: bool = False,
@@ -336,6 +380,6 @@ def validate_scan(
     This should be called by the API endpoint before any scanning.
     """
     validator = get_safety_validator()
-    return validator.validate_scan_request(
+    return await validator.validate_scan_request(
         url, client_ip, confirmed_permission, owner_confirmation, legal_responsibility
     )
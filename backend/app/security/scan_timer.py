@@ -0,0 +1,39 @@
+"""
+Per-Scan Latency Recorder
+
+Scanners record how long each network sub-step took (TLS connect and
+handshake, HTTP time-to-first-byte and body read, each DNS lookup) into a
+ScanTimer shared by every stage of one scan. The scan pipeline adds stage
+durations and persists the resulting flat {span: milliseconds} breakdown.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class ScanTimer:
+    """Thread-safe collection of named durations for one scan."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block (recorded even if it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name: str, duration_ms: float):
+        """Record a duration; repeated spans of the same name accumulate."""
+        with self._lock:
+            self._durations[name] = self._durations.get(name, 0) + int(duration_ms)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._durations)
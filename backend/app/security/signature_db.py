@@ -0,0 +1,216 @@
+"""
+Technology Signature Database
+
+Fingerprints live in data/tech_signatures.json rather than in code. They are
+indexed once by where a signature can match: response header name, cookie
+name, <meta> name and script-src host, plus one matcher for the remaining
+page-body patterns. A scan only evaluates the buckets whose key occurs in the
+response, so the signature set can grow to thousands of technologies without
+slowing every scan down.
+
+The built index is cached as a pickle, so startup skips parsing and
+indexing; the regexes of a bucket compile on its first use. Unpickling runs
+code, so the cache is only read from a private per-user directory (owned by
+this user, closed to everyone else) and its file name carries the data
+file's SHA-256: a cache never outlives the signatures it was built from.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import stat
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .signature_matcher import SignatureMatcher
+
+
+SIGNATURES_PATH = Path(__file__).resolve().parents[2] / "data" / "tech_signatures.json"
+INDEX_CACHE_DIR = Path.home() / ".cache" / "cyberguardx"
+
+# Bump whenever SignatureIndex or SignatureMatcher change shape, to invalidate cached indexes
+INDEX_FORMAT_VERSION = 1
+
+# script_src key matching scripts from any host
+ANY_HOST = "*"
+
+_META_TAG = re.compile(r"<meta\s[^>]*>", re.IGNORECASE)
+_META_NAME = re.compile(r"""(?:name|property|http-equiv)\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+_META_CONTENT = re.compile(r"""content\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_SCRIPT_SRC = re.compile(r"""<script\s[^>]*?src\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+# Cookie names in a (possibly comma-joined) Set-Cookie header; expiry dates have no "="
+_COOKIE_NAME = re.compile(r"(?:^|,)\s*([^=;,\s]+)=")
+
+
+class SignatureIndex:
+    """Signatures grouped into matchers by where they can match."""
+
+    def __init__(self, technologies: Dict[str, Dict]):
+        """
+        Args:
+            technologies: The "technologies" object of the signature data file
+        """
+        self.categories: Dict[str, List[str]] = {}
+        by_header: Dict[str, List[Tuple[str, str]]] = {}
+        by_cookie: Dict[str, List[Tuple[str, str]]] = {}
+        by_meta: Dict[str, List[Tuple[str, str]]] = {}
+        by_host: Dict[str, List[Tuple[str, str]]] = {}
+        html: List[Tuple[str, str]] = []
+
+        for name, spec in technologies.items():
+            self.categories[name] = list(spec.get("categories", []))
+            for bucket, key in ((by_header, "headers"), (by_cookie, "cookies"), (by_meta, "meta")):
+                for field, pattern in spec.get(key, {}).items():
+                    bucket.setdefault(field.lower(), []).append((name, pattern))
+            for host, pattern in spec.get("script_src", {}).items():
+                by_host.setdefault(host.lower(), []).append((name, pattern))
+            html.extend((name, pattern) for pattern in spec.get("html", []))
+
+        self.headers = _matchers(by_header)
+        self.cookies = _matchers(by_cookie)
+        self.meta = _matchers(by_meta)
+        self.script_src = _matchers(by_host)
+        self.html = SignatureMatcher(html)
+
+    def match(self, headers: Dict[str, str], html: str) -> Dict[str, Optional[str]]:
+        """
+        Technologies whose signatures match a response.
+
+        Args:
+            headers: Response headers
+            html: Decoded page body (prefix)
+
+        Returns:
+            {technology name: version or None}
+        """
+        hits: Dict[str, Optional[str]] = {}
+        for name, value in headers.items():
+            _merge(hits, self.headers.get(name.lower()), value)
+
+        if self.cookies:
+            set_cookie = headers.get("Set-Cookie", "")
+            for cookie in _COOKIE_NAME.finditer(set_cookie):
+                value = set_cookie[cookie.end():].split(";", 1)[0]
+                _merge(hits, self.cookies.get(cookie.group(1).lower()), value)
+
+        if self.meta:
+            for tag in _META_TAG.finditer(html):
+                name = _META_NAME.search(tag.group())
+                content = _META_CONTENT.search(tag.group())
+                if name and content:
+                    _merge(hits, self.meta.get(name.group(1).lower()), next(filter(None, content.groups()), ""))
+
+        if self.script_src:
+            for script in _SCRIPT_SRC.finditer(html):
+                src = script.group(1)
+                for host in _host_keys(src):
+                    _merge(hits, self.script_src.get(host), src)
+
+        _merge(hits, self.html, html)
+        return hits
+
+
+def _matchers(buckets: Dict[str, List[Tuple[str, str]]]) -> Dict[str, SignatureMatcher]:
+    return {key: SignatureMatcher(signatures) for key, signatures in buckets.items()}
+
+
+def _merge(hits: Dict[str, Optional[str]], matcher: Optional[SignatureMatcher], text: str):
+    """Add a matcher's hits, keeping the first version found per technology."""
+    if matcher is None:
+        return
+    for name, version in matcher.scan(text).items():
+        if hits.get(name) is None:
+            hits[name] = version
+
+
+def _host_keys(src: str) -> Iterable[str]:
+    """script_src keys a script URL can match: its host, each parent domain, and ANY_HOST."""
+    host = urlparse(src).hostname if "//" in src else None  # Relative URLs have no host
+    labels = host.split(".") if host else []
+    for start in range(len(labels) - 1):
+        yield ".".join(labels[start:])
+    yield ANY_HOST
+
+
+def build_signature_index(
+    signatures_path: Path = SIGNATURES_PATH,
+    cache_dir: Optional[Path] = INDEX_CACHE_DIR
+) -> SignatureIndex:
+    """
+    Load the signature index, from the pickle cache when one exists for this data file.
+
+    A missing or unreadable cache is rebuilt and written (a cache directory
+    that is not private, or cannot be written, is skipped).
+    """
+    raw = signatures_path.read_bytes()
+    key = f"{INDEX_FORMAT_VERSION}-{hashlib.sha256(raw).hexdigest()}"
+    cache_path = None
+    if cache_dir is not None and _private_dir(cache_dir):
+        cache_path = cache_dir / f"{signatures_path.stem}-{key}.index.pkl"
+
+    if cache_path is not None and _private_file(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("key") == key:
+                return cached["index"]
+        except Exception:
+            pass  # Corrupt or incompatible cache: rebuild below
+
+    index = SignatureIndex(json.loads(raw)["technologies"])
+    if cache_path is not None:
+        try:
+            temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"key": key, "index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            temp_path.replace(cache_path)
+            # Indexes of earlier signature files are never read again
+            for stale in cache_dir.glob(f"{signatures_path.stem}-*.index.pkl"):
+                if stale != cache_path:
+                    stale.unlink()
+        except OSError:
+            pass
+    return index
+
+
+def _private_dir(path: Path) -> bool:
+    """Create path if needed (mode 0700); True if only this user can write to it."""
+    try:
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return _owned_and_closed(path.stat())
+    except OSError:
+        return False
+
+
+def _private_file(path: Path) -> bool:
+    """True if path is a regular file only this user can write to."""
+    try:
+        info = path.lstat()
+    except OSError:
+        return False
+    return stat.S_ISREG(info.st_mode) and _owned_and_closed(info)
+
+
+def _owned_and_closed(info: os.stat_result) -> bool:
+    if not hasattr(os, "getuid"):
+        return True  # No POSIX ownership (Windows): the profile directory is per-user
+    return info.st_uid == os.getuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+# Global index (loaded on first use)
+_signature_index: Optional[SignatureIndex] = None
+_signature_index_lock = threading.Lock()
+
+
+def get_signature_index() -> SignatureIndex:
+    """Get the shared technology signature index."""
+    global _signature_index
+    with _signature_index_lock:
+        if _signature_index is None:
+            _signature_index = build_signature_index()
+        return _signature_index
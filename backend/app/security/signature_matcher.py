@@ -0,0 +1,160 @@
+"""
+Single-Pass Signature Matcher
+
+Technology fingerprints are regular expressions. Running each one over the
+page costs body size x signature count. Instead, the literal text every
+signature starts with (its anchor, e.g. "jquery" for `jquery[-.]([0-9.]+)`)
+goes into one trie-shaped regex, compiled once. A single pass over the text
+finds which anchors occur, and only the signatures behind those anchors are
+evaluated to confirm the hit and capture the version (the signature's first
+capture group). Scan cost grows with the body size, and only slowly with
+the number of signatures.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Shorter literal prefixes occur too often to narrow down the candidates
+MIN_ANCHOR_LENGTH = 3
+
+_METACHARACTERS = set(".^$*+?{}[]|()\\")
+_QUANTIFIERS = set("*+?{")
+
+# Serializes lazy compilation: matchers are shared by every scan thread
+_compile_lock = threading.Lock()
+
+
+def literal_anchor(pattern: str) -> Optional[str]:
+    """
+    Lowercased literal text every match of pattern starts with, or None if
+    it is shorter than MIN_ANCHOR_LENGTH.
+    """
+    if "|" in pattern.replace("\\|", ""):
+        return None  # Top-level alternatives have no common prefix
+
+    literal = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern) and not pattern[index + 1].isalnum():
+            char, step = pattern[index + 1], 2
+        elif char in _METACHARACTERS:
+            break
+        else:
+            step = 1
+        # A quantified character is optional or repeated: not part of the prefix
+        if index + step < len(pattern) and pattern[index + step] in _QUANTIFIERS:
+            break
+        literal.append(char)
+        index += step
+
+    anchor = "".join(literal).lower()
+    return anchor if len(anchor) >= MIN_ANCHOR_LENGTH else None
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching any of the words, factored by common prefixes."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ends here too: the longer continuations are optional
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class SignatureMatcher:
+    """
+    Matcher for a set of (name, pattern) signatures.
+
+    Anchors are extracted up front; the regexes are compiled once, on first
+    scan (under a lock, as matchers are shared across threads), so building
+    (or unpickling) many matchers stays cheap and a matcher that never sees
+    matching input never compiles.
+    """
+
+    def __init__(self, signatures: Iterable[Tuple[str, str]], flags: int = re.IGNORECASE):
+        """
+        Args:
+            signatures: (technology name, regex) pairs; several pairs may share
+                a name. An empty pattern matches any text, including "".
+            flags: Regex flags applied to every pattern (anchors are matched
+                case-insensitively regardless)
+        """
+        self.signatures = [(name, pattern, literal_anchor(pattern)) for name, pattern in signatures]
+        self.flags = flags
+        anchors = {anchor for _, _, anchor in self.signatures if anchor is not None}
+        self.anchor_source = _trie_pattern(anchors) if anchors else None
+        self._compiled = None
+
+    def __getstate__(self):
+        # Compiled regexes are rebuilt on first use after unpickling
+        return {**self.__dict__, "_compiled": None}
+
+    def _compile(self):
+        """(anchor regex, {anchor: [(name, regex)]}, [(name, regex)] without an anchor)"""
+        anchored: Dict[str, List[Tuple[str, re.Pattern]]] = {}
+        unanchored: List[Tuple[str, re.Pattern]] = []
+        for name, pattern, anchor in self.signatures:
+            compiled = re.compile(pattern, self.flags)
+            if anchor is None:
+                unanchored.append((name, compiled))
+            else:
+                anchored.setdefault(anchor, []).append((name, compiled))
+        # Zero-width lookahead: anchors overlapping an earlier match are still found
+        anchor_pattern = re.compile(f"(?=({self.anchor_source}))") if self.anchor_source else None
+        return anchor_pattern, anchored, unanchored
+
+    def scan(self, text: str) -> Dict[str, Optional[str]]:
+        """
+        Scan text once for every signature.
+
+        Returns:
+            {technology name: version} for every technology found; the version
+            is None if no matching pattern captured one
+        """
+        compiled = self._compiled
+        if compiled is None:
+            with _compile_lock:
+                if self._compiled is None:
+                    self._compiled = self._compile()
+                compiled = self._compiled
+        anchor_pattern, anchored, unanchored = compiled
+
+        candidates = list(unanchored)
+        if anchor_pattern is not None and text:
+            seen = set()
+            for match in anchor_pattern.finditer(text.lower()):
+                matched = match.group(1)
+                if matched in seen:
+                    continue
+                seen.add(matched)
+                # The trie prefers the longest anchor; shorter anchors that
+                # prefix it occur at the same position
+                for end in range(MIN_ANCHOR_LENGTH, len(matched) + 1):
+                    candidates.extend(anchored.get(matched[:end], ()))
+
+        hits: Dict[str, Optional[str]] = {}
+        evaluated = set()
+        for name, compiled in candidates:
+            if id(compiled) in evaluated:
+                continue
+            evaluated.add(id(compiled))
+            match = compiled.search(text)
+            if match is None:
+                continue
+            version = match.group(1) if compiled.groups else None
+            if hits.get(name) is None:
+                hits[name] = version
+        return hits
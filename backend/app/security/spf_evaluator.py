@@ -0,0 +1,260 @@
+"""
+SPF Include-Tree Expansion
+
+Expands an SPF record the way a receiving mail server would before checking
+a sender: include: mechanisms and the redirect= modifier are followed
+recursively, and every DNS-querying term is counted against the RFC 7208
+limits (10 lookups, 2 void lookups). Records over the limits fail with a
+permanent error at receivers, so mail from the domain is rejected or
+unauthenticated even though the record "exists".
+
+Expanded subtrees are memoized process-wide by domain for the TTL of their
+records. Hosted senders such as _spf.google.com are included by most
+domains, so a batch scan resolves each of them once rather than once per
+scanned domain.
+
+PASSIVE - TXT lookups only; a/mx/ptr/exists terms are counted, not resolved.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import dns.resolver
+
+
+# RFC 7208 section 4.6.4 processing limits
+SPF_LOOKUP_LIMIT = 10
+SPF_VOID_LOOKUP_LIMIT = 2
+
+# Terms that cost a DNS lookup during evaluation (plus the redirect modifier)
+LOOKUP_MECHANISMS = {"include", "a", "mx", "ptr", "exists"}
+
+# How long to remember that an include target has no SPF record (seconds)
+SPF_NEGATIVE_TTL = 300
+
+SPF_MEMO_MAX_ENTRIES = 10000
+
+QUALIFIERS = "+-~?"
+
+ResolveFunction = Callable[[str, str], Awaitable]
+
+# domain -> (expiry on the monotonic clock, expanded node)
+_spf_memo: "OrderedDict[str, Tuple[float, Dict[str, any]]]" = OrderedDict()
+_spf_memo_lock = threading.Lock()
+
+
+def parse_spf(record: str) -> Tuple[List[Tuple[str, str, Optional[str]]], Dict[str, str]]:
+    """
+    Split an SPF record into mechanisms and modifiers.
+
+    Returns:
+        ([(qualifier, mechanism, argument or None)], {modifier: value})
+    """
+    mechanisms = []
+    modifiers = {}
+    for term in record.split()[1:]:  # Skip 'v=spf1'
+        name, separator, value = term.partition("=")
+        if separator and ":" not in name and "/" not in name:
+            modifiers[name.lower()] = value
+            continue
+        qualifier = term[0] if term[0] in QUALIFIERS else "+"
+        term = term.lstrip(QUALIFIERS)
+        mechanism, _, argument = term.partition(":")
+        mechanisms.append((qualifier, mechanism.split("/")[0].lower(), argument or None))
+    return mechanisms, modifiers
+
+
+def spf_records(answers) -> List[str]:
+    """SPF records among TXT answers (multi-string records joined)."""
+    records = []
+    for rdata in answers:
+        text = b"".join(rdata.strings).decode("utf-8", errors="replace")
+        if text == "v=spf1" or text.startswith("v=spf1 "):
+            records.append(text)
+    return records
+
+
+def clear_spf_memo():
+    with _spf_memo_lock:
+        _spf_memo.clear()
+
+
+class SPFExpander:
+    """Expands one SPF include tree, sharing the process-wide memo."""
+
+    def __init__(self, resolve: ResolveFunction):
+        """
+        Args:
+            resolve: Async function (name, rdtype) -> DNS answers; raises
+                dnspython NoAnswer/NXDOMAIN for missing records
+        """
+        self.resolve = resolve
+        self.memo_hits = 0
+
+    async def expand(self, domain: str, record: str, ttl: int) -> Dict[str, any]:
+        """
+        Expand a domain's SPF record and summarize the evaluation.
+
+        Args:
+            domain: Domain the record was found at
+            record: Its SPF record
+            ttl: TTL of the record
+
+        Returns:
+            Lookup counts against the RFC 7208 limits, effective all qualifier,
+            permissive includes, permanent/temporary errors and the include tree
+        """
+        root = await self._expand_record(domain, record, ttl, (domain.lower(),))
+        lookup_count = root["lookups"]
+        void_lookup_count = root["void_lookups"]
+        errors = list(root["errors"])
+        if lookup_count > SPF_LOOKUP_LIMIT:
+            errors.insert(0, f"{lookup_count} DNS lookups exceed the limit of {SPF_LOOKUP_LIMIT}")
+        if void_lookup_count > SPF_VOID_LOOKUP_LIMIT:
+            errors.insert(0, f"{void_lookup_count} void lookups exceed the limit of {SPF_VOID_LOOKUP_LIMIT}")
+        return {
+            "lookup_count": lookup_count,
+            "lookup_limit_exceeded": lookup_count > SPF_LOOKUP_LIMIT,
+            "void_lookup_count": void_lookup_count,
+            "all_qualifier": _effective_all(root),
+            "permissive_includes": _permissive_includes(root),
+            "errors": errors,
+            "temporary_errors": root["temporary_errors"],
+            "include_tree": _tree(root),
+        }
+
+    async def _expand_domain(self, domain: str, path: Tuple[str, ...]) -> Dict[str, any]:
+        """Expanded SPF record of an include/redirect target, from the memo when fresh."""
+        key = domain.lower().rstrip(".")
+        if key in path:
+            return _node(domain, None, errors=[f"Include loop via {domain}"], cacheable=False)
+        if "%" in domain:
+            # Macros depend on the sender being checked
+            return _node(domain, None, cacheable=False)
+
+        with _spf_memo_lock:
+            cached = _spf_memo.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                _spf_memo.move_to_end(key)
+                self.memo_hits += 1
+                return cached[1]
+
+        path = path + (key,)
+        try:
+            answers = await self.resolve(domain, "TXT")
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            node = _node(domain, None, ttl=SPF_NEGATIVE_TTL, void=True, errors=[f"{domain} has no SPF record"])
+        except Exception as e:
+            node = _node(domain, None, temporary_errors=[f"{domain}: {type(e).__name__}"], cacheable=False)
+        else:
+            records = spf_records(answers)
+            ttl = answers.rrset.ttl if answers.rrset is not None else SPF_NEGATIVE_TTL
+            if len(records) == 1:
+                node = await self._expand_record(domain, records[0], ttl, path)
+            elif records:
+                node = _node(domain, None, ttl=ttl, errors=[f"{domain} has {len(records)} SPF records"])
+            else:
+                node = _node(domain, None, ttl=ttl, errors=[f"{domain} has no SPF record"])
+
+        if node["cacheable"]:
+            with _spf_memo_lock:
+                _spf_memo[key] = (time.monotonic() + node["ttl"], node)
+                _spf_memo.move_to_end(key)
+                while len(_spf_memo) > SPF_MEMO_MAX_ENTRIES:
+                    _spf_memo.popitem(last=False)
+        return node
+
+    async def _expand_record(self, domain: str, record: str, ttl: int, path: Tuple[str, ...]) -> Dict[str, any]:
+        mechanisms, modifiers = parse_spf(record)
+        node = _node(domain, record, ttl=ttl)
+        node["all"] = next((qualifier for qualifier, name, _ in mechanisms if name == "all"), None)
+        node["lookups"] = sum(1 for _, name, _ in mechanisms if name in LOOKUP_MECHANISMS)
+
+        include_targets = [
+            (qualifier, argument) for qualifier, name, argument in mechanisms if name == "include" and argument
+        ]
+        # redirect= is ignored when the record has an all mechanism
+        redirect = modifiers.get("redirect") if node["all"] is None else None
+        if redirect:
+            node["lookups"] += 1
+
+        # A chain deeper than the lookup limit fails anyway: stop expanding
+        if len(path) > SPF_LOOKUP_LIMIT:
+            return node
+
+        targets = [target for _, target in include_targets] + ([redirect] if redirect else [])
+        children = await asyncio.gather(*(self._expand_domain(target, path) for target in targets))
+        includes = children[:len(include_targets)]
+        node["includes"] = [
+            {"qualifier": qualifier, "node": child} for (qualifier, _), child in zip(include_targets, includes)
+        ]
+        node["redirect"] = children[-1] if redirect else None
+
+        for child in children:
+            node["lookups"] += child["lookups"]
+            node["void_lookups"] += child["void_lookups"]
+            node["errors"].extend(child["errors"])
+            node["temporary_errors"].extend(child["temporary_errors"])
+            node["ttl"] = min(node["ttl"], child["ttl"])
+            node["cacheable"] = node["cacheable"] and child["cacheable"]
+        return node
+
+
+def _node(
+    domain: str,
+    record: Optional[str],
+    ttl: int = SPF_NEGATIVE_TTL,
+    void: bool = False,
+    errors: Optional[List[str]] = None,
+    temporary_errors: Optional[List[str]] = None,
+    cacheable: bool = True
+) -> Dict[str, any]:
+    return {
+        "domain": domain,
+        "record": record,
+        "all": None,
+        "lookups": 0,
+        "void_lookups": 1 if void else 0,
+        "includes": [],
+        "redirect": None,
+        "errors": errors or [],
+        "temporary_errors": temporary_errors or [],
+        "ttl": ttl,
+        "cacheable": cacheable,
+    }
+
+
+def _effective_all(node: Dict[str, any]) -> Optional[str]:
+    """Qualifier applied to senders no other term matches (following redirect=)."""
+    if node["all"] is not None:
+        return node["all"]
+    if node["redirect"] is not None:
+        return _effective_all(node["redirect"])
+    return None
+
+
+def _permissive_includes(node: Dict[str, any]) -> List[str]:
+    """Passing includes whose record authorizes every sender (+all)."""
+    permissive = []
+    for include in node["includes"]:
+        child = include["node"]
+        if include["qualifier"] == "+" and _effective_all(child) == "+":
+            permissive.append(child["domain"])
+        permissive.extend(_permissive_includes(child))
+    if node["redirect"] is not None:
+        permissive.extend(_permissive_includes(node["redirect"]))
+    return permissive
+
+
+def _tree(node: Dict[str, any]) -> Dict[str, any]:
+    """JSON view of an expanded node: record, subtree lookups and children."""
+    return {
+        "domain": node["domain"],
+        "record": node["record"],
+        "lookups": node["lookups"],
+        "includes": [_tree(include["node"]) for include in node["includes"]],
+        "redirect": _tree(node["redirect"]) if node["redirect"] is not None else None,
+    }
@@ -10,7 +10,15 @@ import socket
 import datetime
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
-import requests
+
+from .cancellation import CancellationToken
+from .dns_cache import resolve_host
+from .cert_cache import certificate_details, certificate_fingerprint, get_cert_cache
+from .fetch_context import FetchContext
+from .http_client import PooledHTTPClient
+from .scan_timer import ScanTimer
+from .target_pins import get_target_pins
+from .tls_probe import SUPPORTED, TLSProbeMatrix
 
 
 class SSLTLSScanner:
@@ -36,15 +44,35 @@ class SSLTLSScanner:
         'ECDHE-RSA-AES256-GCM-SHA384',
     ]
     
-    def __init__(self, timeout: int = 10):
+    # Deprecated protocols reported (and penalized) if the server still accepts them
+    DEPRECATED_PROTOCOLS = ['TLSv1.0', 'TLSv1.1']
+    
+    # Weak cipher families (tls_probe.CIPHER_FAMILIES) and their risk points if accepted
+    WEAK_CIPHER_FAMILIES = {
+        '3DES': 10,
+        'RC4': 15,
+        'NULL/anonymous/export': 20,
+    }
+    
+    def __init__(
+        self,
+        timeout: int = 10,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[ScanTimer] = None,
+        http_client: Optional[PooledHTTPClient] = None
+    ):
         self.timeout = timeout
+        self.cancel_token = cancel_token
+        self.timer = timer or ScanTimer()
+        self.http_client = http_client
     
-    def scan(self, url: str) -> Dict[str, any]:
+    def scan(self, url: str, fetch_context: Optional[FetchContext] = None) -> Dict[str, any]:
         """
         Scan SSL/TLS configuration of target website.
         
         Args:
             url: Target URL to scan
+            fetch_context: Shared per-scan response used for the HSTS check
             
         Returns:
             Dictionary with SSL/TLS scan results
@@ -84,8 +112,25 @@ class SSLTLSScanner:
             hostname = parsed.netloc.split(':')[0]
             port = parsed.port if parsed.port else 443
             
+            # Resolve once and connect to the first approved address that answers:
+            # the main handshake and every capability probe use that address
+            with self.timer.span("tls.resolve"):
+                addresses = self._resolve(hostname, port)
+            with self.timer.span("tls.connect"):
+                sock = self._connect(addresses)
+            family, address = sock.family, sock.getpeername()
+            
+            # Probe supported protocols and cipher families while the certificate is checked
+            probe_matrix = TLSProbeMatrix(hostname, address, family, cancel_token=self.cancel_token)
+            probe_matrix.start()
+            
             # Perform SSL/TLS analysis
-            cert_info = self._check_certificate(hostname, port)
+            cert_info = self._check_certificate(hostname, port, sock=sock)
+            tls_matrix = probe_matrix.collect()
+            self.timer.record("tls.probe_matrix", tls_matrix["elapsed_ms"])
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            result["tls_matrix"] = tls_matrix
             result["certificate"] = cert_info["details"]
             result["tls_version"] = cert_info.get("tls_version")
             result["cipher_suite"] = cert_info.get("cipher_suite")
@@ -125,8 +170,18 @@ class SSLTLSScanner:
                     issues.append(f"CBC mode cipher (potential vulnerability): {cipher}")
                     risk_points += 5
             
+            # Check protocols and cipher families the server still accepts
+            for protocol in self.DEPRECATED_PROTOCOLS:
+                if tls_matrix["protocols"].get(protocol) == SUPPORTED:
+                    issues.append(f"Server still accepts deprecated protocol: {protocol}")
+                    risk_points += 10
+            for family, points in self.WEAK_CIPHER_FAMILIES.items():
+                if tls_matrix["cipher_families"].get(family) == SUPPORTED:
+                    issues.append(f"Server accepts weak cipher suites: {family}")
+                    risk_points += points
+            
             # Check HSTS via headers
-            hsts_check = self._check_hsts(url)
+            hsts_check = self._check_hsts(url, fetch_context)
             if not hsts_check["present"]:
                 issues.append("HSTS header not configured")
                 risk_points += 10
@@ -141,7 +196,7 @@ class SSLTLSScanner:
             result["score"] = score
             
             # Generate recommendations
-            result["recommendations"] = self._generate_recommendations(cert_info, issues)
+            result["recommendations"] = self._generate_recommendations(cert_info, issues, tls_matrix)
             
             result["success"] = True
             
@@ -157,13 +212,19 @@ class SSLTLSScanner:
         
         return result
     
-    def _check_certificate(self, hostname: str, port: int) -> Dict[str, any]:
+    def _check_certificate(
+        self,
+        hostname: str,
+        port: int,
+        sock: Optional[socket.socket] = None
+    ) -> Dict[str, any]:
         """
         Retrieve and validate SSL certificate.
         
         Args:
             hostname: Target hostname
             port: Target port (usually 443)
+            sock: Already connected socket to handshake on (taken over)
             
         Returns:
             Dictionary with certificate information
@@ -177,45 +238,20 @@ class SSLTLSScanner:
         }
         
         try:
-            # Create SSL context with secure defaults
-            context = ssl.create_default_context()
-            
             # Connect and get certificate
-            with socket.create_connection((hostname, port), timeout=self.timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Get TLS version and cipher
-                    result["tls_version"] = ssock.version()
-                    result["cipher_suite"] = ssock.cipher()[0] if ssock.cipher() else None
-                    
-                    # Parse certificate details
-                    subject = dict(x[0] for x in cert.get('subject', []))
-                    issuer = dict(x[0] for x in cert.get('issuer', []))
-                    
-                    # Parse dates
-                    not_before = datetime.datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
-                    not_after = datetime.datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    now = datetime.datetime.utcnow()
-                    
-                    days_until_expiry = (not_after - now).days
-                    
-                    result["details"] = {
-                        "common_name": subject.get('commonName', 'Unknown'),
-                        "organization": subject.get('organizationName', 'Unknown'),
-                        "issuer": issuer.get('organizationName', 'Unknown'),
-                        "valid_from": not_before.isoformat(),
-                        "valid_until": not_after.isoformat(),
-                        "days_until_expiry": days_until_expiry,
-                        "expired": days_until_expiry < 0,
-                        "expires_soon": 0 <= days_until_expiry < 30,
-                        "serial_number": cert.get('serialNumber', 'Unknown'),
-                        "version": cert.get('version', 'Unknown'),
-                        "subject_alt_names": [name[1] for name in cert.get('subjectAltName', [])]
-                    }
-                    
-                    result["valid"] = True
-                    
+            with self._handshake(hostname, port, sock) as ssock:
+                der_cert = ssock.getpeercert(binary_form=True)
+                
+                # Get TLS version and cipher
+                result["tls_version"] = ssock.version()
+                result["cipher_suite"] = ssock.cipher()[0] if ssock.cipher() else None
+                
+                # Parse certificate details (once per distinct leaf certificate)
+                analysis, _ = get_cert_cache().get_or_analyze(der_cert, ssock.getpeercert)
+                result["details"] = certificate_details(analysis)
+                
+                result["valid"] = True
+                
         except ssl.CertificateError as e:
             result["error"] = f"Certificate validation failed: {str(e)}"
         except ssl.SSLError as e:
@@ -225,12 +261,110 @@ class SSLTLSScanner:
         
         return result
     
-    def _check_hsts(self, url: str) -> Dict[str, any]:
+    def _resolve(self, hostname: str, port: int) -> List[Tuple[int, Tuple]]:
+        """
+        Resolve the target once.
+        
+        Uses the addresses target validation approved for the hostname when
+        pinned, so the scan connects exactly where validation checked.
+        
+        Returns:
+            [(address family, socket address)] in order of preference
+            
+        Raises:
+            socket.gaierror: If the hostname does not resolve
+        """
+        addresses = get_target_pins().socket_addresses(hostname, port)
+        return addresses or resolve_host(hostname, port, timeout=self.timeout)
+    
+    def _connect(self, addresses: List[Tuple[int, Tuple]]) -> socket.socket:
+        """
+        Connect to the first address that accepts, like socket.create_connection.
+        
+        Each address gets the full timeout; the error of the last one is
+        raised only if all of them fail.
+        
+        Raises:
+            OSError: If no address accepts the connection
+        """
+        error: Optional[OSError] = None
+        for family, address in addresses:
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error or socket.gaierror(socket.EAI_NONAME, "No address to connect to")
+    
+    def _handshake(self, hostname: str, port: int, sock: Optional[socket.socket] = None) -> ssl.SSLSocket:
+        """
+        Open a verified TLS connection (caller closes it).
+        
+        Connect and handshake are timed, and cancellation aborts a pending
+        handshake immediately. If given, the already connected socket is
+        used instead of resolving and connecting again.
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        
+        # Create SSL context with secure defaults
+        context = ssl.create_default_context()
+        
+        if sock is None:
+            addresses = self._resolve(hostname, port)
+            with self.timer.span("tls.connect"):
+                sock = self._connect(addresses)
+        try:
+            # wrap_socket takes over the descriptor, so cancellation shuts down
+            # a duplicate of it to make a pending handshake fail immediately
+            with sock.dup() as abort_handle:
+                unregister = (
+                    self.cancel_token.register(lambda: abort_handle.shutdown(socket.SHUT_RDWR))
+                    if self.cancel_token is not None else (lambda: None)
+                )
+                try:
+                    with self.timer.span("tls.handshake"):
+                        return context.wrap_socket(sock, server_hostname=hostname)
+                finally:
+                    unregister()
+        except BaseException:
+            sock.close()
+            raise
+    
+    def probe_handshake(self, url: str) -> Dict[str, Optional[str]]:
+        """
+        Cheap change probe: a single handshake, no HSTS check or grading.
+        
+        Args:
+            url: Target HTTPS URL
+            
+        Returns:
+            Leaf certificate SHA-256 fingerprint, TLS version and cipher suite
+            
+        Raises:
+            OSError/ssl.SSLError: If the handshake fails
+        """
+        parsed = urlparse(url)
+        with self._handshake(parsed.hostname, parsed.port or 443) as ssock:
+            der_cert = ssock.getpeercert(binary_form=True)
+            return {
+                "fingerprint_sha256": certificate_fingerprint(der_cert) if der_cert else None,
+                "tls_version": ssock.version(),
+                "cipher_suite": ssock.cipher()[0] if ssock.cipher() else None
+            }
+    
+    def _check_hsts(self, url: str, fetch_context: Optional[FetchContext] = None) -> Dict[str, any]:
         """
         Check for HSTS (HTTP Strict Transport Security) header.
         
         Args:
             url: Target URL
+            fetch_context: Shared per-scan response (fetched here if not given)
             
         Returns:
             Dictionary with HSTS information
@@ -244,7 +378,11 @@ class SSLTLSScanner:
         }
         
         try:
-            response = requests.get(url, timeout=self.timeout, verify=True)
+            if fetch_context is None:
+                fetch_context = FetchContext(
+                    url, timeout=self.timeout, http_client=self.http_client, headers_only=True
+                )
+            response = fetch_context.get()
             hsts_header = response.headers.get('Strict-Transport-Security')
             
             if hsts_header:
@@ -292,9 +430,15 @@ class SSLTLSScanner:
         else:
             return 'F', score
     
-    def _generate_recommendations(self, cert_info: Dict, issues: List[str]) -> List[Dict[str, str]]:
+    def _generate_recommendations(
+        self,
+        cert_info: Dict,
+        issues: List[str],
+        tls_matrix: Optional[Dict] = None
+    ) -> List[Dict[str, str]]:
         """Generate actionable SSL/TLS recommendations."""
         recommendations = []
+        tls_matrix = tls_matrix or {}
         
         if not cert_info["valid"]:
             recommendations.append({
@@ -329,6 +473,30 @@ class SSLTLSScanner:
                 "impact": "Vulnerable to protocol-level attacks"
             })
         
+        accepted = [
+            protocol for protocol in self.DEPRECATED_PROTOCOLS
+            if tls_matrix.get("protocols", {}).get(protocol) == SUPPORTED
+        ]
+        if accepted:
+            recommendations.append({
+                "priority": "HIGH",
+                "issue": f"Deprecated protocols still accepted: {', '.join(accepted)}",
+                "fix": "Disable TLS 1.0 and TLS 1.1 in the server configuration",
+                "impact": "Clients can be downgraded to protocols with known weaknesses"
+            })
+        
+        weak = [
+            family for family in self.WEAK_CIPHER_FAMILIES
+            if tls_matrix.get("cipher_families", {}).get(family) == SUPPORTED
+        ]
+        if weak:
+            recommendations.append({
+                "priority": "HIGH",
+                "issue": f"Weak cipher suites accepted: {', '.join(weak)}",
+                "fix": "Remove these cipher suites, use only AES-GCM or ChaCha20",
+                "impact": "Connections negotiating them can be decrypted"
+            })
+        
         if "HSTS header not configured" in issues:
             recommendations.append({
                 "priority": "HIGH",
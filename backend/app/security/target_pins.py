@@ -0,0 +1,72 @@
+"""
+Resolved Target Pinning
+
+Target validation approves a hostname by checking every address it resolves
+to. Those approved addresses are pinned here, and the connection layer (the
+shared HTTP client's connection pools and the TLS scanner) connects only to
+them. Scanners therefore skip a second lookup per stage, and a DNS answer
+that changes between validation and scan (DNS rebinding) cannot send them
+to an address that was never checked.
+
+Hosts without a pin (whitelisted test domains, redirect targets) are
+resolved normally.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .dns_cache import socket_address
+
+
+# How long a validation's addresses stay pinned (covers queued and long-running scans)
+PIN_TTL_SECONDS = 600
+
+
+class TargetPins:
+    """Thread-safe hostname -> approved addresses registry with expiry."""
+
+    def __init__(self, ttl_seconds: float = PIN_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._pins: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, hostname: str, addresses: List[str]):
+        """Pin a validated hostname to its approved IP addresses (replacing older pins)."""
+        if not addresses:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._pins[_key(hostname)] = (expires, list(addresses))
+            # Drop expired pins while we hold the lock
+            now = time.monotonic()
+            for key in [key for key, (expiry, _) in self._pins.items() if expiry <= now]:
+                del self._pins[key]
+
+    def addresses(self, hostname: str) -> Optional[List[str]]:
+        """Approved IP addresses of a hostname, or None if it is not pinned."""
+        with self._lock:
+            pinned = self._pins.get(_key(hostname))
+        if pinned is None or pinned[0] <= time.monotonic():
+            return None
+        return pinned[1]
+
+    def socket_addresses(self, hostname: str, port: int) -> Optional[List[Tuple[int, Tuple]]]:
+        """Pinned addresses as [(address family, socket address)], or None if not pinned."""
+        addresses = self.addresses(hostname)
+        if addresses is None:
+            return None
+        return [socket_address(address, port) for address in addresses]
+
+
+def _key(hostname: str) -> str:
+    return hostname.lower().rstrip(".")
+
+
+# Global pin registry
+_target_pins = TargetPins()
+
+
+def get_target_pins() -> TargetPins:
+    """Get the shared registry of validated target addresses."""
+    return _target_pins
@@ -11,6 +11,10 @@ from typing import Dict, List, Optional
 from datetime import datetime
 from urllib.parse import urlparse
 
+from .fetch_context import FetchContext
+from .http_client import PooledHTTPClient
+from .signature_db import get_signature_index
+
 
 class TechnologyDetector:
     """
@@ -22,78 +26,31 @@ class TechnologyDetector:
     - JavaScript library signatures
     - Framework patterns
     
+    Signatures come from the technology signature database (signature_db).
+    
     NO EXPLOITS, NO INTRUSIVE SCANNING.
     """
     
-    # Technology signatures from headers
-    HEADER_SIGNATURES = {
-        # Web Servers
-        'Apache': {'header': 'Server', 'pattern': r'Apache'},
-        'Nginx': {'header': 'Server', 'pattern': r'nginx'},
-        'IIS': {'header': 'Server', 'pattern': r'Microsoft-IIS'},
-        'LiteSpeed': {'header': 'Server', 'pattern': r'LiteSpeed'},
-        'Cloudflare': {'header': 'Server', 'pattern': r'cloudflare'},
-        
-        # Frameworks (from X-Powered-By)
-        'PHP': {'header': 'X-Powered-By', 'pattern': r'PHP'},
-        'ASP.NET': {'header': 'X-Powered-By', 'pattern': r'ASP\.NET'},
-        'Express': {'header': 'X-Powered-By', 'pattern': r'Express'},
-        'Django': {'header': 'Server', 'pattern': r'WSGIServer'},
-        
-        # CDNs and Security
-        'Varnish': {'header': 'Via', 'pattern': r'varnish'},
-        'Akamai': {'header': 'Server', 'pattern': r'AkamaiGHost'},
-    }
-    
-    # HTML patterns for frontend frameworks
-    HTML_SIGNATURES = {
-        'React': [
-            r'react',
-            r'data-reactroot',
-            r'__REACT',
-        ],
-        'Vue': [
-            r'vue\.js',
-            r'data-v-',
-            r'__VUE',
-        ],
-        'Angular': [
-            r'ng-version',
-            r'ng-app',
-            r'angular\.js',
-        ],
-        'jQuery': [
-            r'jquery',
-            r'jQuery',
-        ],
-        'Bootstrap': [
-            r'bootstrap',
-        ],
-        'WordPress': [
-            r'wp-content',
-            r'wp-includes',
-            r'wordpress',
-        ],
-        'Drupal': [
-            r'Drupal',
-            r'/sites/default/',
-        ],
-        'Joomla': [
-            r'Joomla',
-            r'/components/com_',
-        ],
-    }
+    # Security headers reported as security technologies
+    SECURITY_HEADERS = [
+        'Strict-Transport-Security',
+        'Content-Security-Policy',
+        'X-Frame-Options',
+        'X-Content-Type-Options'
+    ]
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, http_client: Optional[PooledHTTPClient] = None):
         self.timeout = timeout
+        self.http_client = http_client
         self.user_agent = "CyberGuardX-TechDetector/1.0 (Educational/Research)"
     
-    def scan(self, url: str) -> Dict[str, any]:
+    def scan(self, url: str, fetch_context: Optional[FetchContext] = None) -> Dict[str, any]:
         """
         Detect technologies used by target website.
         
         Args:
             url: Target URL to scan
+            fetch_context: Shared per-scan response (fetched here if not given)
             
         Returns:
             Dictionary with detected technologies
@@ -111,6 +68,7 @@ class TechnologyDetector:
             "javascript_libraries": [],
             "cdn": None,
             "security_technologies": [],
+            "technology_versions": {},
             "all_headers": {},
             "grade": None,
             "vulnerabilities": [],
@@ -118,14 +76,12 @@ class TechnologyDetector:
         }
         
         try:
-            # Make request
-            response = requests.get(
-                url,
-                timeout=self.timeout,
-                headers={'User-Agent': self.user_agent},
-                allow_redirects=True,
-                verify=True
-            )
+            # Make request (or reuse the response already fetched for this scan)
+            if fetch_context is None:
+                fetch_context = FetchContext(
+                    url, timeout=self.timeout, user_agent=self.user_agent, http_client=self.http_client
+                )
+            response = fetch_context.get()
             
             # Store all headers for analysis
             result["all_headers"] = dict(response.headers)
@@ -133,9 +89,11 @@ class TechnologyDetector:
             # Detect from headers
             self._detect_from_headers(response.headers, result)
             
-            # Detect from HTML content
-            html_content = response.text[:50000]  # First 50KB only
-            self._detect_from_html(html_content, result)
+            # Detect from signatures (headers, cookies, meta tags, scripts, HTML)
+            # Decoded prefix of the page: the fetch stops reading after 50KB and
+            # detects the charset once for every consumer
+            html_content = response.text
+            self._detect_from_signatures(response.headers, html_content, result)
             
             # Check for version disclosure vulnerabilities
             result["vulnerabilities"] = self._check_version_disclosure(result)
@@ -169,71 +127,51 @@ class TechnologyDetector:
                 result["web_server"] = match.group(1)
                 result["web_server_version"] = match.group(2)
         
-        # X-Powered-By analysis
-        powered_by = headers.get('X-Powered-By', '')
-        if powered_by:
-            if 'PHP' in powered_by:
-                version_match = re.search(r'PHP/([0-9\.]+)', powered_by)
-                lang = 'PHP'
-                if version_match:
-                    lang += f' {version_match.group(1)}'
-                result["programming_language"].append(lang)
-            
-            if 'ASP.NET' in powered_by:
-                result["programming_language"].append('ASP.NET')
-                result["frameworks"].append('ASP.NET')
-        
-        # Check all header signatures
-        for tech_name, signature in self.HEADER_SIGNATURES.items():
-            header_value = headers.get(signature['header'], '')
-            if re.search(signature['pattern'], header_value, re.IGNORECASE):
-                if tech_name in ['Apache', 'Nginx', 'IIS', 'LiteSpeed']:
-                    if not result["web_server"]:
-                        result["web_server"] = tech_name
-                elif tech_name in ['Cloudflare', 'Akamai', 'Varnish']:
-                    result["cdn"] = tech_name
-                elif tech_name not in result["frameworks"]:
-                    result["frameworks"].append(tech_name)
-        
         # Security headers detection
-        security_headers = [
-            'Strict-Transport-Security',
-            'Content-Security-Policy',
-            'X-Frame-Options',
-            'X-Content-Type-Options'
-        ]
-        
-        for sec_header in security_headers:
+        for sec_header in self.SECURITY_HEADERS:
             if sec_header in headers:
                 result["security_technologies"].append(sec_header)
     
-    def _detect_from_html(self, html_content: str, result: Dict):
-        """Detect technologies from HTML content."""
-        
-        html_lower = html_content.lower()
-        
-        # Detect frontend frameworks and libraries
-        for tech_name, patterns in self.HTML_SIGNATURES.items():
-            for pattern in patterns:
-                if re.search(pattern, html_lower):
-                    if tech_name in ['WordPress', 'Drupal', 'Joomla']:
-                        result["content_management_system"] = tech_name
-                    elif tech_name in ['React', 'Vue', 'Angular']:
-                        if tech_name not in result["frameworks"]:
-                            result["frameworks"].append(tech_name)
-                    elif tech_name in ['jQuery', 'Bootstrap']:
-                        if tech_name not in result["javascript_libraries"]:
-                            result["javascript_libraries"].append(tech_name)
-                    break
+    def _detect_from_signatures(self, headers: Dict, html_content: str, result: Dict):
+        """Detect technologies matching the signature database."""
+        index = get_signature_index()
+        hits = index.match(headers, html_content)
+        # Signature file order, so precedence doesn't depend on where in the
+        # page each match occurred (a later CMS entry wins, as it always has)
+        for tech_name in index.categories:
+            if tech_name not in hits:
+                continue
+            version = hits[tech_name]
+            if version:
+                result["technology_versions"][tech_name] = version
+            for category in index.categories.get(tech_name, []):
+                if category == 'web_server':
+                    if not result["web_server"]:
+                        result["web_server"] = tech_name
+                elif category == 'cdn':
+                    result["cdn"] = tech_name
+                elif category == 'cms':
+                    result["content_management_system"] = tech_name
+                elif category == 'language':
+                    lang = f'{tech_name} {version}' if version else tech_name
+                    if lang not in result["programming_language"]:
+                        result["programming_language"].append(lang)
+                elif category == 'framework':
+                    if tech_name not in result["frameworks"]:
+                        result["frameworks"].append(tech_name)
+                elif category == 'javascript_library':
+                    if tech_name not in result["javascript_libraries"]:
+                        result["javascript_libraries"].append(tech_name)
         
-        # Detect meta generator tags
-        generator_match = re.search(r'<meta\s+name=["\']generator["\']\s+content=["\']([^"\']+)["\']', html_lower)
-        if generator_match:
-            generator = generator_match.group(1)
-            if 'wordpress' in generator:
-                result["content_management_system"] = 'WordPress'
-            elif 'drupal' in generator:
-                result["content_management_system"] = 'Drupal'
+        # A CMS named by the meta generator tag beats body patterns
+        generator_match = re.search(
+            r'<meta\s+name=["\']generator["\']\s+content=["\']([^"\']+)["\']', html_content, re.IGNORECASE
+        )
+        generator_matcher = index.meta.get('generator')
+        if generator_match and generator_matcher is not None:
+            for tech_name in generator_matcher.scan(generator_match.group(1)):
+                if 'cms' in index.categories.get(tech_name, []):
+                    result["content_management_system"] = tech_name
     
     def _check_version_disclosure(self, result: Dict) -> List[Dict[str, str]]:
         """Check for version disclosure vulnerabilities."""
@@ -0,0 +1,267 @@
+"""
+TLS Capability Probe Matrix
+
+A single default handshake only shows the protocol and cipher the server
+prefers. To learn what else it still accepts, the probe matrix runs a small,
+fixed set of constrained handshakes in parallel: one per protocol version and
+one per cipher family (at TLS 1.2). All probes connect to the address the
+scanner already resolved. Each scan runs at most PROBES_PER_SCAN probes at
+once; every probe gets its own timeout from the moment it starts, and the
+whole matrix runs under one deadline. Probes the deadline cuts short (or that
+never got to run) are reported as not tested, never as a server timeout.
+PASSIVE - standard ClientHellos only; no data is sent after the handshake.
+"""
+
+import socket
+import ssl
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cancellation import CancellationToken
+
+
+# Overall budget for the whole matrix
+DEFAULT_PROBE_DEADLINE_SECONDS = 2.5
+
+# Budget of one probe, counted from when it starts running
+PROBE_TIMEOUT_SECONDS = 1.5
+
+# Probes of one scan running at once (the rest wait their turn)
+PROBES_PER_SCAN = 4
+
+# Probe statuses
+SUPPORTED = "supported"
+NOT_SUPPORTED = "not_supported"
+UNTESTABLE = "untestable"  # The local OpenSSL can't offer it
+TIMEOUT = "timeout"  # The server didn't answer within the probe's own timeout
+NOT_TESTED = "not_tested"  # Cut short by the matrix deadline or cancellation
+ERROR = "error"
+
+PROTOCOL_VERSIONS = {
+    "TLSv1.0": "TLSv1",
+    "TLSv1.1": "TLSv1_1",
+    "TLSv1.2": "TLSv1_2",
+    "TLSv1.3": "TLSv1_3",
+}
+
+# Cipher families probed at TLS 1.2, as OpenSSL cipher strings
+CIPHER_FAMILIES = {
+    "AES-GCM": "AESGCM",
+    "ChaCha20-Poly1305": "CHACHA20",
+    "CBC": "HIGH:!AEAD",
+    "RSA key exchange (no forward secrecy)": "kRSA",
+    "3DES": "3DES",
+    "RC4": "RC4",
+    "NULL/anonymous/export": "NULL:EXPORT:aNULL:eNULL",
+}
+
+# Shared pool: probes are short handshakes bounded by PROBE_TIMEOUT_SECONDS,
+# and PROBES_PER_SCAN keeps one scan from queueing ahead of the others
+PROBE_WORKERS = 32
+
+_probe_executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="tls-probe")
+
+
+def _probe_context(version: str, ciphers: str = "ALL") -> Optional[ssl.SSLContext]:
+    """Context offering only one protocol version and cipher set, or None if unavailable locally."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    # Capability probes only: the certificate is validated by the main handshake
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            tls_version = getattr(ssl.TLSVersion, version)
+            context.minimum_version = tls_version
+            context.maximum_version = tls_version
+        # Security level 0 lets the local OpenSSL offer legacy protocols and ciphers
+        context.set_ciphers(f"{ciphers}:@SECLEVEL=0")
+    except (ValueError, ssl.SSLError):
+        return None
+    return context
+
+
+# (kind, name) -> context, built once
+_contexts: Dict[Tuple[str, str], Optional[ssl.SSLContext]] = {}
+_contexts_lock = threading.Lock()
+
+
+def _probe_contexts() -> Dict[Tuple[str, str], Optional[ssl.SSLContext]]:
+    with _contexts_lock:
+        if not _contexts:
+            for name, version in PROTOCOL_VERSIONS.items():
+                _contexts[("protocols", name)] = _probe_context(version)
+            for name, ciphers in CIPHER_FAMILIES.items():
+                _contexts[("cipher_families", name)] = _probe_context("TLSv1_2", ciphers)
+        return _contexts
+
+
+class TLSProbeMatrix:
+    """Runs the protocol and cipher-family probes against one resolved address."""
+
+    def __init__(
+        self,
+        hostname: str,
+        address: Tuple,
+        family: int = socket.AF_INET,
+        deadline_seconds: float = DEFAULT_PROBE_DEADLINE_SECONDS,
+        cancel_token: Optional[CancellationToken] = None,
+        probe_timeout: float = PROBE_TIMEOUT_SECONDS,
+        concurrency: int = PROBES_PER_SCAN
+    ):
+        """
+        Args:
+            hostname: Server name sent as SNI
+            address: Resolved socket address to connect to (reused by every probe)
+            family: Address family of `address`
+            deadline_seconds: Budget for the whole matrix
+            cancel_token: Aborts in-flight probes when cancelled
+            probe_timeout: Budget of one probe once it is running
+            concurrency: Probes of this matrix running at once
+        """
+        self.hostname = hostname
+        self.address = address
+        self.family = family
+        self.deadline_seconds = deadline_seconds
+        self.cancel_token = cancel_token
+        self.probe_timeout = probe_timeout
+        self.concurrency = max(1, concurrency)
+        self._open_sockets: Set[socket.socket] = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the first probes; the rest follow as they finish, while the caller does other work."""
+        self._started = time.perf_counter()
+        self._deadline = self._started + self.deadline_seconds
+        self._matrix = {"protocols": {}, "cipher_families": {}}
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._queued: List[Tuple[Tuple[str, str], ssl.SSLContext]] = []
+        self._closed = False
+        for key, context in _probe_contexts().items():
+            kind, name = key
+            if context is None:
+                self._matrix[kind][name] = UNTESTABLE
+            else:
+                self._queued.append((key, context))
+        for _ in range(self.concurrency):
+            self._submit_next()
+
+    def _submit_next(self, _finished: Optional[Future] = None):
+        """Submit the next queued probe (also the done-callback of every probe)."""
+        with self._lock:
+            if self._closed or not self._queued:
+                return
+            key, context = self._queued.pop(0)
+            future = _probe_executor.submit(self._probe, context)
+            self._futures[key] = future
+        future.add_done_callback(self._submit_next)
+
+    def collect(self) -> Dict[str, any]:
+        """
+        Wait (until the deadline at most) for the probes started by start().
+
+        Returns:
+            {"protocols": {version: status}, "cipher_families": {family: status},
+             "complete": False if any probe was not tested, "elapsed_ms": ...}
+        """
+        unregister = (
+            self.cancel_token.register(self._abort) if self.cancel_token is not None else (lambda: None)
+        )
+        try:
+            # Probes are submitted as others finish: wait until every probe
+            # has run, the deadline passes or the scan is cancelled
+            while True:
+                with self._lock:
+                    running = [future for future in self._futures.values() if not future.done()]
+                    queued = bool(self._queued)
+                remaining = self._deadline - time.perf_counter()
+                if (not running and not queued) or remaining <= 0:
+                    break
+                if self.cancel_token is not None and self.cancel_token.is_cancelled:
+                    break
+                wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+        finally:
+            unregister()
+        with self._lock:
+            self._closed = True
+            results = {
+                key: future.result() for key, future in self._futures.items() if future.done()
+            }
+        self._abort()
+
+        matrix = self._matrix
+        for kind, name in _probe_contexts():
+            if name not in matrix[kind]:
+                matrix[kind][name] = results.get((kind, name), NOT_TESTED)
+
+        # Report in declaration order
+        protocols = {name: matrix["protocols"][name] for name in PROTOCOL_VERSIONS}
+        cipher_families = {name: matrix["cipher_families"][name] for name in CIPHER_FAMILIES}
+        return {
+            "protocols": protocols,
+            "cipher_families": cipher_families,
+            "complete": NOT_TESTED not in {*protocols.values(), *cipher_families.values()},
+            "elapsed_ms": int((time.perf_counter() - self._started) * 1000),
+        }
+
+    def run(self) -> Dict[str, any]:
+        """Run every probe concurrently and collect the matrix."""
+        self.start()
+        return self.collect()
+
+    def _probe(self, context: ssl.SSLContext) -> str:
+        """One constrained handshake: supported if the server completes it."""
+        started = time.perf_counter()
+        if self._cut_short() or started >= self._deadline:
+            return NOT_TESTED
+        # The probe's own timeout counts from now; the matrix deadline may
+        # still cut it short, which collect() reports as not tested
+        deadline = started + self.probe_timeout
+
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.probe_timeout)
+        # wrap_socket takes over the descriptor; aborting shuts down a duplicate
+        abort_handle = sock.dup()
+        with self._lock:
+            self._open_sockets.add(abort_handle)
+        try:
+            sock.connect(self.address)
+            with context.wrap_socket(sock, server_hostname=self.hostname, do_handshake_on_connect=False) as ssock:
+                ssock.settimeout(max(deadline - time.perf_counter(), 0.01))
+                ssock.do_handshake()
+            return SUPPORTED
+        except OSError as error:
+            if self._cut_short():
+                # Shut down by _abort(): the failure says nothing about the server
+                return NOT_TESTED
+            if isinstance(error, socket.timeout):
+                return TIMEOUT
+            if isinstance(error, ssl.SSLError):
+                # Handshake failure alert or protocol version rejected
+                return NOT_SUPPORTED
+            if isinstance(error, ConnectionResetError):
+                # Some servers drop connections offering only unsupported parameters
+                return NOT_SUPPORTED
+            return ERROR
+        finally:
+            with self._lock:
+                self._open_sockets.discard(abort_handle)
+            abort_handle.close()
+            sock.close()
+
+    def _cut_short(self) -> bool:
+        """True once the matrix was collected or the scan cancelled."""
+        return self._closed or (self.cancel_token is not None and self.cancel_token.is_cancelled)
+
+    def _abort(self):
+        """Shut down every in-flight probe connection."""
+        with self._lock:
+            sockets = list(self._open_sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
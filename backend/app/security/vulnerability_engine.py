@@ -427,6 +427,9 @@ class AdvancedVulnerabilityEngine:
     and actionable remediation guidance.
     """
 
+    # Bump whenever analysis output changes; stored analyses from other versions are recomputed
+    ENGINE_VERSION = "1.0"
+
     def __init__(self):
         self.knowledge = VulnerabilityKnowledge.VULNERABILITIES
         self.waf_signatures = {
@@ -0,0 +1,102 @@
+"""
+Concurrency limits for bulk (portfolio) website scans.
+
+Batch scans fan out over the same scan pipeline as single scans. A global
+cap bounds how many scans run at once across all batches, and a per-host
+cap keeps many URLs on the same host from hammering that one server.
+
+Batches have their own rate limit quota, charged per submitted URL: the
+single-scan limit allows one scan per window, which would make any batch of
+more than one URL impossible, while charging a batch as one scan would let
+one client start BATCH_MAX_URLS scans per window.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.security.rate_limiter import ScanRateLimiter
+
+
+# Maximum URLs accepted in a single batch request
+BATCH_MAX_URLS = 5000
+
+# URLs a client may submit in batches per window (shared across worker processes)
+BATCH_RATE_LIMIT_URLS = BATCH_MAX_URLS
+BATCH_RATE_LIMIT_WINDOW_SECONDS = 24 * 60 * 60
+
+# Scans running at once across every batch
+BATCH_GLOBAL_CONCURRENCY = 8
+
+# Scans running at once against the same host
+BATCH_PER_HOST_CONCURRENCY = 2
+
+
+class HostConcurrencyLimiter:
+    """Global plus per-host concurrency caps for batch scans."""
+
+    def __init__(
+        self,
+        global_limit: int = BATCH_GLOBAL_CONCURRENCY,
+        per_host_limit: int = BATCH_PER_HOST_CONCURRENCY
+    ):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._host_users: Dict[str, int] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Host used for per-host limiting (case-insensitive, port ignored)."""
+        return (urlparse(url).hostname or url).lower()
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one global slot and one slot for the URL's host."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.global_limit)
+
+        host = self.host_key(url)
+        host_semaphore = self._hosts.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+
+        try:
+            # Take the host slot first so a busy host doesn't pin global slots
+            async with host_semaphore:
+                async with self._global:
+                    yield
+        finally:
+            self._host_users[host] -= 1
+            if self._host_users[host] == 0:
+                # Forget idle hosts so the table doesn't grow with every domain ever scanned
+                del self._host_users[host]
+                del self._hosts[host]
+
+
+# Global limiter shared by all batch requests
+_batch_limiter = HostConcurrencyLimiter()
+
+
+def get_batch_limiter() -> HostConcurrencyLimiter:
+    """Get the global batch scan concurrency limiter."""
+    return _batch_limiter
+
+
+# Batch URL quota; keys are prefixed so they never collide with single-scan keys
+_batch_rate_limiter = ScanRateLimiter(
+    limit=BATCH_RATE_LIMIT_URLS,
+    window_seconds=BATCH_RATE_LIMIT_WINDOW_SECONDS
+)
+
+
+def get_batch_rate_limiter() -> ScanRateLimiter:
+    """Get the per-client batch URL quota limiter."""
+    return _batch_rate_limiter
+
+
+def batch_rate_limit_key(client_ip: str) -> str:
+    """Rate limit key of a client's batch quota."""
+    return f"batch:{client_ip}"
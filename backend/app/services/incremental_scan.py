@@ -0,0 +1,277 @@
+"""
+Incremental website rescans.
+
+Before rescanning a URL, cheap change signals are compared with the ones
+stored for its previous WebsiteScan:
+
+- HTTP: a conditional GET (If-None-Match / If-Modified-Since). A 304, or an
+  identical body hash and header digest, means the HTTP headers and
+  technology results still hold.
+- TLS: one handshake. The same leaf certificate fingerprint, protocol and
+  cipher (plus an unchanged HSTS header) means the SSL/TLS result still holds.
+- DNS: the zone's SOA serial. An unchanged serial means unchanged records.
+
+Unchanged components are reused instead of rescanned, and the new scan
+carries a structured delta against the previous one.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.db.models import WebsiteScan
+from app.security.cancellation import CancellationToken
+from app.security.dns_scanner import DNSSecurityScanner
+from app.security.fetch_context import FetchContext, FetchedResponse
+from app.security.scan_timer import ScanTimer
+from app.security.ssl_scanner import SSLTLSScanner
+from app.services.scan_cache import COMPONENT_COLUMNS
+
+
+# Response headers that differ between otherwise identical responses
+VOLATILE_HEADERS = {
+    "date", "age", "expires", "set-cookie", "etag", "last-modified", "content-length",
+    "x-request-id", "x-amzn-requestid", "x-amz-cf-id", "cf-ray", "x-served-by", "x-cache",
+    "x-cache-hits", "x-timer", "via", "server-timing", "report-to", "nel", "transfer-encoding",
+}
+
+# Components whose scanners read the shared page fetch
+FETCH_COMPONENTS = {"http_headers", "technologies", "ssl_tls"}
+
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+
+
+def http_signals(response: FetchedResponse) -> Dict[str, Optional[str]]:
+    """Change signals of a fetched page: validators, body hash and stable-header digest."""
+    stable_headers = sorted(
+        f"{name.lower()}:{value}"
+        for name, value in response.headers.items()
+        if name.lower() not in VOLATILE_HEADERS
+    )
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "body_sha256": hashlib.sha256(response.body).hexdigest(),
+        "headers_sha256": hashlib.sha256("\n".join(stable_headers).encode()).hexdigest(),
+    }
+
+
+def collect_change_signals(
+    scan_results: Dict[str, Dict[str, Any]],
+    fetch_context: FetchContext,
+    previous_signals: Optional[Dict[str, Any]] = None,
+    reused: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Signals to store with a scan so the next incremental rescan can compare.
+
+    HTTP signals come from the scan's fetch; when the HTTP result was reused
+    after a 304 (or the fetch had no body) they are carried over from the
+    previous scan.
+    """
+    previous_signals = previous_signals or {}
+    reused = reused or {}
+
+    response = fetch_context.peek()
+    if response is not None and response.status_code != 304 and not response.headers_only:
+        http = http_signals(response)
+    else:
+        http = previous_signals.get("http") if "http_headers" in reused else None
+
+    ssl_result = scan_results.get("ssl_tls", {})
+    certificate = ssl_result.get("certificate", {})
+    return {
+        "http": http,
+        "tls": {
+            "fingerprint_sha256": certificate.get("fingerprint_sha256"),
+            "tls_version": ssl_result.get("tls_version"),
+            "cipher_suite": ssl_result.get("cipher_suite"),
+        } if certificate.get("fingerprint_sha256") else None,
+        "dns": {
+            "soa_serial": scan_results.get("dns_security", {}).get("soa_serial"),
+        },
+    }
+
+
+class IncrementalScanPlanner:
+    """Decides which components of a previous scan can be reused for a rescan."""
+
+    def __init__(
+        self,
+        url: str,
+        previous_scan: WebsiteScan,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[ScanTimer] = None
+    ):
+        self.url = url
+        self.previous_scan = previous_scan
+        self.cancel_token = cancel_token
+        self.timer = timer or ScanTimer()
+        self.previous_signals: Dict[str, Any] = (
+            json.loads(previous_scan.change_signals_json) if previous_scan.change_signals_json else {}
+        )
+        self.previous_results: Dict[str, Dict[str, Any]] = {
+            component: json.loads(getattr(previous_scan, column) or "{}")
+            for component, column in COMPONENT_COLUMNS.items()
+        }
+
+        validators = {}
+        previous_http = self.previous_signals.get("http") or {}
+        if previous_http.get("etag"):
+            validators["If-None-Match"] = previous_http["etag"]
+        if previous_http.get("last_modified"):
+            validators["If-Modified-Since"] = previous_http["last_modified"]
+
+        # The conditional GET doubles as the scan's shared fetch when the page changed
+        self.fetch_context = FetchContext(
+            url, cancel_token=cancel_token, timer=self.timer, extra_headers=validators
+        )
+        # Component statuses: {component: {"status": ..., "reason": ...}}
+        self.statuses: Dict[str, Dict[str, str]] = {}
+
+    async def plan(self, executor) -> Dict[str, Dict[str, Any]]:
+        """
+        Probe HTTP, TLS and DNS concurrently and decide what to reuse.
+
+        Args:
+            executor: Thread pool for the blocking probes
+
+        Returns:
+            Previous component results that are still valid, keyed by component
+        """
+        loop = asyncio.get_running_loop()
+        http, tls, dns = await asyncio.gather(
+            loop.run_in_executor(executor, self._probe_http),
+            loop.run_in_executor(executor, self._probe_tls),
+            loop.run_in_executor(executor, self._probe_dns),
+        )
+
+        for component in ("http_headers", "technologies"):
+            self.statuses[component] = dict(http)
+        self.statuses["ssl_tls"] = tls
+        self.statuses["dns_security"] = dns
+
+        reusable = {}
+        for component, status in self.statuses.items():
+            previous = self.previous_results.get(component)
+            if status["status"] == UNCHANGED and previous and not previous.get("error"):
+                reusable[component] = previous
+
+        if self._not_modified() and not FETCH_COMPONENTS <= reusable.keys():
+            # A 304 can't be rescanned (or checked for HSTS); scanners need a plain fetch
+            self.fetch_context = FetchContext(self.url, cancel_token=self.cancel_token, timer=self.timer)
+        return reusable
+
+    def _not_modified(self) -> bool:
+        response = self.fetch_context.peek()
+        return response is not None and response.status_code == 304
+
+    def _probe_http(self) -> Dict[str, str]:
+        previous_http = self.previous_signals.get("http")
+        if not previous_http:
+            return {"status": CHANGED, "reason": "No HTTP signals stored for the previous scan"}
+        try:
+            response = self.fetch_context.get()
+        except Exception as e:
+            return {"status": CHANGED, "reason": f"Conditional request failed: {str(e)}"}
+
+        if response.status_code == 304:
+            return {"status": UNCHANGED, "reason": "304 Not Modified"}
+
+        current = http_signals(response)
+        if (current["body_sha256"] == previous_http.get("body_sha256")
+                and current["headers_sha256"] == previous_http.get("headers_sha256")):
+            return {"status": UNCHANGED, "reason": "Identical body hash and response headers"}
+        return {"status": CHANGED, "reason": "Page content or response headers changed"}
+
+    def _probe_tls(self) -> Dict[str, str]:
+        if urlparse(self.url).scheme != "https":
+            return {"status": UNCHANGED, "reason": "Not an HTTPS URL"}
+        previous_tls = self.previous_signals.get("tls")
+        if not previous_tls:
+            return {"status": CHANGED, "reason": "No certificate fingerprint stored for the previous scan"}
+        try:
+            current = SSLTLSScanner(cancel_token=self.cancel_token, timer=self.timer).probe_handshake(self.url)
+        except Exception as e:
+            return {"status": CHANGED, "reason": f"TLS handshake failed: {str(e)}"}
+
+        if current != previous_tls:
+            return {"status": CHANGED, "reason": "Certificate, protocol or cipher changed"}
+
+        # The SSL result also reports HSTS, which comes from the page response
+        try:
+            response = self.fetch_context.get()
+        except Exception:
+            return {"status": CHANGED, "reason": "HSTS header could not be rechecked"}
+        previous_hsts = self.previous_results["ssl_tls"].get("hsts", {}).get("value")
+        # After a 304 the page, HSTS header included, is unchanged
+        if response.status_code != 304 and response.headers.get("Strict-Transport-Security") != previous_hsts:
+            return {"status": CHANGED, "reason": "HSTS header changed"}
+        return {"status": UNCHANGED, "reason": "Same certificate fingerprint, protocol and cipher"}
+
+    def _probe_dns(self) -> Dict[str, str]:
+        previous_serial = (self.previous_signals.get("dns") or {}).get("soa_serial")
+        if previous_serial is None:
+            return {"status": CHANGED, "reason": "No SOA serial stored for the previous scan"}
+        domain = urlparse(self.url).hostname or ""
+        serial = DNSSecurityScanner(cancel_token=self.cancel_token, timer=self.timer).soa_serial(domain)
+        if serial is None:
+            return {"status": CHANGED, "reason": "SOA lookup failed"}
+        if serial != previous_serial:
+            return {"status": CHANGED, "reason": f"SOA serial changed ({previous_serial} -> {serial})"}
+        return {"status": UNCHANGED, "reason": f"Same SOA serial ({serial})"}
+
+
+def _component_issues(component: str, result: Dict[str, Any]) -> List[str]:
+    """Flatten a component result into comparable issue strings."""
+    if not result or result.get("error"):
+        return []
+    if component == "http_headers":
+        return [f"Missing header: {header}" for header in result.get("headers_missing", [])]
+    if component == "technologies":
+        return [vuln.get("description", "") for vuln in result.get("vulnerabilities", [])]
+    return list(result.get("issues", []))
+
+
+def build_scan_delta(
+    previous_scan: WebsiteScan,
+    scan_results: Dict[str, Dict[str, Any]],
+    risk_analysis: Dict[str, Any],
+    statuses: Dict[str, Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    Structured difference between a rescan and the previous scan.
+
+    Returns:
+        Component statuses, risk score and grade change, and issues added
+        or resolved per component
+    """
+    issues = {}
+    for component, column in COMPONENT_COLUMNS.items():
+        before = set(_component_issues(component, json.loads(getattr(previous_scan, column) or "{}")))
+        after = set(_component_issues(component, scan_results.get(component, {})))
+        if before != after:
+            issues[component] = {
+                "added": sorted(after - before),
+                "resolved": sorted(before - after),
+            }
+
+    risk_score = risk_analysis["weighted_risk_score"]
+    return {
+        "previous_scan_id": previous_scan.id,
+        "previous_scanned_at": previous_scan.scanned_at.isoformat(),
+        "components": statuses,
+        "risk_score": {
+            "previous": previous_scan.risk_score,
+            "current": risk_score,
+            "change": risk_score - previous_scan.risk_score,
+        },
+        "overall_grade": {
+            "previous": previous_scan.overall_grade,
+            "current": risk_analysis["overall_grade"],
+        },
+        "issues": issues,
+        "changed": bool(issues) or risk_score != previous_scan.risk_score,
+    }
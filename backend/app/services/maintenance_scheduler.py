@@ -0,0 +1,189 @@
+"""
+Background database maintenance.
+
+A daemon thread periodically enforces the retention policies below with
+batched, indexed deletes, then releases the freed pages with an incremental
+vacuum, so table sizes and query latency stay flat however long the service
+runs. Every run is recorded (rows deleted per table, remaining rows, space
+reclaimed) and exposed via GET /scan-metrics/maintenance.
+
+Running it from several worker processes is harmless: deletes are
+idempotent, and a run finding nothing to delete is a handful of index probes.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
+
+from app.db.database import SessionLocal, engine as default_engine
+from app.db.maintenance import (
+    database_pages,
+    delete_older_than,
+    enable_incremental_vacuum,
+    incremental_vacuum,
+)
+from app.db.models import ScanHistory, ScanProgress, WebsiteScan
+from app.services.progress_tracker import ProgressTracker
+
+
+# ===== RETENTION POLICIES =====
+# Progress rows only matter while a scan runs and shortly after
+PROGRESS_RETENTION_HOURS = 24
+# Email / URL check history
+SCAN_HISTORY_RETENTION_DAYS = 90
+# Stored website scan reports (also the result and incremental rescan cache)
+WEBSITE_SCAN_RETENTION_DAYS = 90
+
+# Time between maintenance runs (seconds)
+MAINTENANCE_INTERVAL_SECONDS = 3600
+
+# Delay before the first run, keeping startup free of maintenance work (seconds)
+MAINTENANCE_INITIAL_DELAY_SECONDS = 60
+
+
+class MaintenanceScheduler:
+    """Runs retention deletes and incremental vacuum on a background thread."""
+
+    def __init__(
+        self,
+        engine: Engine = default_engine,
+        session_factory=SessionLocal,
+        interval_seconds: float = MAINTENANCE_INTERVAL_SECONDS,
+        initial_delay_seconds: float = MAINTENANCE_INITIAL_DELAY_SECONDS,
+        progress_retention_hours: int = PROGRESS_RETENTION_HOURS,
+        scan_history_retention_days: int = SCAN_HISTORY_RETENTION_DAYS,
+        website_scan_retention_days: int = WEBSITE_SCAN_RETENTION_DAYS
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.initial_delay_seconds = initial_delay_seconds
+        self.progress_retention_hours = progress_retention_hours
+        self.scan_history_retention_days = scan_history_retention_days
+        self.website_scan_retention_days = website_scan_retention_days
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # One run at a time (scheduled or on demand)
+        self._run_lock = threading.Lock()
+        self._runs = 0
+        self._last_run: Optional[Dict[str, Any]] = None
+        self._last_error: Optional[str] = None
+        self._next_run_at: Optional[datetime] = None
+
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread, waiting for a run in progress up to timeout."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._next_run_at = None
+
+    def _loop(self):
+        delay = self.initial_delay_seconds
+        while True:
+            self._next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            if self._stop.wait(delay):
+                return
+            try:
+                self.run_once()
+            except Exception as e:
+                # Keep the schedule; the error is reported by status()
+                self._last_error = f"{type(e).__name__}: {e}"
+            delay = self.interval_seconds
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Enforce every retention policy, then vacuum.
+
+        Returns:
+            Report of the run: rows deleted and remaining per table, pages
+            and bytes reclaimed, database size and duration
+        """
+        with self._run_lock:
+            started_at = datetime.utcnow()
+            started = time.perf_counter()
+            pages_before = database_pages(self.engine)
+
+            db = self.session_factory()
+            try:
+                deleted = {
+                    "scan_progress": ProgressTracker(db).cleanup_old_scans(self.progress_retention_hours),
+                    "scan_history": delete_older_than(
+                        db, ScanHistory, ScanHistory.scanned_at,
+                        started_at - timedelta(days=self.scan_history_retention_days)
+                    ),
+                    "website_scans": delete_older_than(
+                        db, WebsiteScan, WebsiteScan.scanned_at,
+                        started_at - timedelta(days=self.website_scan_retention_days)
+                    ),
+                }
+                rows = {
+                    "scan_progress": db.query(func.count(ScanProgress.id)).scalar(),
+                    "scan_history": db.query(func.count(ScanHistory.id)).scalar(),
+                    "website_scans": db.query(func.count(WebsiteScan.id)).scalar(),
+                }
+            finally:
+                db.close()
+
+            # Older databases are converted once; vacuuming is incremental from then on
+            converted = enable_incremental_vacuum(self.engine)
+            pages_released = incremental_vacuum(self.engine)
+            pages_after = database_pages(self.engine)
+            page_size = pages_after["page_size"]
+
+            report = {
+                "started_at": started_at.isoformat(),
+                "duration_ms": int((time.perf_counter() - started) * 1000),
+                "deleted": deleted,
+                "rows": rows,
+                "vacuum": {
+                    "converted_to_incremental": converted,
+                    "pages_released": pages_released,
+                    "bytes_reclaimed": max(
+                        0, pages_before["page_count"] * pages_before["page_size"]
+                        - pages_after["page_count"] * page_size
+                    ),
+                    "free_pages_remaining": pages_after["freelist_count"],
+                },
+                "database_bytes": pages_after["page_count"] * page_size,
+            }
+            self._runs += 1
+            self._last_run = report
+            self._last_error = None
+            return report
+
+    def status(self) -> Dict[str, Any]:
+        """Schedule, retention policies and the report of the last run."""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval_seconds,
+            "next_run_at": self._next_run_at.isoformat() if self._next_run_at else None,
+            "retention": {
+                "scan_progress_hours": self.progress_retention_hours,
+                "scan_history_days": self.scan_history_retention_days,
+                "website_scans_days": self.website_scan_retention_days,
+            },
+            "runs": self._runs,
+            "last_run": self._last_run,
+            "last_error": self._last_error,
+        }
+
+
+# Global scheduler (started with the application)
+_maintenance_scheduler = MaintenanceScheduler()
+
+
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """Get the global database maintenance scheduler."""
+    return _maintenance_scheduler
@@ -0,0 +1,76 @@
+"""
+In-process pub/sub for real-time scan progress events.
+
+ProgressTracker publishes every progress change here; SSE and WebSocket
+clients subscribe per scan_id and receive events as they happen instead of
+polling the scan_progress table.
+"""
+import asyncio
+import threading
+from typing import Dict, List, Tuple
+
+
+def is_terminal_event(event: Dict) -> bool:
+    """True once a scan has completed, failed or been cancelled."""
+    return bool(event.get("is_complete") or event.get("has_error") or event.get("is_cancelled"))
+
+
+class ProgressEventBroker:
+    """
+    Fan-out of progress events to subscribers of each scan.
+
+    Publishing is thread-safe: events are handed to each subscriber's event
+    loop with call_soon_threadsafe. Late subscribers get the current state
+    from ProgressTracker (the live progress store) rather than from here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, scan_id: str, event: Dict):
+        """
+        Deliver an event to every subscriber of the scan.
+
+        Args:
+            scan_id: Scan UUID
+            event: Progress payload (same format as GET /scan-progress)
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(scan_id, []))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                pass
+
+    def subscribe(self, scan_id: str) -> asyncio.Queue:
+        """Register a queue receiving the scan's future events (call from the event loop)."""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(scan_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, scan_id: str, queue: asyncio.Queue):
+        """Remove a subscriber queue."""
+        with self._lock:
+            remaining = [entry for entry in self._subscribers.get(scan_id, []) if entry[1] is not queue]
+            if remaining:
+                self._subscribers[scan_id] = remaining
+            else:
+                self._subscribers.pop(scan_id, None)
+
+    def subscriber_count(self, scan_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(scan_id, []))
+
+
+# Global broker instance
+_progress_broker = ProgressEventBroker()
+
+
+def get_progress_broker() -> ProgressEventBroker:
+    """Get the global progress event broker."""
+    return _progress_broker
@@ -0,0 +1,208 @@
+"""
+Write-behind store for live scan progress.
+
+While a scan runs, its progress lives here: this in-memory state is the
+source of truth for progress reads and pushes, and the scan_progress row
+is only a persisted copy. Stage boundaries mark a scan dirty; dirty scans
+are flushed together - every pending scan in one transaction, at most once
+per flush interval - and completion, errors and cancellation flush right
+away. Concurrent scans no longer take SQLite's single write lock every time
+a progress bar moves.
+
+Another worker process can only cancel a scan by setting the stored
+is_cancelled flag; each flush reads that flag back for the scans it writes,
+in the same transaction, and marks them cancel_requested for their tracker.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import ScanProgress
+
+
+# Minimum time between two non-forced flushes (seconds)
+PROGRESS_FLUSH_INTERVAL_SECONDS = 2.0
+
+# States of scans that stopped updating without finishing (e.g. a lost job) are dropped after this
+STALE_PROGRESS_SECONDS = 3600
+
+
+class ProgressState:
+    """Live progress of one scan (mirrors its scan_progress row)."""
+
+    def __init__(
+        self,
+        scan_id: str,
+        url: str,
+        current_step: str,
+        step_details: Optional[Dict],
+        start_time: datetime,
+        progress_percentage: int = 0,
+        estimated_seconds_remaining: Optional[int] = None
+    ):
+        self.scan_id = scan_id
+        self.url = url
+        self.current_step = current_step
+        self.progress_percentage = progress_percentage
+        self.step_details = step_details
+        self.start_time = start_time
+        self.last_update = start_time
+        self.estimated_seconds_remaining = estimated_seconds_remaining
+        self.is_complete = False
+        self.has_error = False
+        self.error_message: Optional[str] = None
+        self.is_cancelled = False
+        # Set by a flush that found the row cancelled by another worker process
+        self.cancel_requested = False
+        self.stage_timings: Optional[Dict] = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.is_complete or self.has_error or self.is_cancelled
+
+    def row_values(self) -> Dict[str, Any]:
+        """Column values to write to the scan_progress row."""
+        values = {
+            ScanProgress.current_step: self.current_step,
+            ScanProgress.progress_percentage: self.progress_percentage,
+            ScanProgress.step_details: json.dumps(self.step_details),
+            ScanProgress.last_update: self.last_update,
+            ScanProgress.estimated_seconds_remaining: self.estimated_seconds_remaining,
+        }
+        if self.stage_timings is not None:
+            values[ScanProgress.stage_timings_json] = json.dumps(self.stage_timings)
+        # Status flags are only written once final, and a cancellation recorded
+        # directly in the table (by another worker process) is never cleared
+        if self.is_terminal:
+            values[ScanProgress.is_complete] = self.is_complete
+            values[ScanProgress.has_error] = self.has_error
+            values[ScanProgress.error_message] = self.error_message
+            if self.is_cancelled:
+                values[ScanProgress.is_cancelled] = True
+        return values
+
+
+class ProgressStateStore:
+    """Process-wide live progress of running scans, flushed write-behind."""
+
+    def __init__(
+        self,
+        flush_interval: float = PROGRESS_FLUSH_INTERVAL_SECONDS,
+        stale_seconds: float = STALE_PROGRESS_SECONDS
+    ):
+        self.flush_interval = flush_interval
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        # Serializes flushes so an older snapshot never lands after a newer one
+        self._flush_lock = threading.Lock()
+        self._states: Dict[str, ProgressState] = {}
+        self._dirty: Set[str] = set()
+        self._next_flush = 0.0
+
+    def add(self, state: ProgressState):
+        """Start tracking a scan (its row must already exist)."""
+        with self._lock:
+            self._states[state.scan_id] = state
+
+    def get(self, scan_id: str) -> Optional[ProgressState]:
+        with self._lock:
+            return self._states.get(scan_id)
+
+    def update(self, scan_id: str, **changes) -> Optional[ProgressState]:
+        """
+        Apply changes to a tracked scan and mark it for the next flush.
+
+        Returns:
+            The updated state, or None if the scan is not tracked here
+        """
+        with self._lock:
+            state = self._states.get(scan_id)
+            if state is None:
+                return None
+            for name, value in changes.items():
+                setattr(state, name, value)
+            self._dirty.add(scan_id)
+            return state
+
+    def flush(self, db: Session, force: bool = False) -> int:
+        """
+        Write every dirty scan to scan_progress in one transaction.
+
+        Finished scans are forgotten once written; their row is the record
+        from then on. Running scans whose row was flagged cancelled meanwhile
+        are marked cancel_requested.
+
+        Args:
+            db: Session to write with
+            force: Flush even if the last flush was less than flush_interval ago
+
+        Returns:
+            Number of rows written
+        """
+        if not force and time.monotonic() < self._next_flush:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                self._next_flush = time.monotonic() + self.flush_interval
+                pending: List[Tuple[str, Dict[str, Any]]] = [
+                    (scan_id, self._states[scan_id].row_values())
+                    for scan_id in self._dirty if scan_id in self._states
+                ]
+                self._dirty.clear()
+
+            if pending:
+                try:
+                    for scan_id, values in pending:
+                        db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).update(
+                            values, synchronize_session=False
+                        )
+                    cancelled = {
+                        scan_id for (scan_id,) in db.query(ScanProgress.scan_id).filter(
+                            ScanProgress.scan_id.in_([scan_id for scan_id, _ in pending]),
+                            ScanProgress.is_cancelled.is_(True)
+                        )
+                    }
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    with self._lock:
+                        self._dirty.update(scan_id for scan_id, _ in pending)
+                    raise
+                self._request_cancellation(cancelled)
+
+            self._forget_finished()
+        return len(pending)
+
+    def _request_cancellation(self, scan_ids: Set[str]):
+        with self._lock:
+            for scan_id in scan_ids:
+                state = self._states.get(scan_id)
+                if state is not None and not state.is_terminal:
+                    state.cancel_requested = True
+
+    def _forget_finished(self):
+        now = datetime.utcnow()
+        with self._lock:
+            for scan_id, state in list(self._states.items()):
+                if scan_id in self._dirty:
+                    continue
+                if state.is_terminal or (now - state.last_update).total_seconds() > self.stale_seconds:
+                    del self._states[scan_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._states)
+
+
+# Global store instance
+_progress_store = ProgressStateStore()
+
+
+def get_progress_store() -> ProgressStateStore:
+    """Get the global live progress store."""
+    return _progress_store
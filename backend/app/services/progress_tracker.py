@@ -7,7 +7,11 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from sqlalchemy.orm import Session
 
+from app.db.maintenance import delete_older_than
 from app.db.models import ScanProgress
+from app.security.cancellation import get_cancellation_registry
+from app.services.progress_events import get_progress_broker
+from app.services.progress_store import ProgressState, get_progress_store
 
 
 class ProgressTracker:
@@ -26,28 +30,43 @@ class ProgressTracker:
     
     def __init__(self, db: Session):
         self.db = db
+        self.broker = get_progress_broker()
+        self.cancellations = get_cancellation_registry()
+        # Live state of running scans; the scan_progress table is written behind it
+        self.store = get_progress_store()
     
     def create_scan(self, url: str) -> str:
         """Create a new scan progress record."""
         scan_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        step_details = {
+            "completed": [],
+            "current": self.STEPS[1]["substeps"][0] if self.STEPS[1]["substeps"] else None,
+            "remaining": self.STEPS[1]["substeps"][1:] if len(self.STEPS[1]["substeps"]) > 1 else []
+        }
         
         progress = ScanProgress(
             scan_id=scan_id,
             url=url,
             current_step=self.STEPS[1]["name"],
             progress_percentage=0,
-            step_details=json.dumps({
-                "completed": [],
-                "current": self.STEPS[1]["substeps"][0] if self.STEPS[1]["substeps"] else None,
-                "remaining": self.STEPS[1]["substeps"][1:] if len(self.STEPS[1]["substeps"]) > 1 else []
-            }),
-            start_time=datetime.utcnow(),
-            last_update=datetime.utcnow(),
+            step_details=json.dumps(step_details),
+            start_time=now,
+            last_update=now,
             estimated_seconds_remaining=50  # Default estimate
         )
         
         self.db.add(progress)
         self.db.commit()
+        self.store.add(ProgressState(
+            scan_id=scan_id,
+            url=url,
+            current_step=self.STEPS[1]["name"],
+            step_details=step_details,
+            start_time=now,
+            estimated_seconds_remaining=50
+        ))
+        self.cancellations.create(scan_id)
         
         return scan_id
     
@@ -56,21 +75,36 @@ class ProgressTracker:
         scan_id: str, 
         step_number: int, 
         substep_index: int = 0,
-        force_percentage: Optional[int] = None
+        force_percentage: Optional[int] = None,
+        persist: bool = True
     ):
-        """Update scan progress to a specific step and substep."""
-        progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
-        if not progress:
-            return
+        """
+        Update scan progress to a specific step and substep.
         
-        # Check if cancelled
-        if progress.is_cancelled:
-            return
+        Every update changes the in-memory state and is pushed to progress
+        subscribers. Stage boundaries (persist=True) also queue the state for
+        the database, where it is written by the next coalesced flush;
+        in-between updates such as individual stage completions never are.
         
+        A scan cancelled through another worker process (which can only set
+        the stored flag) is cancelled here once a flush has read that flag
+        back; updates themselves never query the database for it.
+        """
         step_info = self.STEPS.get(step_number)
         if not step_info:
             return
         
+        token = self.cancellations.get(scan_id)
+        if token is not None and token.is_cancelled:
+            return
+        
+        state = self.store.get(scan_id) or self._load_state(scan_id)
+        if state is None or state.is_terminal:
+            return
+        if state.cancel_requested:
+            self.cancel_scan(scan_id)
+            return
+        
         # Calculate progress percentage
         start_pct, end_pct = step_info["range"]
         substeps = step_info["substeps"]
@@ -95,63 +129,147 @@ class ProgressTracker:
         }
         
         # Calculate estimated time remaining
-        elapsed = (datetime.utcnow() - progress.start_time).total_seconds()
+        now = datetime.utcnow()
+        elapsed = (now - state.start_time).total_seconds()
         if progress_pct > 0:
             total_estimated = (elapsed / progress_pct) * 100
             time_remaining = max(0, int(total_estimated - elapsed))
         else:
             time_remaining = 50  # Default estimate
         
-        # Update record
-        progress.current_step = step_info["name"]
-        progress.progress_percentage = progress_pct
-        progress.step_details = json.dumps(step_details)
-        progress.last_update = datetime.utcnow()
-        progress.estimated_seconds_remaining = time_remaining
+        changes = dict(
+            current_step=step_info["name"],
+            progress_percentage=progress_pct,
+            step_details=step_details,
+            last_update=now,
+            estimated_seconds_remaining=time_remaining
+        )
+        if persist:
+            self.store.update(scan_id, **changes)
+            self.store.flush(self.db)
+            if state.cancel_requested:
+                self.cancel_scan(scan_id)
+                return
+        else:
+            # Published only: the state changes but is not queued for the database
+            for name, value in changes.items():
+                setattr(state, name, value)
         
-        self.db.commit()
+        self.broker.publish(scan_id, self._state_to_progress(state))
     
     def complete_scan(self, scan_id: str):
-        """Mark scan as complete."""
-        progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
-        if progress:
-            progress.current_step = "Complete"
-            progress.progress_percentage = 100
-            progress.is_complete = True
-            progress.last_update = datetime.utcnow()
-            progress.estimated_seconds_remaining = 0
-            self.db.commit()
+        """Mark scan as complete (unless it was cancelled through another worker meanwhile)."""
+        if self.store.get(scan_id) is not None and self._cancelled_elsewhere(scan_id):
+            self.cancel_scan(scan_id)
+            return
+        self._finish(
+            scan_id,
+            current_step="Complete",
+            progress_percentage=100,
+            is_complete=True,
+            estimated_seconds_remaining=0
+        )
     
     def set_error(self, scan_id: str, error_message: str):
         """Mark scan as failed with error."""
-        progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
-        if progress:
-            progress.has_error = True
-            progress.error_message = error_message
-            progress.last_update = datetime.utcnow()
-            self.db.commit()
+        self._finish(scan_id, has_error=True, error_message=error_message)
     
     def cancel_scan(self, scan_id: str):
-        """Cancel a running scan."""
+        """Cancel a running scan, aborting its in-flight I/O and remaining stages."""
+        if self._finish(scan_id, is_cancelled=True):
+            self.cancellations.cancel(scan_id)
+    
+    def _finish(self, scan_id: str, **changes) -> bool:
+        """
+        Apply a terminal transition and write it through immediately.
+        
+        Returns:
+            True if the scan exists
+        """
+        state = self.store.update(scan_id, last_update=datetime.utcnow(), **changes)
+        if state is not None:
+            # Also writes any other scans' pending stage boundaries in the same transaction
+            self.store.flush(self.db, force=True)
+            self.broker.publish(scan_id, self._state_to_progress(state))
+            return True
+        
+        # Not running in this process (or already finished): update the row directly
         progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
-        if progress:
-            progress.is_cancelled = True
-            progress.last_update = datetime.utcnow()
-            self.db.commit()
+        if not progress:
+            return False
+        if progress.is_cancelled and changes.get("is_complete"):
+            # A scan cancelled meanwhile stays cancelled
+            return True
+        for name, value in changes.items():
+            setattr(progress, name, value)
+        progress.last_update = datetime.utcnow()
+        self.db.commit()
+        self._publish_row(progress)
+        return True
+    
+    def record_stage_timings(self, scan_id: str, timings: Dict[str, Dict]):
+        """Store per-stage status and duration (partial for cancelled scans)."""
+        # Running scans keep them in memory until their final flush
+        if self.store.update(scan_id, stage_timings=timings) is not None:
+            return
+        self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).update(
+            {ScanProgress.stage_timings_json: json.dumps(timings)}, synchronize_session=False
+        )
+        self.db.commit()
     
     def get_progress(self, scan_id: str) -> Optional[Dict]:
-        """Get current progress for a scan."""
+        """Get current progress for a scan (live state while running, else the stored row)."""
+        state = self.store.get(scan_id)
+        if state is not None:
+            return self._state_to_progress(state)
+        
         progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
         if not progress:
             return None
         
-        elapsed = (datetime.utcnow() - progress.start_time).total_seconds()
-        elapsed_str = str(timedelta(seconds=int(elapsed)))[2:]  # Remove days, format as HH:MM:SS
-        
-        remaining_str = None
-        if progress.estimated_seconds_remaining is not None:
-            remaining_str = str(timedelta(seconds=progress.estimated_seconds_remaining))[2:]
-        
+        return self._row_to_progress(progress)
+    
+    def _cancelled_elsewhere(self, scan_id: str) -> bool:
+        """Whether the stored row was flagged cancelled (e.g. by another worker process)."""
+        row = self.db.query(ScanProgress.is_cancelled).filter(ScanProgress.scan_id == scan_id).first()
+        return bool(row and row.is_cancelled)
+    
+    def _load_state(self, scan_id: str) -> Optional[ProgressState]:
+        """Track a scan created elsewhere (e.g. by another worker process) from its row."""
+        progress = self.db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).first()
+        if not progress or progress.is_complete or progress.has_error or progress.is_cancelled:
+            return None
+        state = ProgressState(
+            scan_id=progress.scan_id,
+            url=progress.url,
+            current_step=progress.current_step,
+            step_details=json.loads(progress.step_details) if progress.step_details else None,
+            start_time=progress.start_time,
+            progress_percentage=progress.progress_percentage,
+            estimated_seconds_remaining=progress.estimated_seconds_remaining
+        )
+        self.store.add(state)
+        return state
+    
+    def _state_to_progress(self, state: ProgressState) -> Dict:
+        """Convert a live progress state to the API progress format."""
+        return self._format_progress(
+            scan_id=state.scan_id,
+            url=state.url,
+            current_step=state.current_step,
+            progress_percentage=state.progress_percentage,
+            step_details=state.step_details,
+            start_time=state.start_time,
+            estimated_seconds_remaining=state.estimated_seconds_remaining,
+            is_complete=state.is_complete,
+            has_error=state.has_error,
+            error_message=state.error_message,
+            is_cancelled=state.is_cancelled,
+            stage_timings=state.stage_timings
+        )
+    
+    def _row_to_progress(self, progress: ScanProgress) -> Dict:
+        """Convert a stored scan_progress row to the API progress format."""
         step_details = None
         if progress.step_details:
             try:
@@ -159,22 +277,76 @@ class ProgressTracker:
             except:
                 pass
         
+        stage_timings = None
+        if progress.stage_timings_json:
+            stage_timings = json.loads(progress.stage_timings_json)
+        
+        return self._format_progress(
+            scan_id=progress.scan_id,
+            url=progress.url,
+            current_step=progress.current_step,
+            progress_percentage=progress.progress_percentage,
+            step_details=step_details,
+            start_time=progress.start_time,
+            estimated_seconds_remaining=progress.estimated_seconds_remaining,
+            is_complete=progress.is_complete,
+            has_error=progress.has_error,
+            error_message=progress.error_message,
+            is_cancelled=progress.is_cancelled,
+            stage_timings=stage_timings
+        )
+    
+    def _publish_row(self, progress: ScanProgress):
+        """Publish the state of a stored row (used for terminal transitions)."""
+        self.broker.publish(progress.scan_id, self._row_to_progress(progress))
+    
+    @staticmethod
+    def _format_progress(
+        scan_id: str,
+        url: str,
+        current_step: str,
+        progress_percentage: int,
+        step_details: Optional[Dict],
+        start_time: datetime,
+        estimated_seconds_remaining: Optional[int],
+        is_complete: bool = False,
+        has_error: bool = False,
+        error_message: Optional[str] = None,
+        is_cancelled: bool = False,
+        stage_timings: Optional[Dict] = None
+    ) -> Dict:
+        """Build the progress payload shared by polling, SSE and WebSocket clients."""
+        elapsed = (datetime.utcnow() - start_time).total_seconds()
+        elapsed_str = str(timedelta(seconds=int(elapsed)))[2:]  # Remove days, format as HH:MM:SS
+        
+        remaining_str = None
+        if estimated_seconds_remaining is not None:
+            remaining_str = str(timedelta(seconds=estimated_seconds_remaining))[2:]
+        
         return {
-            "scan_id": progress.scan_id,
-            "url": progress.url,
-            "current_step": progress.current_step,
-            "progress_percentage": progress.progress_percentage,
+            "scan_id": scan_id,
+            "url": url,
+            "current_step": current_step,
+            "progress_percentage": progress_percentage,
             "step_details": step_details,
             "time_elapsed": elapsed_str,
             "estimated_remaining": remaining_str,
-            "is_complete": progress.is_complete,
-            "has_error": progress.has_error,
-            "error_message": progress.error_message,
-            "is_cancelled": progress.is_cancelled
+            "is_complete": bool(is_complete),
+            "has_error": bool(has_error),
+            "error_message": error_message,
+            "is_cancelled": bool(is_cancelled),
+            "stage_timings": stage_timings
         }
     
-    def cleanup_old_scans(self, hours: int = 24):
-        """Clean up progress records older than specified hours."""
+    def cleanup_old_scans(self, hours: int = 24) -> int:
+        """
+        Clean up progress records older than specified hours.
+        
+        Deletes in small batches (indexed on start_time) so running scans are
+        not blocked behind one long delete.
+        
+        Returns:
+            Number of records deleted
+        """
         cutoff = datetime.utcnow() - timedelta(hours=hours)
-        self.db.query(ScanProgress).filter(ScanProgress.start_time < cutoff).delete()
-        self.db.commit()
+        return delete_older_than(self.db, ScanProgress, ScanProgress.start_time, cutoff)
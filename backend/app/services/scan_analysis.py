@@ -0,0 +1,93 @@
+"""
+Persisted, versioned scan analysis.
+
+Risk analysis, OWASP assessment and vulnerability analysis are derived from
+the four component results. They are stored with each WebsiteScan together
+with the version of the engines that produced them, so reports and scan
+details read them directly. A stored analysis is recomputed (and stored
+again) only when an engine version changes; the scan's risk score, risk
+level and grade columns are updated with it, so history and statistics
+agree with the report.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import WebsiteScan
+from app.security.owasp_assessor import OWASPAssessor
+from app.security.risk_scorer import RiskScorer
+from app.security.vulnerability_engine import AdvancedVulnerabilityEngine
+from app.services.scan_cache import COMPONENT_COLUMNS
+from app.services.scan_pipeline import ANALYSIS_STAGES, SCAN_COMPONENTS
+
+
+# Maps analysis stages to the WebsiteScan column holding their JSON
+ANALYSIS_COLUMNS = {
+    "risk_analysis": "risk_analysis_json",
+    "owasp_assessment": "owasp_assessment_json",
+    "vulnerability_analysis": "vulnerability_analysis_json",
+}
+
+
+def analysis_engine_version() -> str:
+    """Combined version of every analysis engine, e.g. "risk-1.0+owasp-1.0+vuln-1.0"."""
+    return (
+        f"risk-{RiskScorer.ENGINE_VERSION}"
+        f"+owasp-{OWASPAssessor.ENGINE_VERSION}"
+        f"+vuln-{AdvancedVulnerabilityEngine.ENGINE_VERSION}"
+    )
+
+
+def run_analysis(scan_results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Run every analysis stage of the scan pipeline over the component results."""
+    inputs = {component: scan_results.get(component, {}) for component in SCAN_COMPONENTS}
+    return {name: analyze(inputs) for name, analyze in ANALYSIS_STAGES.items()}
+
+
+def stored_analysis(scan: WebsiteScan) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Stored analysis of a scan, or None if missing or produced by other engine versions."""
+    if scan.analysis_engine_version != analysis_engine_version():
+        return None
+    if any(not getattr(scan, column) for column in ANALYSIS_COLUMNS.values()):
+        return None
+    return {name: json.loads(getattr(scan, column)) for name, column in ANALYSIS_COLUMNS.items()}
+
+
+def store_analysis(scan: WebsiteScan, analysis: Dict[str, Dict[str, Any]]):
+    """
+    Attach analysis results and the current engine version to a scan (caller commits).
+
+    Also sets the risk summary columns derived from the risk analysis.
+    """
+    for name, column in ANALYSIS_COLUMNS.items():
+        setattr(scan, column, json.dumps(analysis[name]))
+    risk_analysis = analysis["risk_analysis"]
+    scan.risk_score = risk_analysis["weighted_risk_score"]
+    scan.risk_level = risk_analysis["overall_risk_level"]
+    scan.overall_grade = risk_analysis["overall_grade"]
+    scan.analysis_engine_version = analysis_engine_version()
+
+
+def load_scan_analysis(db: Session, scan: WebsiteScan) -> Dict[str, Dict[str, Any]]:
+    """
+    Analysis of a stored scan, recomputed only if the engine version changed.
+
+    Args:
+        db: Database session (a recomputed analysis and the updated risk
+            columns are committed together)
+        scan: Stored WebsiteScan
+
+    Returns:
+        Dict with risk_analysis, owasp_assessment and vulnerability_analysis
+    """
+    analysis = stored_analysis(scan)
+    if analysis is None:
+        scan_results = {
+            component: json.loads(getattr(scan, column)) if getattr(scan, column) else {}
+            for component, column in COMPONENT_COLUMNS.items()
+        }
+        analysis = run_analysis(scan_results)
+        store_analysis(scan, analysis)
+        db.commit()
+    return analysis
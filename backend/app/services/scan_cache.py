@@ -0,0 +1,188 @@
+"""
+Freshness-aware website scan result cache.
+
+Looks up the most recent stored WebsiteScan for a normalized URL and decides,
+component by component, which results are still fresh enough to reuse:
+
+- HTTP headers and technology results expire after a fixed TTL
+- DNS results expire with the shortest record TTL seen during the scan
+- SSL/TLS results expire no later than the certificate's notAfter date
+- Failed components are never reused
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy.orm import Session
+
+from app.db.models import WebsiteScan
+
+
+# Default freshness window (seconds) when the caller doesn't pass max_age
+SCAN_CACHE_MAX_AGE = 600
+
+# Upper bound on how long each component may be reused (seconds)
+COMPONENT_TTLS = {
+    "http_headers": 900,
+    "technologies": 3600,
+    "dns_security": 3600,
+    "ssl_tls": 86400,
+}
+
+# Maps scan components to the WebsiteScan column holding their JSON
+COMPONENT_COLUMNS = {
+    "http_headers": "http_scan_json",
+    "ssl_tls": "ssl_scan_json",
+    "dns_security": "dns_scan_json",
+    "technologies": "tech_scan_json",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_scan_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings share one cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and
+    trailing slashes, and sorts query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def component_expiry(component: str, result: Dict[str, Any], scanned_at: datetime) -> datetime:
+    """
+    Compute until when a component result may be served from cache.
+
+    Args:
+        component: Scan component key (http_headers, ssl_tls, dns_security, technologies)
+        result: The component's scan result
+        scanned_at: When the result was produced
+
+    Returns:
+        Expiry timestamp (equal to scanned_at for results that must not be reused)
+    """
+    if not result or result.get("error"):
+        return scanned_at
+
+    expires_at = scanned_at + timedelta(seconds=COMPONENT_TTLS.get(component, 0))
+
+    if component == "dns_security" and result.get("min_ttl") is not None:
+        expires_at = min(expires_at, scanned_at + timedelta(seconds=result["min_ttl"]))
+
+    if component == "ssl_tls":
+        valid_until = result.get("certificate", {}).get("valid_until")
+        if valid_until:
+            try:
+                expires_at = min(expires_at, datetime.fromisoformat(valid_until))
+            except ValueError:
+                pass
+
+    return expires_at
+
+
+def component_expiries(scan_results: Dict[str, Dict[str, Any]], scanned_at: datetime) -> Dict[str, str]:
+    """Expiry timestamps (ISO format) for every component of a scan."""
+    return {
+        component: component_expiry(component, scan_results.get(component, {}), scanned_at).isoformat()
+        for component in COMPONENT_COLUMNS
+    }
+
+
+class ScanResultCache:
+    """Serves fresh scan components from previously stored WebsiteScan rows."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def latest_scan(self, url: str) -> Optional[WebsiteScan]:
+        """Most recent stored scan of the normalized URL."""
+        return (
+            self.db.query(WebsiteScan)
+            .filter(WebsiteScan.normalized_url == normalize_scan_url(url))
+            .order_by(WebsiteScan.scanned_at.desc())
+            .first()
+        )
+
+    def lookup(
+        self,
+        url: str,
+        max_age: Optional[int] = None
+    ) -> Tuple[Optional[WebsiteScan], Dict[str, Dict[str, Any]]]:
+        """
+        Find reusable component results for a URL.
+
+        Args:
+            url: Target URL
+            max_age: Maximum acceptable age in seconds (None for the default
+                window; 0 forces a full rescan). It only narrows reuse: a
+                component is never served past its own expiry, so the
+                effective limit is min(max_age, component expiry).
+
+        Returns:
+            Tuple of (cached WebsiteScan or None, dict of reusable component results)
+        """
+        if max_age is not None and max_age <= 0:
+            return None, {}
+
+        scan = self.latest_scan(url)
+        if scan is None:
+            return None, {}
+
+        now = datetime.utcnow()
+        age = (now - scan.scanned_at).total_seconds()
+        if age > (max_age if max_age is not None else SCAN_CACHE_MAX_AGE):
+            return None, {}
+
+        expiries = {}
+        if scan.component_expires_json:
+            try:
+                expiries = json.loads(scan.component_expires_json)
+            except ValueError:
+                pass
+
+        fresh = {}
+        for component, column in COMPONENT_COLUMNS.items():
+            raw = getattr(scan, column)
+            if not raw or component not in expiries:
+                continue
+            result = json.loads(raw)
+            if result.get("error"):
+                continue
+            if datetime.fromisoformat(expiries[component]) <= now:
+                continue
+            fresh[component] = result
+
+        return scan, fresh
+
+    def expiries(
+        self,
+        scan_results: Dict[str, Dict[str, Any]],
+        cached_scan: Optional[WebsiteScan],
+        reused: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Expiry timestamps to store with a new scan.
+
+        Reused components keep the expiry of the scan they came from, so
+        carrying a result forward never extends its freshness.
+        """
+        expires = component_expiries(scan_results, datetime.utcnow())
+        if cached_scan is not None and reused and cached_scan.component_expires_json:
+            previous = json.loads(cached_scan.component_expires_json)
+            for component in reused:
+                if component in previous:
+                    expires[component] = previous[component]
+        return expires
@@ -0,0 +1,208 @@
+"""
+Asynchronous website scan job queue.
+
+Scan submissions are queued and executed by a bounded pool of worker tasks,
+so a burst of requests waits in the queue instead of holding open one HTTP
+connection per scan. When the queue is full new submissions are rejected
+immediately (backpressure) rather than piling up. A cancelled scan frees
+its worker as soon as the pipeline notices the cancellation.
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.security.cancellation import ScanCancelledError
+
+
+# Number of scans executed concurrently by the worker pool
+SCAN_JOB_WORKERS = 4
+
+# Maximum number of scans waiting for a worker before submissions are rejected
+SCAN_JOB_QUEUE_SIZE = 50
+
+# Finished jobs kept in memory for status/result lookups
+SCAN_JOB_RETENTION = 500
+
+
+class QueueFullError(Exception):
+    """Raised when the scan queue cannot accept more jobs."""
+
+
+class ScanJob:
+    """State of a single queued website scan."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, scan_id: str, url: str):
+        self.scan_id = scan_id
+        self.url = url
+        self.status = self.QUEUED
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Any = None
+        self.error_message: Optional[str] = None
+        self.error_status_code: Optional[int] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED, self.CANCELLED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scan_id": self.scan_id,
+            "url": self.url,
+            "status": self.status,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error_message": self.error_message,
+        }
+
+
+class ScanJobQueue:
+    """Bounded FIFO queue of scan jobs served by a fixed worker pool."""
+
+    def __init__(
+        self,
+        workers: int = SCAN_JOB_WORKERS,
+        max_queue: int = SCAN_JOB_QUEUE_SIZE,
+        retention: int = SCAN_JOB_RETENTION
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_tasks = []
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._busy_workers = 0
+        self._stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def _ensure_started(self):
+        """Start the worker pool on the running event loop (lazily, on first submit)."""
+        loop = asyncio.get_running_loop()
+        if self._queue is not None and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker_tasks = []
+        for index in range(self.workers):
+            task = asyncio.ensure_future(self._worker())
+            task.set_name(f"scan-job-worker-{index}")
+            self._worker_tasks.append(task)
+
+    def check_capacity(self):
+        """
+        Reject early when the queue is full, before any scan state is created.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        if self.queue_depth() >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise QueueFullError(
+                f"Scan queue is full ({self.max_queue} scans waiting). Please retry shortly."
+            )
+
+    def submit(self, scan_id: str, url: str, run: Callable[[], Awaitable[Any]]) -> ScanJob:
+        """
+        Queue a scan for execution.
+
+        Args:
+            scan_id: Progress tracking UUID of the scan
+            url: Target URL (for status reporting)
+            run: Coroutine factory executing the scan and returning its result
+
+        Returns:
+            The queued ScanJob
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._ensure_started()
+
+        job = ScanJob(scan_id, url)
+        try:
+            self._queue.put_nowait((job, run))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            raise QueueFullError(
+                f"Scan queue is full ({self.max_queue} scans waiting). Please retry shortly."
+            )
+
+        self._stats["accepted"] += 1
+        self._jobs[scan_id] = job
+        self._evict_finished()
+        return job
+
+    def get(self, scan_id: str) -> Optional[ScanJob]:
+        """Look up a job by its scan ID."""
+        return self._jobs.get(scan_id)
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def estimated_wait_seconds(self, average_scan_seconds: int = 20) -> int:
+        """Rough wait estimate for a newly submitted job."""
+        return int((self.queue_depth() / max(self.workers, 1) + 1) * average_scan_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, worker utilisation and lifetime counters."""
+        return {
+            "workers": self.workers,
+            "busy_workers": self._busy_workers,
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "accepting": self.queue_depth() < self.max_queue,
+            "tracked_jobs": len(self._jobs),
+            **self._stats,
+        }
+
+    async def _worker(self):
+        while True:
+            job, run = await self._queue.get()
+            job.status = ScanJob.RUNNING
+            job.started_at = datetime.utcnow()
+            self._busy_workers += 1
+            try:
+                job.result = await run()
+                job.status = ScanJob.COMPLETED
+                self._stats["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except ScanCancelledError as e:
+                job.status = ScanJob.CANCELLED
+                job.error_status_code = 409
+                job.error_message = str(e)
+                self._stats["cancelled"] += 1
+            except Exception as e:
+                job.status = ScanJob.FAILED
+                job.error_status_code = getattr(e, "status_code", 500)
+                job.error_message = str(getattr(e, "detail", None) or e)
+                self._stats["failed"] += 1
+            finally:
+                job.finished_at = datetime.utcnow()
+                self._busy_workers -= 1
+                self._queue.task_done()
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs beyond the retention limit."""
+        finished = [scan_id for scan_id, job in self._jobs.items() if job.is_finished]
+        for scan_id in finished[:max(0, len(finished) - self.retention)]:
+            del self._jobs[scan_id]
+
+
+# Global queue instance
+_scan_job_queue = ScanJobQueue()
+
+
+def get_scan_job_queue() -> ScanJobQueue:
+    """Get the global scan job queue."""
+    return _scan_job_queue
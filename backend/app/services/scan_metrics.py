@@ -0,0 +1,131 @@
+"""
+Website scan latency metrics.
+
+Every completed scan contributes its timing breakdown (stage durations plus
+network sub-steps such as TLS handshake, HTTP TTFB and each DNS lookup) to
+in-process latency histograms, so slow stages and regressions show up
+without digging through individual scans.
+"""
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.security.scan_timer import ScanTimer
+
+
+# Histogram bucket upper bounds in milliseconds (a final +Inf bucket is implied)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def build_timing_breakdown(
+    stage_timings: Dict[str, Dict[str, Any]],
+    timer: ScanTimer,
+    total_ms: int,
+    reused_components: Iterable[str] = ()
+) -> Dict[str, int]:
+    """
+    Flatten a scan's timings into {span: milliseconds}.
+
+    Args:
+        stage_timings: StageScheduler.timings of the scan
+        timer: ScanTimer the scanners recorded their sub-steps into
+        total_ms: Wall-clock duration of the whole scan
+        reused_components: Components served from cache (not timed)
+
+    Returns:
+        Breakdown such as {"stage.ssl_tls": 412, "tls.handshake": 180, "total": 1530}
+    """
+    reused = set(reused_components)
+    breakdown = {
+        f"stage.{name}": timing["duration_ms"]
+        for name, timing in stage_timings.items()
+        if timing.get("duration_ms") is not None and name not in reused
+    }
+    breakdown.update(timer.as_dict())
+    breakdown["total"] = total_ms
+    return breakdown
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram for one span."""
+
+    def __init__(self, buckets: Iterable[int] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0
+        self.max_ms = 0
+
+    def observe(self, duration_ms: int):
+        self.counts[bisect.bisect_left(self.buckets, duration_ms)] += 1
+        self.count += 1
+        self.sum_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction: float) -> Optional[int]:
+        """Upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = []
+        seen = 0
+        for count in self.counts:
+            seen += count
+            cumulative.append(seen)
+        return {
+            "count": self.count,
+            "sum_ms": self.sum_ms,
+            "mean_ms": round(self.sum_ms / self.count, 1) if self.count else None,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class ScanLatencyMetrics:
+    """Latency histograms of every span seen in scan timing breakdowns."""
+
+    def __init__(self, buckets: Iterable[int] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.scans_observed = 0
+
+    def observe(self, breakdown: Dict[str, int]):
+        """Add one scan's timing breakdown to the histograms."""
+        with self._lock:
+            self.scans_observed += 1
+            for name, duration_ms in breakdown.items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = LatencyHistogram(self.buckets)
+                histogram.observe(duration_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms of every span, with bucket bounds and percentile estimates."""
+        with self._lock:
+            spans: List[str] = sorted(self._histograms)
+            return {
+                "scans_observed": self.scans_observed,
+                "bucket_bounds_ms": list(self.buckets) + ["+Inf"],
+                "spans": {name: self._histograms[name].to_dict() for name in spans},
+            }
+
+
+# Global metrics instance
+_scan_latency_metrics = ScanLatencyMetrics()
+
+
+def get_scan_latency_metrics() -> ScanLatencyMetrics:
+    """Get the global scan latency metrics."""
+    return _scan_latency_metrics
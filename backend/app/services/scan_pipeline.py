@@ -0,0 +1,354 @@
+"""
+Concurrent stage scheduler for website security scans.
+
+The scan pipeline is declared as a dependency graph of stages. Stages whose
+inputs are ready run concurrently on a bounded thread pool, so the blocking
+network I/O done by the passive scanners never stalls the event loop and a
+scan takes roughly as long as its slowest stage instead of the sum of all.
+
+A scan can be cancelled cooperatively: stages not yet started are skipped,
+in-flight scanner I/O is aborted through the CancellationToken, and the
+scheduler returns at once instead of waiting for running stages to time out.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.security.cancellation import CancellationToken, ScanCancelledError
+from app.security.fetch_context import FetchContext
+from app.security.scan_timer import ScanTimer
+from app.security.http_scanner import HTTPSecurityScanner
+from app.security.ssl_scanner import SSLTLSScanner
+from app.security.dns_scanner import DNSSecurityScanner
+from app.security.tech_detector import TechnologyDetector
+from app.security.owasp_assessor import OWASPAssessor
+from app.security.risk_scorer import RiskScorer
+from app.security.vulnerability_engine import AdvancedVulnerabilityEngine
+
+
+# Upper bound on blocking stage functions running at once across all scans
+SCAN_STAGE_WORKERS = 16
+
+# Scanner stages whose results feed the analysis stages
+SCAN_COMPONENTS = ("http_headers", "ssl_tls", "dns_security", "technologies")
+
+_stage_executor = ThreadPoolExecutor(
+    max_workers=SCAN_STAGE_WORKERS,
+    thread_name_prefix="scan-stage",
+)
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used to run blocking scan stages."""
+    return _stage_executor
+
+
+class ScanStage:
+    """A single node in the scan dependency graph."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        progress_step: Optional[int] = None,
+        error_label: Optional[str] = None
+    ):
+        """
+        Args:
+            name: Unique stage name, also the key of its result
+            func: Blocking callable receiving a dict of its dependencies' results
+            depends_on: Names of stages that must finish before this one starts
+            progress_step: ProgressTracker step this stage reports under
+            error_label: If set, failures become {"error": ...} results instead
+                of aborting the scan
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.progress_step = progress_step
+        self.error_label = error_label
+
+
+class StageScheduler:
+    """
+    Runs a DAG of scan stages with maximum concurrency.
+
+    Each stage starts as soon as all of its dependencies have finished and
+    runs in the shared stage executor, off the event loop.
+
+    After run() returns or raises, `timings` maps each stage name to its
+    status (completed, failed, cancelled or skipped) and duration_ms.
+    """
+
+    # Stage statuses recorded in `timings`
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped"
+
+    def __init__(self, stages: List[ScanStage], executor: Optional[ThreadPoolExecutor] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names in scan pipeline")
+        self.order = self._topological_order()
+        self.executor = executor or get_stage_executor()
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def _topological_order(self) -> List[str]:
+        """Order stages so every stage comes after its dependencies (Kahn's algorithm)."""
+        remaining = {}
+        for name, stage in self.stages.items():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+            remaining[name] = set(stage.depends_on)
+
+        order = []
+        ready = [name for name, deps in remaining.items() if not deps]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other, deps in remaining.items():
+                if name in deps:
+                    deps.discard(name)
+                    if not deps:
+                        ready.append(other)
+
+        if len(order) != len(self.stages):
+            raise ValueError("Scan pipeline contains a dependency cycle")
+        return order
+
+    async def run(
+        self,
+        on_stage_complete: Optional[Callable[[ScanStage, Any], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute every stage, honouring dependencies.
+
+        Args:
+            on_stage_complete: Called on the event loop after each stage finishes
+            cancel_token: Aborts the run when cancelled
+
+        Returns:
+            Dictionary mapping stage name to its result
+
+        Raises:
+            ScanCancelledError: If the token was cancelled before all stages finished
+        """
+        loop = asyncio.get_running_loop()
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Future] = {}
+        started: Dict[str, float] = {}
+        self.timings = {}
+
+        def record(name: str, status: str):
+            duration_ms = int((time.perf_counter() - started[name]) * 1000) if name in started else None
+            self.timings[name] = {"status": status, "duration_ms": duration_ms}
+
+        async def run_stage(stage: ScanStage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            inputs = {dep: results[dep] for dep in stage.depends_on}
+
+            started[stage.name] = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self.executor, stage.func, inputs)
+            except Exception as e:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    raise ScanCancelledError("Scan was cancelled") from e
+                if stage.error_label is None:
+                    record(stage.name, self.FAILED)
+                    raise
+                result = {"error": f"{stage.error_label} failed: {str(e)}"}
+
+            record(stage.name, self.FAILED if isinstance(result, dict) and result.get("error") else self.COMPLETED)
+            results[stage.name] = result
+            if on_stage_complete:
+                on_stage_complete(stage, result)
+
+        for name in self.order:
+            tasks[name] = asyncio.ensure_future(run_stage(self.stages[name]))
+        all_done = asyncio.gather(*tasks.values())
+
+        # Wake up as soon as the token is cancelled, even while stages are blocked on I/O
+        cancelled = loop.create_future()
+        unregister = lambda: None
+        if cancel_token is not None:
+            unregister = cancel_token.register(
+                lambda: loop.call_soon_threadsafe(_resolve_future, cancelled)
+            )
+
+        try:
+            await asyncio.wait({all_done, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+            if cancel_token is not None and cancel_token.is_cancelled:
+                raise ScanCancelledError("Scan was cancelled")
+            await all_done
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Executor threads can't be interrupted; their results are discarded
+            await asyncio.gather(all_done, return_exceptions=True)
+            for name in self.order:
+                if name not in self.timings:
+                    record(name, self.CANCELLED if name in started else self.SKIPPED)
+            raise
+        finally:
+            unregister()
+            cancelled.cancel()
+
+        return results
+
+
+def _resolve_future(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class StageProgress:
+    """
+    Maps stage completions onto ProgressTracker percentages.
+
+    Stages finish in any order, so each completed stage adds its share of its
+    step's percentage range; the reported percentage only ever grows.
+    """
+
+    def __init__(self, tracker, scan_id: str, stages: List[ScanStage]):
+        self.tracker = tracker
+        self.scan_id = scan_id
+        self.percentage = tracker.STEPS[1]["range"][1]
+
+        stages_per_step: Dict[int, int] = {}
+        for stage in stages:
+            if stage.progress_step is not None:
+                stages_per_step[stage.progress_step] = stages_per_step.get(stage.progress_step, 0) + 1
+        self._weights = {}
+        for stage in stages:
+            if stage.progress_step is not None:
+                start_pct, end_pct = tracker.STEPS[stage.progress_step]["range"]
+                self._weights[stage.name] = (end_pct - start_pct) / stages_per_step[stage.progress_step]
+
+    def __call__(self, stage: ScanStage, result: Any):
+        if stage.name not in self._weights:
+            return
+        self.percentage += self._weights[stage.name]
+        substeps = self.tracker.STEPS[stage.progress_step]["substeps"]
+        self.tracker.update_progress(
+            self.scan_id,
+            stage.progress_step,
+            len(substeps) - 1,
+            force_percentage=int(self.percentage),
+            persist=False
+        )
+
+
+# ===== ANALYSIS STAGES =====
+# Each takes the four component results keyed by SCAN_COMPONENTS
+
+def risk_stage(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return RiskScorer().calculate_risk(inputs)
+
+
+def owasp_stage(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return OWASPAssessor().assess(
+        inputs["http_headers"],
+        inputs["ssl_tls"],
+        inputs["dns_security"],
+        inputs["technologies"]
+    )
+
+
+def vulnerability_stage(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return AdvancedVulnerabilityEngine().analyze(
+        inputs["http_headers"],
+        inputs["ssl_tls"],
+        inputs["dns_security"],
+        inputs["technologies"]
+    )
+
+
+ANALYSIS_STAGES = {
+    "risk_analysis": risk_stage,
+    "owasp_assessment": owasp_stage,
+    "vulnerability_analysis": vulnerability_stage,
+}
+
+
+def create_fetch_context(
+    url: str,
+    cached_components: Optional[Dict[str, Dict[str, Any]]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    timer: Optional[ScanTimer] = None
+) -> FetchContext:
+    """
+    Shared page fetch for one scan.
+
+    The technology detector is the only consumer of the page body; when its
+    result is reused, the HTTP header and HSTS checks only need the headers.
+    """
+    return FetchContext(
+        url, cancel_token=cancel_token, timer=timer,
+        headers_only="technologies" in (cached_components or {})
+    )
+
+
+def build_website_scan_stages(
+    url: str,
+    cached_components: Optional[Dict[str, Dict[str, Any]]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    timer: Optional[ScanTimer] = None,
+    fetch_context: Optional[FetchContext] = None,
+    cached_analysis: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[ScanStage]:
+    """
+    Declare the website scan pipeline as a dependency graph.
+
+    The four passive scanners are independent of each other; risk scoring,
+    OWASP mapping and vulnerability analysis each need all four results.
+    The HTTP, technology and HSTS checks share one fetch of the target.
+
+    Args:
+        url: Target URL
+        cached_components: Fresh component results to reuse instead of rescanning
+        cancel_token: Aborts in-flight HTTP, TLS and DNS I/O when cancelled
+        timer: Receives network sub-step timings from the scanners
+        fetch_context: Shared page fetch (created if not given)
+        cached_analysis: Stored analysis results still valid for the (fully reused) components
+    """
+    fetch_context = fetch_context or create_fetch_context(url, cached_components, cancel_token, timer)
+    cached_components = cached_components or {}
+    cached_analysis = cached_analysis or {}
+
+    def scanner(component: str, scan: Callable[[], Dict[str, Any]]) -> Callable[[Dict[str, Any]], Any]:
+        if component in cached_components:
+            return lambda _: cached_components[component]
+        return lambda _: scan()
+
+    def analyzer(name: str, analyze: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        if name in cached_analysis:
+            return lambda _: cached_analysis[name]
+        return analyze
+
+    def ssl_scan() -> Dict[str, Any]:
+        return SSLTLSScanner(cancel_token=cancel_token, timer=timer).scan(url, fetch_context)
+
+    def dns_scan() -> Dict[str, Any]:
+        return DNSSecurityScanner(cancel_token=cancel_token, timer=timer).scan(url)
+
+    return [
+        ScanStage("http_headers", scanner("http_headers", lambda: HTTPSecurityScanner().scan(url, fetch_context)),
+                  progress_step=2, error_label="HTTP scan"),
+        ScanStage("ssl_tls", scanner("ssl_tls", ssl_scan),
+                  progress_step=3, error_label="SSL scan"),
+        ScanStage("dns_security", scanner("dns_security", dns_scan),
+                  progress_step=4, error_label="DNS scan"),
+        ScanStage("technologies", scanner("technologies", lambda: TechnologyDetector().scan(url, fetch_context)),
+                  progress_step=5, error_label="Tech detection"),
+    ] + [
+        ScanStage(name, analyzer(name, analyze), depends_on=SCAN_COMPONENTS, progress_step=6)
+        for name, analyze in ANALYSIS_STAGES.items()
+    ]
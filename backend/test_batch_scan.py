@@ -0,0 +1,168 @@
+"""
+Tests for bulk (portfolio) website scans: concurrency caps, the per-URL
+batch quota and cancellation of abandoned batches
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.api import website_scanner
+from app.api.schemas import BatchScanRequest
+from app.db.database import Base
+from app.db.models import ScanProgress
+from app.security.rate_limiter import ScanRateLimiter
+from app.services import progress_tracker
+from app.services.batch_scanner import HostConcurrencyLimiter
+from app.services.progress_store import ProgressStateStore
+
+
+def batch_request(urls):
+    return BatchScanRequest(
+        urls=urls,
+        confirmed_permission=True,
+        owner_confirmation=True,
+        legal_responsibility=True
+    )
+
+
+def client(ip="203.0.113.7"):
+    return SimpleNamespace(client=SimpleNamespace(host=ip))
+
+
+@pytest.fixture
+def quota(tmp_path, monkeypatch):
+    """A batch quota of 5 URLs per hour in a throwaway database."""
+    limiter = ScanRateLimiter(str(tmp_path / "ratelimit.db"), limit=5, window_seconds=3600)
+    monkeypatch.setattr(website_scanner, "get_batch_rate_limiter", lambda: limiter)
+    return limiter
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """In-memory database for the scans a batch registers."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(website_scanner, "get_db", get_db)
+    store = ProgressStateStore(flush_interval=3600)
+    monkeypatch.setattr(progress_tracker, "get_progress_store", lambda: store)
+    return factory
+
+
+def test_host_limiter_caps_each_host_and_the_total():
+    limiter = HostConcurrencyLimiter(global_limit=3, per_host_limit=2)
+    running = {"a.example": 0, "b.example": 0, "total": 0}
+    peaks = dict(running)
+
+    async def scan(url):
+        host = limiter.host_key(url)
+        async with limiter.slot(url):
+            running[host] += 1
+            running["total"] += 1
+            for key in (host, "total"):
+                peaks[key] = max(peaks[key], running[key])
+            await asyncio.sleep(0.01)
+            running[host] -= 1
+            running["total"] -= 1
+
+    async def main():
+        urls = [f"https://{host}/{i}" for i in range(5) for host in ("a.example", "B.example:8443")]
+        await asyncio.gather(*(scan(url) for url in urls))
+
+    asyncio.run(main())
+
+    assert peaks == {"a.example": 2, "b.example": 2, "total": 3}
+    # Idle hosts are forgotten
+    assert limiter._hosts == {}
+
+
+def test_each_url_is_charged_to_the_batch_quota(quota):
+    """A batch is charged per URL, so a large batch cannot ride on one scan's allowance."""
+    first = website_scanner.scan_website_batch(
+        batch_request([f"https://example{i}.com" for i in range(4)]), client()
+    )
+    asyncio.run(first)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(website_scanner.scan_website_batch(
+            batch_request(["https://example8.com", "https://example9.com"]), client()
+        ))
+
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) > 0
+    # Another client has its own quota
+    asyncio.run(website_scanner.scan_website_batch(
+        batch_request(["https://example8.com", "https://example9.com"]), client("203.0.113.8")
+    ))
+
+
+def test_invalid_batches_consume_no_quota(quota):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(website_scanner.scan_website_batch(batch_request([" ", ""]), client()))
+    assert error.value.status_code == 400
+
+    assert quota.check("batch:203.0.113.7", cost=5).allowed
+
+
+def test_disconnect_cancels_running_scans(quota, session_factory, monkeypatch):
+    """Closing the stream cancels every started scan's token and marks it cancelled."""
+    tokens = {}
+
+    async def validate_target(*args, **kwargs):
+        return True, None
+
+    async def scan_forever(request, client_ip, db, tracker, scan_id, start_time, cancel_token):
+        tokens[scan_id] = cancel_token
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(
+        website_scanner, "get_safety_validator", lambda: SimpleNamespace(validate_target=validate_target)
+    )
+    monkeypatch.setattr(website_scanner, "_scan_validated_target", scan_forever)
+
+    async def main():
+        response = await website_scanner.scan_website_batch(
+            batch_request(["https://a.example", "https://b.example"]), client()
+        )
+        stream = response.body_iterator
+        reader = asyncio.ensure_future(stream.__anext__())
+        while len(tokens) < 2:
+            await asyncio.sleep(0.01)
+
+        # Client goes away while both scans are in flight
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+
+    assert len(tokens) == 2
+    assert all(token.is_cancelled for token in tokens.values())
+    db = session_factory()
+    try:
+        rows = db.query(ScanProgress).filter(ScanProgress.scan_id.in_(tokens)).all()
+        assert [row.is_cancelled for row in rows] == [True, True]
+    finally:
+        db.close()
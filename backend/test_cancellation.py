@@ -0,0 +1,141 @@
+"""
+Tests for cooperative scan cancellation: tokens, the registry and
+cancellations recorded by another worker process
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.database import Base
+from app.db.models import ScanProgress
+from app.security.cancellation import (
+    CancellationRegistry,
+    CancellationToken,
+    ScanCancelledError,
+    get_cancellation_registry,
+)
+from app.services import progress_tracker
+from app.services.progress_store import ProgressStateStore
+from app.services.progress_tracker import ProgressTracker
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def tracker(session_factory, monkeypatch):
+    store = ProgressStateStore(flush_interval=3600)
+    monkeypatch.setattr(progress_tracker, "get_progress_store", lambda: store)
+    db = session_factory()
+    yield ProgressTracker(db)
+    db.close()
+
+
+def stored_row(session_factory, scan_id):
+    db = session_factory()
+    try:
+        return db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).one()
+    finally:
+        db.close()
+
+
+def test_cancel_runs_each_abort_callback_once():
+    token = CancellationToken()
+    calls = []
+    token.register(lambda: calls.append("socket"))
+    remove = token.register(lambda: calls.append("removed"))
+    token.register(lambda: 1 / 0)  # Failing closers don't stop the others
+    token.register(lambda: calls.append("response"))
+    remove()
+
+    token.cancel()
+    token.cancel()
+
+    assert calls == ["socket", "response"]
+    with pytest.raises(ScanCancelledError):
+        token.raise_if_cancelled()
+
+
+def test_callback_registered_after_cancel_runs_immediately():
+    token = CancellationToken()
+    token.cancel()
+    calls = []
+
+    token.register(lambda: calls.append("late"))
+
+    assert calls == ["late"]
+
+
+def test_registry_cancels_only_known_scans():
+    registry = CancellationRegistry()
+    token = registry.create("scan-1")
+
+    assert registry.create("scan-1") is token
+    assert registry.cancel("scan-1") and token.is_cancelled
+    assert not registry.cancel("unknown")
+
+    registry.release("scan-1")
+    assert registry.get("scan-1") is None
+
+
+def test_cancel_stops_updates_and_trips_the_token(tracker, session_factory):
+    scan_id = tracker.create_scan("https://example.com")
+    token = get_cancellation_registry().get(scan_id)
+
+    tracker.cancel_scan(scan_id)
+    tracker.update_progress(scan_id, 5)
+
+    assert token.is_cancelled
+    row = stored_row(session_factory, scan_id)
+    assert row.is_cancelled
+    assert row.current_step == ProgressTracker.STEPS[1]["name"]
+
+
+def test_cancellation_from_another_worker_is_honored(tracker, session_factory):
+    """Another process can only flag the row; the scan ends cancelled here, never complete."""
+    scan_id = tracker.create_scan("https://example.com")
+    token = get_cancellation_registry().get(scan_id)
+
+    other_worker = session_factory()
+    other_worker.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).update(
+        {ScanProgress.is_cancelled: True}
+    )
+    other_worker.commit()
+    other_worker.close()
+
+    tracker.complete_scan(scan_id)
+
+    assert token.is_cancelled
+    row = stored_row(session_factory, scan_id)
+    assert row.is_cancelled and not row.is_complete
+
+
+def test_cancelling_a_scan_running_elsewhere_flags_its_row(tracker, session_factory, monkeypatch):
+    """A scan unknown to this process is cancelled through its row for its worker to pick up."""
+    scan_id = tracker.create_scan("https://example.com")
+
+    # Another worker process: its own live store, no token for the scan
+    monkeypatch.setattr(progress_tracker, "get_progress_store", lambda: ProgressStateStore())
+    monkeypatch.setattr(progress_tracker, "get_cancellation_registry", lambda: CancellationRegistry())
+    db = session_factory()
+    try:
+        ProgressTracker(db).cancel_scan(scan_id)
+    finally:
+        db.close()
+
+    assert stored_row(session_factory, scan_id).is_cancelled
+    assert not get_cancellation_registry().get(scan_id).is_cancelled
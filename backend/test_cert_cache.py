@@ -0,0 +1,104 @@
+"""
+Tests for the certificate analysis cache
+"""
+import datetime
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.cert_cache import (
+    CertificateAnalysisCache,
+    analyze_certificate,
+    certificate_details,
+    certificate_fingerprint,
+)
+
+
+def peercert(not_after):
+    """A certificate as returned by SSLSocket.getpeercert()."""
+    return {
+        "subject": ((("commonName", "*.example.com"),), (("organizationName", "Example Inc"),)),
+        "issuer": ((("organizationName", "Example CA"),),),
+        "notBefore": "Jan  1 00:00:00 2024 GMT",
+        "notAfter": not_after.strftime("%b %d %H:%M:%S %Y GMT"),
+        "serialNumber": "0A1B2C",
+        "version": 3,
+        "subjectAltName": (("DNS", "*.example.com"), ("DNS", "example.com")),
+    }
+
+
+def in_days(days):
+    return datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(days=days)
+
+
+def test_each_certificate_is_decoded_once():
+    cache = CertificateAnalysisCache()
+    decodes = []
+
+    def decode():
+        decodes.append(1)
+        return peercert(in_days(90))
+
+    first, first_cached = cache.get_or_analyze(b"leaf-der", decode)
+    second, second_cached = cache.get_or_analyze(b"leaf-der", decode)
+    _, other_cached = cache.get_or_analyze(b"other-der", decode)
+
+    assert (first_cached, second_cached, other_cached) == (False, True, False)
+    assert second is first
+    assert len(decodes) == 2
+    assert first["fingerprint_sha256"] == certificate_fingerprint(b"leaf-der")
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+
+def test_entries_expire_at_not_after():
+    cache = CertificateAnalysisCache()
+    fingerprint = certificate_fingerprint(b"leaf-der")
+    analysis = analyze_certificate(peercert(in_days(90)), fingerprint)
+    cache.put(fingerprint, analysis)
+
+    analysis["not_after"] = in_days(-1)  # As if notAfter had passed since it was cached
+
+    assert cache.get(fingerprint) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_certificates_are_not_cached():
+    cache = CertificateAnalysisCache()
+
+    _, cached = cache.get_or_analyze(b"expired-der", lambda: peercert(in_days(-1)))
+    _, cached_again = cache.get_or_analyze(b"expired-der", lambda: peercert(in_days(-1)))
+
+    assert not cached and not cached_again
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = CertificateAnalysisCache(max_entries=2)
+    for der in (b"a", b"b"):
+        cache.get_or_analyze(der, lambda: peercert(in_days(90)))
+    cache.get_or_analyze(b"a", lambda: peercert(in_days(90)))  # "b" is now the oldest
+
+    cache.get_or_analyze(b"c", lambda: peercert(in_days(90)))
+
+    assert cache.get(certificate_fingerprint(b"a")) is not None
+    assert cache.get(certificate_fingerprint(b"b")) is None
+
+
+def test_expiry_fields_are_computed_at_lookup_time():
+    """A cached analysis never carries a stale days-until-expiry."""
+    now = in_days(0)
+    analysis = analyze_certificate(peercert(now + datetime.timedelta(days=45)), "ab12")
+
+    today = certificate_details(analysis, now=now)
+    later = certificate_details(analysis, now=now + datetime.timedelta(days=20))
+    after = certificate_details(analysis, now=now + datetime.timedelta(days=46))
+
+    assert (today["days_until_expiry"], today["expires_soon"], today["expired"]) == (45, False, False)
+    assert (later["days_until_expiry"], later["expires_soon"], later["expired"]) == (25, True, False)
+    assert after["expired"]
+    assert today["common_name"] == "*.example.com"
+    assert today["issuer"] == "Example CA"
+    assert today["subject_alt_names"] == ["*.example.com", "example.com"]
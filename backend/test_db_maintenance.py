@@ -0,0 +1,169 @@
+"""
+Tests for database maintenance: batched retention deletes, incremental vacuum
+and schema upgrades of existing databases
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.database import Base
+from app.db.maintenance import delete_older_than
+from app.db.migrations import upgrade_schema
+from app.db.models import ScanHistory, ScanProgress, WebsiteScan
+from app.services.maintenance_scheduler import MaintenanceScheduler
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'maintenance.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def add_history(db, ages_in_days):
+    now = datetime.utcnow()
+    for days in ages_in_days:
+        db.add(ScanHistory(
+            email="user@example.com",
+            email_breached=False,
+            risk_level="LOW",
+            scanned_at=now - timedelta(days=days),
+        ))
+    db.commit()
+
+
+def test_deletes_only_rows_older_than_cutoff(session_factory):
+    db = session_factory()
+    add_history(db, [100] * 7 + [1] * 3)
+
+    deleted = delete_older_than(
+        db, ScanHistory, ScanHistory.scanned_at, datetime.utcnow() - timedelta(days=90), pause_seconds=0
+    )
+
+    assert deleted == 7
+    assert db.query(ScanHistory).count() == 3
+    assert all(row.scanned_at > datetime.utcnow() - timedelta(days=2) for row in db.query(ScanHistory))
+    db.close()
+
+
+def test_deletes_in_batches_each_committed(engine, session_factory):
+    """10 old rows with batch_size=4: three DELETE transactions of 4, 4 and 2 rows."""
+    db = session_factory()
+    add_history(db, [100 + i for i in range(10)] + [1])
+
+    deletes = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count_deletes(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE"):
+            deletes.append(cursor.rowcount)
+
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(True))
+
+    deleted = delete_older_than(
+        db, ScanHistory, ScanHistory.scanned_at, datetime.utcnow() - timedelta(days=90),
+        batch_size=4, pause_seconds=0
+    )
+
+    assert deleted == 10
+    assert deletes == [4, 4, 2]
+    assert len(commits) == 3
+    assert db.query(ScanHistory).count() == 1
+    db.close()
+
+
+def test_nothing_to_delete(session_factory):
+    db = session_factory()
+    add_history(db, [1, 2])
+
+    assert delete_older_than(db, ScanHistory, ScanHistory.scanned_at, datetime.utcnow() - timedelta(days=90)) == 0
+    assert db.query(ScanHistory).count() == 2
+    db.close()
+
+
+def test_maintenance_run_enforces_retention_and_reclaims_space(engine, session_factory):
+    db = session_factory()
+    add_history(db, [100] * 200 + [1] * 5)
+    now = datetime.utcnow()
+    for i, hours in enumerate([48, 48, 1]):
+        db.add(ScanProgress(
+            scan_id=f"scan-{i}",
+            url="https://example.com",
+            current_step="Complete",
+            step_details="x" * 2000,
+            start_time=now - timedelta(hours=hours),
+        ))
+    db.commit()
+    db.close()
+
+    scheduler = MaintenanceScheduler(engine=engine, session_factory=session_factory)
+    report = scheduler.run_once()
+
+    assert report["deleted"] == {"scan_progress": 2, "scan_history": 200, "website_scans": 0}
+    assert report["rows"] == {"scan_progress": 1, "scan_history": 5, "website_scans": 0}
+    assert report["vacuum"]["converted_to_incremental"]
+    assert report["vacuum"]["free_pages_remaining"] == 0
+    assert scheduler.status()["runs"] == 1
+    assert scheduler.status()["last_run"] is report
+
+    # Already incremental: later runs never rewrite the whole file again
+    assert not scheduler.run_once()["vacuum"]["converted_to_incremental"]
+
+
+def test_website_scans_follow_their_own_retention(engine, session_factory):
+    db = session_factory()
+    now = datetime.utcnow()
+    for days in (10, 40):
+        db.add(WebsiteScan(
+            url="https://example.com",
+            client_ip="203.0.113.1",
+            risk_score=10,
+            risk_level="LOW",
+            overall_grade="A",
+            scanned_at=now - timedelta(days=days),
+        ))
+    db.commit()
+    db.close()
+
+    scheduler = MaintenanceScheduler(engine=engine, session_factory=session_factory, website_scan_retention_days=30)
+
+    assert scheduler.run_once()["deleted"]["website_scans"] == 1
+
+
+def test_upgrade_schema_adds_columns_and_indexes_to_old_tables(tmp_path):
+    """A database created before newer columns existed gains them, data intact."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE website_scans (id INTEGER PRIMARY KEY, url VARCHAR NOT NULL, "
+            "client_ip VARCHAR NOT NULL, risk_score INTEGER NOT NULL, risk_level VARCHAR NOT NULL, "
+            "overall_grade VARCHAR NOT NULL, scanned_at DATETIME NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO website_scans (url, client_ip, risk_score, risk_level, overall_grade, scanned_at) "
+            "VALUES ('https://example.com', '203.0.113.7', 40, 'MEDIUM', 'C', '2026-01-01 00:00:00')"
+        ))
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # Idempotent
+
+    columns = {column["name"] for column in inspect(engine).get_columns("website_scans")}
+    assert set(WebsiteScan.__table__.columns.keys()) <= columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("website_scans")}
+    assert {index.name for index in WebsiteScan.__table__.indexes} <= indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT risk_level FROM website_scans")).scalar() == "MEDIUM"
@@ -0,0 +1,167 @@
+"""
+Tests for the shared DNS cache: TTL expiry, negative caching and lookup timeouts
+Runs against a local fake DNS server, so no network access is needed
+"""
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import dns.asyncresolver
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.resolver
+import dns.rrset
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security import dns_cache
+from app.security.dns_cache import dns_cache_stats, resolve_host, resolve_host_async
+
+
+# name -> (A record TTL, address); other names are NXDOMAIN
+RECORDS = {
+    "stable.test.": (300, "93.184.216.34"),
+    "short.test.": (1, "93.184.216.35"),
+    "slow-aaaa.test.": (300, "93.184.216.36"),
+}
+
+# Names whose AAAA queries are never answered
+UNANSWERED_AAAA = {"slow-aaaa.test."}
+
+# SOA minimum: how long NXDOMAIN answers are cached
+NEGATIVE_TTL = 1
+
+
+class FakeDNSServer:
+    """UDP DNS server answering from RECORDS and counting queries per name."""
+
+    def __init__(self):
+        self.queries = {}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            question = query.question[0]
+            name = question.name.to_text()
+            self.queries[name] = self.queries.get(name, 0) + 1
+            if name in UNANSWERED_AAAA and question.rdtype == dns.rdatatype.AAAA:
+                continue
+
+            soa = dns.rrset.from_text(
+                "test.", NEGATIVE_TTL, "IN", "SOA", f"ns.test. admin.test. 1 3600 600 86400 {NEGATIVE_TTL}"
+            )
+            if name in RECORDS and question.rdtype == dns.rdatatype.A:
+                ttl, address = RECORDS[name]
+                response.answer.append(dns.rrset.from_text(question.name, ttl, "IN", "A", address))
+            elif name in RECORDS:
+                response.authority.append(soa)  # No AAAA record
+            else:
+                response.set_rcode(dns.rcode.NXDOMAIN)
+                response.authority.append(soa)
+            self.sock.sendto(response.to_wire(), client)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def dns_server(monkeypatch):
+    """Fake server, with the shared resolvers and cache replaced by fresh ones pointing at it."""
+    server = FakeDNSServer()
+    cache = dns.resolver.LRUCache(1000)
+    resolver = dns.resolver.Resolver(configure=False)
+    async_resolver = dns.asyncresolver.Resolver(configure=False)
+    for r in (resolver, async_resolver):
+        r.nameservers = ["127.0.0.1"]
+        r.port = server.port
+        r.cache = cache
+    monkeypatch.setattr(dns_cache, "_dns_cache", cache)
+    monkeypatch.setattr(dns_cache, "_resolver", resolver)
+    monkeypatch.setattr(dns_cache, "_async_resolver", async_resolver)
+    yield server
+    server.close()
+
+
+def test_answers_are_cached_for_their_ttl(dns_server):
+    for _ in range(3):
+        assert resolve_host("stable.test", 443) == [(socket.AF_INET, ("93.184.216.34", 443))]
+        assert asyncio.run(resolve_host_async("stable.test", 443)) == [(socket.AF_INET, ("93.184.216.34", 443))]
+
+    # One A and one AAAA query, then everything from the cache
+    assert dns_server.queries["stable.test."] == 2
+    stats = dns_cache_stats()
+    assert stats["hits"] >= 10
+
+
+def test_answers_expire_with_their_ttl(dns_server):
+    resolve_host("short.test", 80)
+    resolve_host("short.test", 80)
+    assert dns_server.queries["short.test."] == 2
+
+    time.sleep(1.2)
+    assert resolve_host("short.test", 80) == [(socket.AF_INET, ("93.184.216.35", 80))]
+    assert dns_server.queries["short.test."] == 4
+
+
+def test_nxdomain_is_cached_negatively(dns_server):
+    """A missing name fails from the cache, for sync and async lookups, until the SOA minimum passes."""
+    for _ in range(3):
+        with pytest.raises(socket.gaierror) as error:
+            resolve_host("missing.test", 443)
+        assert error.value.errno == socket.EAI_NONAME
+        with pytest.raises(socket.gaierror):
+            asyncio.run(resolve_host_async("missing.test", 443))
+    queried = dns_server.queries["missing.test."]
+    assert queried == 1
+
+    time.sleep(NEGATIVE_TTL + 0.2)
+    with pytest.raises(socket.gaierror):
+        resolve_host("missing.test", 443)
+    assert dns_server.queries["missing.test."] > queried
+
+
+def test_ip_literals_skip_dns(dns_server):
+    assert resolve_host("203.0.113.9", 443) == [(socket.AF_INET, ("203.0.113.9", 443))]
+    assert resolve_host("2001:db8::1", 443) == [(socket.AF_INET6, ("2001:db8::1", 443, 0, 0))]
+    assert dns_server.queries == {}
+
+
+def test_timeout_for_one_family_keeps_the_other_familys_addresses(dns_server):
+    """An unanswered AAAA query does not fail a name whose A query succeeded."""
+    expected = [(socket.AF_INET, ("93.184.216.36", 443))]
+
+    assert resolve_host("slow-aaaa.test", 443, timeout=0.3) == expected
+    assert asyncio.run(resolve_host_async("slow-aaaa.test", 443, timeout=0.3)) == expected
+
+
+def test_timeout_without_any_address_fails_as_temporary(dns_server):
+    """When neither family answers the lookup fails with EAI_AGAIN."""
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(("127.0.0.1", 0))
+    try:
+        for resolver in (dns_cache._resolver, dns_cache._async_resolver):
+            resolver.port = silent.getsockname()[1]
+        with pytest.raises(socket.gaierror) as error:
+            resolve_host("stable.test", 443, timeout=0.3)
+        assert error.value.errno == socket.EAI_AGAIN
+        with pytest.raises(socket.gaierror) as error:
+            asyncio.run(resolve_host_async("stable.test", 443, timeout=0.3))
+        assert error.value.errno == socket.EAI_AGAIN
+    finally:
+        silent.close()
@@ -0,0 +1,150 @@
+"""
+Tests for the concurrent DNS security lookups and their stage deadline
+Uses a fake async resolver, so no network access is needed
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import dns.exception
+import dns.resolver
+import dns.rrset
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.cancellation import CancellationToken
+from app.security.dns_scanner import DNSSecurityScanner
+from app.security.spf_evaluator import clear_spf_memo
+
+
+# (name, type) -> (TTL, records); other lookups have no answer
+RECORDS = {
+    ("example.test.", "TXT"): (300, ['"v=spf1 include:_spf.mail.test -all"']),
+    ("_spf.mail.test.", "TXT"): (600, ['"v=spf1 ip4:192.0.2.0/24 -all"']),
+    ("_dmarc.example.test.", "TXT"): (3600, ['"v=DMARC1; p=reject; rua=mailto:d@example.test"']),
+    ("example.test.", "MX"): (120, ["10 mail.example.test."]),
+    ("example.test.", "CAA"): (3600, ['0 issue "letsencrypt.org"']),
+    ("example.test.", "DNSKEY"): (3600, ["257 3 13 mdsswUyr3DPW132mOi8V9xESWE8jTo0dxCjjnopKl+GqJxpVXckHAeF+KkxLbxILfDLUT0rAK9iUzy1L53eKGQ=="]),
+    ("example.test.", "SOA"): (900, ["ns.example.test. admin.example.test. 2024061501 3600 600 86400 300"]),
+}
+
+
+class Answer:
+    """The parts of dns.resolver.Answer the scanner uses."""
+
+    def __init__(self, rrset):
+        self.rrset = rrset
+
+    def __iter__(self):
+        return iter(self.rrset)
+
+    def __len__(self):
+        return len(self.rrset)
+
+    def __getitem__(self, index):
+        return self.rrset[index]
+
+
+class FakeResolver:
+    """Answers from RECORDS after `delay`, honoring the lookup lifetime; tracks concurrent lookups."""
+
+    def __init__(self, delay=0.0, hang=()):
+        self.delay = delay
+        self.hang = set(hang)  # Record types never answered
+        self.running = 0
+        self.peak = 0
+        self.lookups = []
+
+    async def resolve(self, name, rdtype, lifetime=None):
+        name = name if name.endswith(".") else name + "."
+        self.lookups.append((name, rdtype))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            if rdtype in self.hang:
+                await asyncio.sleep(lifetime)
+                raise dns.exception.Timeout()
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if (name, rdtype) not in RECORDS:
+            raise dns.resolver.NoAnswer()
+        ttl, records = RECORDS[(name, rdtype)]
+        return Answer(dns.rrset.from_text(name, ttl, "IN", rdtype, *records))
+
+
+@pytest.fixture(autouse=True)
+def fresh_spf_memo():
+    clear_spf_memo()
+    yield
+    clear_spf_memo()
+
+
+def scanner_with(resolver, **kwargs):
+    scanner = DNSSecurityScanner(**kwargs)
+    scanner.resolver = resolver
+    return scanner
+
+
+def test_lookups_run_concurrently():
+    resolver = FakeResolver(delay=0.2)
+
+    started = time.perf_counter()
+    result = scanner_with(resolver).scan("https://example.test/")
+    elapsed = time.perf_counter() - started
+
+    # Six record lookups at once, then the SPF include: two round trips rather than eight
+    assert elapsed < 0.8
+    assert resolver.peak >= 6
+    assert result["success"] and result["complete"]
+    assert result["grade"] == "A"
+    assert result["spf"]["lookup_count"] == 1
+    assert result["dmarc"]["policy"] == "reject"
+    assert result["mx_records"] == ["mail.example.test."]
+    assert result["dnssec"]["enabled"]
+    assert result["soa_serial"] == 2024061501
+    assert result["min_ttl"] == 120
+
+
+def test_lookups_past_the_deadline_are_reported_as_failed():
+    """An unanswered record type leaves that record absent; the rest of the stage still reports."""
+    resolver = FakeResolver(hang={"DNSKEY"})
+
+    started = time.perf_counter()
+    result = scanner_with(resolver, deadline_seconds=0.3).scan("https://example.test/")
+
+    assert time.perf_counter() - started < 1
+    assert result["success"]
+    assert not result["complete"]
+    assert result["failed_lookups"] == [{"name": "example.test", "type": "DNSKEY", "error": "timeout"}]
+    assert not result["dnssec"]["enabled"]
+    assert "DNSSEC not enabled" in result["issues"]
+    assert result["dmarc"]["present"]
+
+
+def test_each_lookup_is_capped_by_the_scanner_timeout():
+    resolver = FakeResolver(hang={"CAA", "DNSKEY"})
+
+    started = time.perf_counter()
+    result = scanner_with(resolver, timeout=0.2, deadline_seconds=5).scan("https://example.test/")
+
+    assert time.perf_counter() - started < 1
+    assert {lookup["type"] for lookup in result["failed_lookups"]} == {"CAA", "DNSKEY"}
+
+
+def test_cancellation_aborts_pending_lookups():
+    resolver = FakeResolver(hang={"MX"})
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+
+    started = time.perf_counter()
+    result = scanner_with(resolver, cancel_token=token, deadline_seconds=5).scan("https://example.test/")
+
+    assert time.perf_counter() - started < 1
+    assert not result["success"]
+    assert resolver.running == 0
@@ -0,0 +1,133 @@
+"""
+Tests for the suffix-trie domain policy engine
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.domain_policy import (
+    ALLOW,
+    BLOCK,
+    TEST_DOMAIN,
+    DomainPolicy,
+    DomainPolicyStore,
+    PublicSuffixList,
+)
+
+
+@pytest.fixture(scope="module")
+def public_suffixes():
+    return PublicSuffixList.from_file()
+
+
+def test_most_specific_rule_wins():
+    """A rule for a subdomain beats a rule for its parent, in both directions."""
+    policy = DomainPolicy(
+        allow=["shop.example.gov"],
+        block=["gov", "internal.partner.com"],
+        test_domains=["partner.com"],
+    )
+
+    assert policy.evaluate("shop.example.gov").action == ALLOW
+    assert policy.evaluate("www.shop.example.gov").action == ALLOW
+    assert policy.evaluate("example.gov").action == BLOCK
+    assert policy.evaluate("partner.com").action == TEST_DOMAIN
+    assert policy.evaluate("api.internal.partner.com").action == BLOCK
+
+
+def test_stricter_action_wins_a_tie():
+    """The same rule listed twice keeps block over test_domains over allow."""
+    policy = DomainPolicy(allow=["example.com", "example.net"], test_domains=["example.com"], block=["example.net"])
+
+    assert policy.evaluate("example.com").action == TEST_DOMAIN
+    assert policy.evaluate("example.net").action == BLOCK
+    assert policy.rule_count == 2
+
+
+def test_wildcard_rules_match_subdomains_only():
+    policy = DomainPolicy(block=["*.corp.example"])
+
+    assert policy.evaluate("vpn.corp.example").action == BLOCK
+    assert policy.evaluate("corp.example").allowed
+
+
+def test_domains_are_normalized():
+    policy = DomainPolicy(block=["Example.COM."])
+
+    assert not policy.evaluate("WWW.example.com.").allowed
+
+
+def test_default_block_requires_a_matching_rule():
+    policy = DomainPolicy(allow=["customer.com"], default=BLOCK)
+
+    assert policy.evaluate("app.customer.com").allowed
+    assert not policy.evaluate("other.com").allowed
+
+
+def test_ip_rules_match_exactly():
+    policy = DomainPolicy(test_domains=["127.0.0.1"], block=["203.0.113.7"])
+
+    assert policy.evaluate("127.0.0.1").is_test_domain
+    assert not policy.evaluate("203.0.113.7").allowed
+    assert policy.evaluate("203.0.113.8").action is None
+
+
+def test_public_suffix_allow_rules_are_rejected(public_suffixes):
+    """allow/test rules covering a public suffix are dropped and reported; blocks are kept."""
+    policy = DomainPolicy(
+        allow=["co.uk", "*.github.io", "mysite.github.io"],
+        test_domains=["com", "localhost"],
+        block=["gov"],
+        default=BLOCK,
+        public_suffixes=public_suffixes,
+    )
+
+    assert len(policy.errors) == 3
+    assert not policy.evaluate("anything.co.uk").allowed
+    assert not policy.evaluate("someone.github.io").allowed
+    assert policy.evaluate("mysite.github.io").allowed
+    assert not policy.evaluate("example.com").allowed
+    # Special-use names are not listed suffixes
+    assert policy.evaluate("localhost").is_test_domain
+    assert policy.evaluate("whitehouse.gov").action == BLOCK
+
+
+def test_public_suffix_list_rules(public_suffixes):
+    """Plain, wildcard and exception rules of the suffix list."""
+    assert public_suffixes.registrable_domain("www.bbc.co.uk") == "bbc.co.uk"
+    assert public_suffixes.registrable_domain("a.b.example.ck") == "b.example.ck"
+    assert public_suffixes.registrable_domain("www.ck") == "www.ck"
+    assert public_suffixes.registrable_domain("co.uk") is None
+    assert public_suffixes.is_public_suffix("github.io")
+
+
+def test_policy_file_changes_are_picked_up(tmp_path):
+    """The store reloads a changed file and keeps the last good policy on errors."""
+    policy_path = tmp_path / "domain_policy.json"
+    suffix_path = tmp_path / "public_suffix_list.dat"
+    suffix_path.write_text("com\n")
+    policy_path.write_text('{"block": ["blocked.com"]}')
+    store = DomainPolicyStore(policy_path, suffix_path, reload_interval=0)
+
+    assert not store.get().evaluate("blocked.com").allowed
+
+    policy_path.write_text('{"block": ["other.com"], "allow": ["com"]}')
+    policy = store.get()
+    assert policy.evaluate("blocked.com").allowed
+    assert not policy.evaluate("other.com").allowed
+    assert policy.errors  # "com" is a public suffix
+
+    policy_path.write_text("{not json")
+    assert store.get() is policy
+    assert store.load_error
+
+
+def test_missing_policy_file_blocks_everything(tmp_path):
+    store = DomainPolicyStore(tmp_path / "missing.json", tmp_path / "missing.dat")
+
+    assert not store.get().evaluate("example.com").allowed
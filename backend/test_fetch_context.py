@@ -0,0 +1,208 @@
+"""
+Tests for the shared per-scan fetch context
+Runs against a local HTTP server, so no network access is needed
+"""
+import http.server
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import requests
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.cancellation import CancellationToken, ScanCancelledError
+from app.security.fetch_context import FetchContext, FetchedResponse, detect_charset
+from app.security.http_client import PooledHTTPClient
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves pages by path and records every request as (method, path).
+
+    HEAD is refused with 405 on /no-head; /drip sends its body one byte at a time.
+    """
+
+    protocol_version = "HTTP/1.1"
+    pages = {
+        "/": (200, {"Content-Type": "text/html"}, b"<html><body>Hello</body></html>"),
+        "/no-head": (200, {"X-Frame-Options": "DENY"}, b"x" * 100000),
+        "/large": (200, {"Content-Type": "text/html"}, b"a" * 200000),
+        "/latin1": (
+            200, {"Content-Type": "text/html"},
+            '<html><head><meta charset="windows-1252"></head><body>Café</body></html>'.encode("cp1252")
+        ),
+    }
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(("GET", self.path))
+        if self.path == "/drip":
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b"x")
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except OSError:
+                pass  # Client gave up
+            return
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self.requests_seen.append(("HEAD", self.path))
+        if self.path == "/no-head":
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        status, headers, body = self.pages.get(self.path, (404, {}, b"not found"))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            try:
+                self.wfile.write(body)
+            except OSError:
+                pass  # Client closed after the headers
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # Capped and header-only fetches drop their connections on purpose
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(Handler, "requests_seen", [])
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def fetch_context(url, **kwargs):
+    return FetchContext(url, http_client=PooledHTTPClient(http2=False), **kwargs)
+
+
+def test_concurrent_consumers_share_one_fetch(server):
+    """Every consumer gets the same response from a single request."""
+    context = fetch_context(f"{server}/")
+    assert context.peek() is None
+
+    with ThreadPoolExecutor(4) as executor:
+        responses = list(executor.map(lambda _: context.get(), range(8)))
+
+    assert all(response is responses[0] for response in responses)
+    assert Handler.requests_seen == [("GET", "/")]
+    assert responses[0].status_code == 200
+    assert responses[0].text == "<html><body>Hello</body></html>"
+    assert context.peek() is responses[0]
+
+
+def test_failed_fetch_is_reported_to_every_consumer(monkeypatch):
+    """A failure is raised again for each consumer without retrying the request."""
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    context = fetch_context(f"http://127.0.0.1:{port}/", timeout=2)
+    attempts = []
+    original = context._fetch
+    monkeypatch.setattr(context, "_fetch", lambda: attempts.append(1) or original())
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            context.get()
+
+    assert len(attempts) == 1
+    assert context.peek() is None
+
+
+def test_cancelled_scan_never_fetches(server):
+    token = CancellationToken()
+    token.cancel()
+    context = fetch_context(f"{server}/", cancel_token=token)
+
+    with pytest.raises(ScanCancelledError):
+        context.get()
+    assert Handler.requests_seen == []
+
+
+def test_headers_only_mode_sends_head(server):
+    response = fetch_context(f"{server}/", headers_only=True).get()
+
+    assert Handler.requests_seen == [("HEAD", "/")]
+    assert response.headers_only
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/html"
+    assert response.body == b""
+
+
+def test_headers_only_mode_falls_back_to_get_without_reading_the_body(server):
+    """A server refusing HEAD gets a GET that is dropped once the headers are in."""
+    response = fetch_context(f"{server}/no-head", headers_only=True).get()
+
+    assert Handler.requests_seen == [("HEAD", "/no-head"), ("GET", "/no-head")]
+    assert response.status_code == 200
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.body == b""
+
+
+def test_slow_body_is_cut_off_at_the_fetch_time_cap(server):
+    """A body trickling in byte by byte fails after max_fetch_seconds, not per-read timeouts."""
+    context = fetch_context(f"{server}/drip", timeout=5, max_fetch_seconds=0.5)
+
+    started = time.perf_counter()
+    with pytest.raises(requests.exceptions.Timeout):
+        context.get()
+    assert time.perf_counter() - started < 2
+
+
+def test_body_is_capped_at_max_body_bytes(server):
+    response = fetch_context(f"{server}/large", max_body_bytes=1000).get()
+
+    assert response.body == b"a" * 1000
+
+
+def test_body_is_decoded_with_the_declared_charset(server):
+    response = fetch_context(f"{server}/latin1").get()
+
+    assert response.encoding == "cp1252"
+    assert "Café" in response.text
+
+
+@pytest.mark.parametrize("content_type, body, expected", [
+    ("text/html; charset=iso-8859-1", b"\xef\xbb\xbf<html>", "utf-8-sig"),  # BOM wins
+    ("text/html; charset=ISO-8859-1", b'<meta charset="utf-8">', "iso8859-1"),  # Then the header
+    ("text/html; charset=bogus", b'<meta charset="shift_jis">', "shift_jis"),  # Then <meta>
+    ("text/html", b" " * 2000 + b'<meta charset="shift_jis">', "utf-8"),  # Only near the top
+    (None, b"<html>", "utf-8"),
+])
+def test_charset_detection_order(content_type, body, expected):
+    assert detect_charset(content_type, body) == expected
+
+
+def test_character_cut_off_by_the_byte_cap_is_dropped():
+    body = "€uro".encode("utf-8") + "€".encode("utf-8")[:2]
+    response = FetchedResponse(
+        url="https://example.com", final_url="https://example.com", status_code=200,
+        headers={}, body=body, encoding="utf-8", redirect_chain=[], elapsed_ms=0
+    )
+
+    assert response.text == "€uro"
@@ -0,0 +1,219 @@
+"""
+Tests for incremental rescans: change probes, component reuse and scan deltas
+Runs against a local HTTP server, so no network access is needed
+"""
+import asyncio
+import hashlib
+import http.server
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.models import WebsiteScan
+from app.services import incremental_scan
+from app.services.incremental_scan import (
+    CHANGED,
+    UNCHANGED,
+    IncrementalScanPlanner,
+    build_scan_delta,
+    collect_change_signals,
+)
+
+
+BODY = b"<html><body>Hello</body></html>"
+ETAG = '"v1"'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Serves BODY with an ETag on /etag (304 when it matches) and without validators on /plain."""
+
+    protocol_version = "HTTP/1.1"
+    body = BODY
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/etag" and self.headers.get("If-None-Match") == ETAG and self.body == BODY:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(self.body)))
+        if self.path == "/etag":
+            self.send_header("ETag", ETAG if self.body == BODY else '"v2"')
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(Handler, "requests_seen", [])
+    monkeypatch.setattr(Handler, "body", BODY)
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def soa_serial(monkeypatch):
+    """Current SOA serial returned to the DNS probe."""
+    serial = {"value": 2024061501}
+    monkeypatch.setattr(
+        incremental_scan.DNSSecurityScanner, "soa_serial", lambda self, domain: serial["value"]
+    )
+    return serial
+
+
+def previous_scan(etag=ETAG, headers_sha256=None):
+    """A stored scan of BODY with its change signals."""
+    http_signals = {
+        "etag": etag,
+        "last_modified": None,
+        "body_sha256": hashlib.sha256(BODY).hexdigest(),
+        "headers_sha256": headers_sha256,
+    }
+    return WebsiteScan(
+        id=7,
+        url="http://127.0.0.1/",
+        client_ip="203.0.113.7",
+        risk_score=20,
+        risk_level="LOW",
+        overall_grade="B",
+        http_scan_json=json.dumps({"headers_missing": ["Content-Security-Policy"]}),
+        ssl_scan_json=json.dumps({}),
+        dns_scan_json=json.dumps({"issues": ["DNSSEC not enabled"], "soa_serial": 2024061501}),
+        tech_scan_json=json.dumps({"vulnerabilities": []}),
+        change_signals_json=json.dumps({"http": http_signals, "tls": None, "dns": {"soa_serial": 2024061501}}),
+        scanned_at=datetime(2026, 1, 1),
+    )
+
+
+def plan(planner):
+    with ThreadPoolExecutor(3) as executor:
+        return asyncio.run(planner.plan(executor))
+
+
+def test_not_modified_page_reuses_http_results(server, soa_serial):
+    planner = IncrementalScanPlanner(f"{server}/etag", previous_scan())
+    conditional_fetch = planner.fetch_context
+
+    reusable = plan(planner)
+
+    assert Handler.requests_seen == [("/etag", ETAG)]
+    assert planner.statuses["http_headers"] == {"status": UNCHANGED, "reason": "304 Not Modified"}
+    assert planner.statuses["dns_security"]["status"] == UNCHANGED
+    assert set(reusable) == {"http_headers", "technologies", "dns_security"}
+    # The SSL result is rescanned and needs a plain fetch, not the body-less 304
+    assert planner.fetch_context is not conditional_fetch
+    assert planner.fetch_context.extra_headers == {}
+
+
+def test_identical_body_and_headers_count_as_unchanged(server, soa_serial):
+    """Without validators the body hash and stable-header digest decide."""
+    first = IncrementalScanPlanner(f"{server}/plain", previous_scan(etag=None))
+    plan(first)
+    headers_sha256 = incremental_scan.http_signals(first.fetch_context.peek())["headers_sha256"]
+
+    planner = IncrementalScanPlanner(f"{server}/plain", previous_scan(etag=None, headers_sha256=headers_sha256))
+    reusable = plan(planner)
+
+    assert Handler.requests_seen[-1] == ("/plain", None)
+    assert planner.statuses["http_headers"]["reason"] == "Identical body hash and response headers"
+    assert "http_headers" in reusable
+
+
+def test_changed_page_is_rescanned_from_the_conditional_fetch(server, soa_serial, monkeypatch):
+    monkeypatch.setattr(Handler, "body", b"<html><body>Changed</body></html>")
+    planner = IncrementalScanPlanner(f"{server}/etag", previous_scan())
+    conditional_fetch = planner.fetch_context
+
+    reusable = plan(planner)
+
+    assert planner.statuses["http_headers"]["status"] == CHANGED
+    assert "http_headers" not in reusable and "technologies" not in reusable
+    # The 200 answer to the conditional GET is the scan's shared fetch
+    assert planner.fetch_context is conditional_fetch
+    assert planner.fetch_context.peek().body == Handler.body
+    assert len(Handler.requests_seen) == 1
+
+
+def test_changed_soa_serial_rescans_dns(server, soa_serial):
+    soa_serial["value"] = 2024061502
+    planner = IncrementalScanPlanner(f"{server}/etag", previous_scan())
+
+    reusable = plan(planner)
+
+    assert planner.statuses["dns_security"] == {
+        "status": CHANGED, "reason": "SOA serial changed (2024061501 -> 2024061502)"
+    }
+    assert "dns_security" not in reusable
+
+
+def test_scan_without_stored_signals_is_rescanned(server, soa_serial):
+    scan = previous_scan()
+    scan.change_signals_json = None
+    planner = IncrementalScanPlanner(f"{server}/etag", scan)
+
+    assert plan(planner) == {}
+    assert Handler.requests_seen == []
+
+
+def test_reused_http_results_keep_their_previous_signals(server, soa_serial):
+    """A 304 has no body to hash: the stored HTTP signals are carried over while reused."""
+    scan = previous_scan()
+    planner = IncrementalScanPlanner(f"{server}/etag", scan)
+    conditional_fetch = planner.fetch_context
+    reusable = plan(planner)
+    previous_signals = json.loads(scan.change_signals_json)
+    scan_results = {"dns_security": {"soa_serial": 2024061501}}
+
+    signals = collect_change_signals(scan_results, conditional_fetch, previous_signals, reusable)
+    rescanned = collect_change_signals(scan_results, conditional_fetch, previous_signals, {})
+
+    assert signals["http"] == previous_signals["http"]
+    assert signals["dns"] == {"soa_serial": 2024061501}
+    assert signals["tls"] is None
+    assert rescanned["http"] is None
+
+
+def test_scan_delta_lists_added_and_resolved_issues():
+    delta = build_scan_delta(
+        previous_scan(),
+        {
+            "http_headers": {"headers_missing": ["Strict-Transport-Security"]},
+            "dns_security": {"issues": ["DNSSEC not enabled"]},
+        },
+        {"weighted_risk_score": 25, "overall_grade": "C"},
+        {"http_headers": {"status": CHANGED, "reason": "Page content or response headers changed"}},
+    )
+
+    assert delta["previous_scan_id"] == 7
+    assert delta["issues"] == {
+        "http_headers": {
+            "added": ["Missing header: Strict-Transport-Security"],
+            "resolved": ["Missing header: Content-Security-Policy"],
+        },
+    }
+    assert delta["risk_score"] == {"previous": 20, "current": 25, "change": 5}
+    assert delta["overall_grade"] == {"previous": "B", "current": "C"}
+    assert delta["changed"]
@@ -0,0 +1,160 @@
+"""
+Tests for pushed scan progress: the event broker and the SSE/WebSocket endpoints
+"""
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.api import website_scanner
+from app.services.progress_events import ProgressEventBroker, is_terminal_event
+
+
+RUNNING = {"scan_id": "scan-1", "progress_percentage": 20, "is_complete": False, "has_error": False, "is_cancelled": False}
+HALFWAY = {**RUNNING, "progress_percentage": 60}
+DONE = {**RUNNING, "progress_percentage": 100, "is_complete": True}
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = ProgressEventBroker()
+    monkeypatch.setattr(website_scanner, "get_progress_broker", lambda: broker)
+    return broker
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    """scan_id -> current progress served to new subscribers."""
+    snapshots = {"scan-1": RUNNING}
+    monkeypatch.setattr(website_scanner, "_progress_snapshot", snapshots.get)
+    return snapshots
+
+
+@pytest.mark.parametrize("event, terminal", [
+    (RUNNING, False),
+    (DONE, True),
+    ({**RUNNING, "has_error": True}, True),
+    ({**RUNNING, "is_cancelled": True}, True),
+])
+def test_terminal_events(event, terminal):
+    assert is_terminal_event(event) == terminal
+
+
+def test_events_published_from_other_threads_reach_subscribers():
+    broker = ProgressEventBroker()
+
+    async def main():
+        first = broker.subscribe("scan-1")
+        second = broker.subscribe("scan-1")
+        other = broker.subscribe("scan-2")
+        publisher = threading.Thread(target=broker.publish, args=("scan-1", HALFWAY))
+        publisher.start()
+        publisher.join()
+
+        assert await asyncio.wait_for(first.get(), 1) == HALFWAY
+        assert await asyncio.wait_for(second.get(), 1) == HALFWAY
+        assert other.empty()
+
+        broker.unsubscribe("scan-1", first)
+        broker.unsubscribe("scan-2", other)
+        assert broker.subscriber_count("scan-1") == 1
+        assert broker.subscriber_count("scan-2") == 0
+
+    asyncio.run(main())
+
+
+def test_publishing_to_a_closed_loop_is_ignored():
+    broker = ProgressEventBroker()
+
+    async def subscribe():
+        broker.subscribe("scan-1")
+
+    asyncio.run(subscribe())
+
+    broker.publish("scan-1", HALFWAY)
+
+
+def test_stream_ends_after_a_terminal_event(monkeypatch):
+    monkeypatch.setattr(website_scanner, "PROGRESS_KEEPALIVE_SECONDS", 0.05)
+
+    async def main():
+        queue = asyncio.Queue()
+        events = website_scanner._progress_events(RUNNING, queue)
+        assert await events.__anext__() == RUNNING
+        assert await events.__anext__() is None  # Keep-alive while idle
+        queue.put_nowait(HALFWAY)
+        queue.put_nowait(DONE)
+        queue.put_nowait(HALFWAY)  # Never delivered
+        return [event async for event in events]
+
+    assert asyncio.run(main()) == [HALFWAY, DONE]
+
+
+def test_finished_scan_sends_only_its_snapshot():
+    async def main():
+        return [event async for event in website_scanner._progress_events(DONE, asyncio.Queue())]
+
+    assert asyncio.run(main()) == [DONE]
+
+
+def test_sse_endpoint_streams_until_the_scan_finishes(broker, snapshots):
+    async def main():
+        response = await website_scanner.stream_scan_progress("scan-1")
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+        first = await body.__anext__()
+        broker.publish("scan-1", HALFWAY)
+        broker.publish("scan-1", DONE)
+        return [first] + [chunk async for chunk in body]
+
+    chunks = asyncio.run(main())
+
+    assert [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks] == [RUNNING, HALFWAY, DONE]
+    assert all(chunk.startswith("event: progress\n") for chunk in chunks)
+    assert broker.subscriber_count("scan-1") == 0
+
+
+def test_sse_endpoint_rejects_unknown_scans(broker, snapshots):
+    async def main():
+        with pytest.raises(HTTPException) as error:
+            await website_scanner.stream_scan_progress("unknown")
+        return error.value.status_code
+
+    assert asyncio.run(main()) == 404
+    assert broker.subscriber_count("unknown") == 0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(website_scanner.router)
+    return TestClient(app)
+
+
+def test_websocket_pushes_updates_then_closes(broker, snapshots, client):
+    with client.websocket_connect("/ws/scan-progress/scan-1") as websocket:
+        assert websocket.receive_json() == RUNNING
+        broker.publish("scan-1", HALFWAY)
+        broker.publish("scan-1", DONE)
+        assert websocket.receive_json() == HALFWAY
+        assert websocket.receive_json() == DONE
+        assert websocket.receive()["type"] == "websocket.close"
+
+    assert broker.subscriber_count("scan-1") == 0
+
+
+def test_websocket_closes_for_unknown_scans(broker, snapshots, client):
+    with client.websocket_connect("/ws/scan-progress/unknown") as websocket:
+        message = websocket.receive()
+
+    assert (message["type"], message["code"]) == ("websocket.close", 4404)
+    assert broker.subscriber_count("unknown") == 0
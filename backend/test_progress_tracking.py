@@ -0,0 +1,173 @@
+"""
+Tests for scan progress tracking: write-behind flushing of live progress
+and terminal states (complete, error, cancelled)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.database import Base
+from app.db.models import ScanProgress
+from app.security.cancellation import get_cancellation_registry
+from app.services import progress_tracker
+from app.services.progress_store import ProgressStateStore
+from app.services.progress_tracker import ProgressTracker
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    # Only the first flush and forced (terminal) flushes happen within a test
+    store = ProgressStateStore(flush_interval=3600)
+    monkeypatch.setattr(progress_tracker, "get_progress_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def tracker(session_factory, store):
+    db = session_factory()
+    yield ProgressTracker(db)
+    db.close()
+
+
+def stored_row(session_factory, scan_id):
+    """The scan_progress row as another session (or worker) sees it."""
+    db = session_factory()
+    try:
+        return db.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).one()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def statements(session_factory):
+    """SQL statements executed on the test database, in order."""
+    executed = []
+    engine = session_factory.kw["bind"]
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def flag_cancelled(session_factory, scan_id):
+    """Cancel a scan the way another worker process does: through its row."""
+    other_worker = session_factory()
+    other_worker.query(ScanProgress).filter(ScanProgress.scan_id == scan_id).update(
+        {ScanProgress.is_cancelled: True}
+    )
+    other_worker.commit()
+    other_worker.close()
+
+
+def test_progress_is_written_behind(tracker, session_factory):
+    """Reads see every update at once; the row only gets coalesced flushes."""
+    scan_id = tracker.create_scan("https://example.com")
+
+    tracker.update_progress(scan_id, 2)  # First flush goes through
+    tracker.update_progress(scan_id, 3)  # Within the flush interval: stays in memory
+
+    assert tracker.get_progress(scan_id)["current_step"] == ProgressTracker.STEPS[3]["name"]
+    assert stored_row(session_factory, scan_id).current_step == ProgressTracker.STEPS[2]["name"]
+
+    assert tracker.store.flush(tracker.db, force=True) == 1
+    assert stored_row(session_factory, scan_id).current_step == ProgressTracker.STEPS[3]["name"]
+
+
+def test_unpersisted_updates_never_reach_the_row(tracker, session_factory):
+    scan_id = tracker.create_scan("https://example.com")
+
+    tracker.update_progress(scan_id, 4, force_percentage=50, persist=False)
+    tracker.store.flush(tracker.db, force=True)
+
+    assert tracker.get_progress(scan_id)["progress_percentage"] == 50
+    assert stored_row(session_factory, scan_id).progress_percentage == 0
+
+
+def test_pending_scans_flush_in_one_transaction(tracker, session_factory):
+    first = tracker.create_scan("https://a.example")
+    second = tracker.create_scan("https://b.example")
+    tracker.update_progress(first, 2)
+    tracker.update_progress(first, 5)
+    tracker.update_progress(second, 6)
+
+    assert tracker.store.flush(tracker.db, force=True) == 2
+    assert tracker.store.flush(tracker.db, force=True) == 0
+    assert stored_row(session_factory, first).current_step == ProgressTracker.STEPS[5]["name"]
+    assert stored_row(session_factory, second).current_step == ProgressTracker.STEPS[6]["name"]
+
+
+def test_completion_is_written_through_and_state_forgotten(tracker, session_factory):
+    scan_id = tracker.create_scan("https://example.com")
+    tracker.update_progress(scan_id, 2)
+    tracker.update_progress(scan_id, 7)
+    tracker.record_stage_timings(scan_id, {"ssl_tls": {"status": "completed", "duration_ms": 12}})
+
+    tracker.complete_scan(scan_id)
+
+    row = stored_row(session_factory, scan_id)
+    assert row.is_complete and not row.has_error and not row.is_cancelled
+    assert row.progress_percentage == 100
+    assert "ssl_tls" in row.stage_timings_json
+    assert tracker.store.get(scan_id) is None
+    assert tracker.get_progress(scan_id)["is_complete"]
+
+
+def test_error_is_written_through(tracker, session_factory):
+    scan_id = tracker.create_scan("https://example.com")
+
+    tracker.set_error(scan_id, "DNS scan failed")
+
+    row = stored_row(session_factory, scan_id)
+    assert row.has_error and row.error_message == "DNS scan failed"
+    assert not row.is_complete
+
+
+def test_updates_between_flushes_do_not_touch_the_database(tracker, statements):
+    """Only flushes go to the database; updates in between stay in memory."""
+    scan_id = tracker.create_scan("https://example.com")
+    tracker.update_progress(scan_id, 2)  # First flush
+    statements.clear()
+
+    tracker.update_progress(scan_id, 3, persist=False)
+    tracker.update_progress(scan_id, 3, substep_index=1, persist=False)
+    tracker.update_progress(scan_id, 4)  # Within the flush interval
+
+    assert statements == []
+    assert tracker.get_progress(scan_id)["current_step"] == ProgressTracker.STEPS[4]["name"]
+
+
+def test_flush_reads_back_cancellations_from_another_worker(tracker, session_factory):
+    """A flush marks scans whose row was flagged cancelled; the next update cancels them."""
+    scan_id = tracker.create_scan("https://example.com")
+    token = get_cancellation_registry().get(scan_id)
+    flag_cancelled(session_factory, scan_id)
+
+    tracker.update_progress(scan_id, 3, persist=False)
+    assert not token.is_cancelled  # Unpersisted updates never look
+
+    tracker.update_progress(scan_id, 4)  # Stage boundary: flushed, flag read back
+
+    assert token.is_cancelled
+    assert tracker.get_progress(scan_id)["is_cancelled"]
+    row = stored_row(session_factory, scan_id)
+    assert row.is_cancelled and not row.is_complete
@@ -0,0 +1,110 @@
+"""
+Tests for the cross-worker GCRA scan rate limiter
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security import rate_limiter as rate_limiter_module
+from app.security.rate_limiter import ScanRateLimiter
+
+
+class FakeClock:
+    """Stands in for time.time() so windows can elapse instantly."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(tmp_path, monkeypatch, limit=3, window_seconds=60):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, "time", clock)
+    limiter = ScanRateLimiter(str(tmp_path / "ratelimit.db"), limit=limit, window_seconds=window_seconds)
+    return limiter, clock
+
+
+def test_allows_burst_up_to_limit_then_blocks(tmp_path, monkeypatch):
+    """limit scans pass at once, with remaining counting down; the next is refused."""
+    limiter, _ = make_limiter(tmp_path, monkeypatch)
+
+    remaining = [limiter.check("1.2.3.4").remaining for _ in range(3)]
+    blocked = limiter.check("1.2.3.4")
+
+    assert remaining == [2, 1, 0]
+    assert not blocked.allowed
+    # One emission interval (window / limit) until the next scan
+    assert blocked.retry_after == 21
+
+
+def test_retry_after_is_exact(tmp_path, monkeypatch):
+    """A scan is allowed again exactly when Retry-After says, not a second earlier."""
+    limiter, clock = make_limiter(tmp_path, monkeypatch, limit=1, window_seconds=600)
+
+    assert limiter.check("client").allowed
+    blocked = limiter.check("client")
+    assert not blocked.allowed
+    assert blocked.retry_after == 601
+
+    clock.now += 599
+    assert not limiter.check("client").allowed
+    clock.now += 1
+    assert limiter.check("client").allowed
+
+
+def test_refused_checks_consume_nothing(tmp_path, monkeypatch):
+    """Hammering while blocked doesn't push the next allowed scan further out."""
+    limiter, clock = make_limiter(tmp_path, monkeypatch, limit=1, window_seconds=60)
+
+    limiter.check("client")
+    first = limiter.check("client").retry_after
+    for _ in range(10):
+        limiter.check("client")
+    assert limiter.check("client").retry_after == first
+
+    clock.now += 60
+    assert limiter.check("client").allowed
+
+
+def test_clients_are_limited_independently(tmp_path, monkeypatch):
+    limiter, _ = make_limiter(tmp_path, monkeypatch, limit=1)
+
+    assert limiter.check("a").allowed
+    assert not limiter.check("a").allowed
+    assert limiter.check("b").allowed
+
+
+def test_state_is_shared_between_limiter_instances(tmp_path, monkeypatch):
+    """Two limiters on one file (as in two worker processes) enforce one limit."""
+    first, _ = make_limiter(tmp_path, monkeypatch, limit=1)
+    second = ScanRateLimiter(first.db_path, limit=1, window_seconds=60)
+
+    assert first.check("client").allowed
+    assert not second.check("client").allowed
+
+
+def test_reset_and_can_scan(tmp_path, monkeypatch):
+    limiter, _ = make_limiter(tmp_path, monkeypatch, limit=1, window_seconds=600)
+
+    assert limiter.can_scan("client") == (True, None)
+    allowed, reason = limiter.can_scan("client")
+    assert not allowed
+    assert "11 minutes" in reason
+
+    limiter.reset("client")
+    assert limiter.check("client").allowed
+
+
+def test_check_async_enforces_the_same_limit(tmp_path, monkeypatch):
+    limiter, _ = make_limiter(tmp_path, monkeypatch, limit=2)
+
+    async def check_three():
+        return [(await limiter.check_async("client")).allowed for _ in range(3)]
+
+    assert asyncio.run(check_three()) == [True, True, False]
@@ -0,0 +1,125 @@
+"""
+Tests for persisted, versioned scan analysis
+"""
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.database import Base
+from app.db.models import WebsiteScan
+from app.security.risk_scorer import RiskScorer
+from app.services import scan_analysis
+from app.services.scan_analysis import (
+    analysis_engine_version,
+    load_scan_analysis,
+    run_analysis,
+    store_analysis,
+    stored_analysis,
+)
+
+
+SCAN_RESULTS = {
+    "http_headers": {"missing_headers": ["Strict-Transport-Security"]},
+    "ssl_tls": {"error": "SSL scan failed: timed out"},
+    "dns_security": {},
+    "technology": {},
+}
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def scan(session_factory):
+    """A stored scan whose analysis was produced by the current engines."""
+    db = session_factory()
+    scan = WebsiteScan(
+        url="https://example.com",
+        client_ip="203.0.113.7",
+        risk_score=0,
+        risk_level="UNKNOWN",
+        overall_grade="N/A",
+        http_scan_json=json.dumps(SCAN_RESULTS["http_headers"]),
+        ssl_scan_json=json.dumps(SCAN_RESULTS["ssl_tls"]),
+        dns_scan_json=json.dumps(SCAN_RESULTS["dns_security"]),
+        tech_scan_json=json.dumps(SCAN_RESULTS["technology"]),
+        scanned_at=datetime.utcnow(),
+    )
+    store_analysis(scan, run_analysis(SCAN_RESULTS))
+    db.add(scan)
+    db.commit()
+    yield db, scan
+    db.close()
+
+
+def test_storing_analysis_sets_the_risk_columns():
+    analysis = run_analysis(SCAN_RESULTS)
+    scan = WebsiteScan()
+
+    store_analysis(scan, analysis)
+
+    risk = analysis["risk_analysis"]
+    assert (scan.risk_score, scan.risk_level, scan.overall_grade) == (
+        risk["weighted_risk_score"], risk["overall_risk_level"], risk["overall_grade"]
+    )
+    assert scan.analysis_engine_version == analysis_engine_version()
+    assert stored_analysis(scan) == json.loads(json.dumps(analysis))
+
+
+def test_current_analysis_is_read_not_recomputed(scan, monkeypatch):
+    db, website_scan = scan
+    monkeypatch.setattr(scan_analysis, "run_analysis", lambda results: pytest.fail("recomputed"))
+
+    analysis = load_scan_analysis(db, website_scan)
+
+    assert set(analysis) == {"risk_analysis", "owasp_assessment", "vulnerability_analysis"}
+
+
+def test_engine_version_change_recomputes_and_updates_risk_columns(scan, session_factory, monkeypatch):
+    """A recomputed analysis and the scan's risk columns are committed together."""
+    db, website_scan = scan
+    monkeypatch.setattr(RiskScorer, "ENGINE_VERSION", "2.0")
+    assert stored_analysis(website_scan) is None
+
+    def rescored(results):
+        analysis = run_analysis(results)
+        analysis["risk_analysis"].update(weighted_risk_score=12, overall_risk_level="LOW", overall_grade="B")
+        return analysis
+
+    monkeypatch.setattr(scan_analysis, "run_analysis", rescored)
+    analysis = load_scan_analysis(db, website_scan)
+    assert analysis["risk_analysis"]["overall_grade"] == "B"
+
+    other = session_factory()
+    try:
+        row = other.get(WebsiteScan, website_scan.id)
+        assert (row.risk_score, row.risk_level, row.overall_grade) == (12, "LOW", "B")
+        assert row.analysis_engine_version == analysis_engine_version()
+        assert "risk-2.0" in row.analysis_engine_version
+    finally:
+        other.close()
+
+
+def test_missing_analysis_column_is_recomputed(scan):
+    db, website_scan = scan
+    website_scan.owasp_assessment_json = None
+
+    assert stored_analysis(website_scan) is None
+    assert load_scan_analysis(db, website_scan)["owasp_assessment"]
+    assert website_scan.owasp_assessment_json
@@ -0,0 +1,142 @@
+"""
+Tests for the freshness-aware scan result cache
+"""
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.db.database import Base
+from app.db.models import WebsiteScan
+from app.services.scan_cache import (
+    ScanResultCache,
+    component_expiries,
+    component_expiry,
+    normalize_scan_url,
+)
+
+
+SCAN_RESULTS = {
+    "http_headers": {"missing_headers": []},
+    "ssl_tls": {"certificate": {"valid_until": "2099-01-01T00:00:00"}},
+    "dns_security": {"min_ttl": 300},
+    "technologies": {"error": "Tech detection failed: timed out"},
+}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+def store_scan(db, age_seconds, results=SCAN_RESULTS, url="https://Example.com:443/app/?b=2&a=1#top"):
+    scanned_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    scan = WebsiteScan(
+        url=url,
+        normalized_url=normalize_scan_url(url),
+        client_ip="203.0.113.7",
+        risk_score=10,
+        risk_level="LOW",
+        overall_grade="B",
+        http_scan_json=json.dumps(results["http_headers"]),
+        ssl_scan_json=json.dumps(results["ssl_tls"]),
+        dns_scan_json=json.dumps(results["dns_security"]),
+        tech_scan_json=json.dumps(results["technologies"]),
+        component_expires_json=json.dumps(component_expiries(results, scanned_at)),
+        scanned_at=scanned_at,
+    )
+    db.add(scan)
+    db.commit()
+    return scan
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com/app?a=1&b=2",
+    "HTTPS://EXAMPLE.COM:443/app/?b=2&a=1",
+    "https://example.com./app?a=1&b=2#section",
+])
+def test_equivalent_urls_share_a_cache_key(url):
+    assert normalize_scan_url(url) == "https://example.com/app?a=1&b=2"
+
+
+def test_non_default_port_is_kept():
+    assert normalize_scan_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_component_expiry_follows_each_component():
+    scanned_at = datetime(2026, 1, 1)
+
+    assert component_expiry("http_headers", {"ok": True}, scanned_at) == scanned_at + timedelta(seconds=900)
+    # DNS results expire with the shortest record TTL...
+    assert component_expiry("dns_security", {"min_ttl": 60}, scanned_at) == scanned_at + timedelta(seconds=60)
+    # ...and SSL results no later than the certificate does
+    assert component_expiry(
+        "ssl_tls", {"certificate": {"valid_until": "2026-01-01T06:00:00"}}, scanned_at
+    ) == datetime(2026, 1, 1, 6)
+    # Failed and empty results are never reused
+    assert component_expiry("http_headers", {"error": "timed out"}, scanned_at) == scanned_at
+    assert component_expiry("technologies", {}, scanned_at) == scanned_at
+
+
+def test_lookup_returns_fresh_successful_components(db):
+    stored = store_scan(db, age_seconds=60)
+
+    scan, fresh = ScanResultCache(db).lookup("https://example.com/app?a=1&b=2")
+
+    assert scan.id == stored.id
+    assert set(fresh) == {"http_headers", "ssl_tls", "dns_security"}
+    assert fresh["dns_security"] == {"min_ttl": 300}
+
+
+def test_expired_components_are_rescanned(db):
+    """Past the DNS TTL only DNS is dropped; the other components are still reused."""
+    store_scan(db, age_seconds=400)
+
+    _, fresh = ScanResultCache(db).lookup("https://example.com/app?a=1&b=2", max_age=3600)
+
+    assert set(fresh) == {"http_headers", "ssl_tls"}
+
+
+def test_max_age_never_extends_a_component_expiry(db):
+    """A generous max_age narrows reuse only; component expiries stay a hard cap."""
+    store_scan(db, age_seconds=1000)
+
+    _, fresh = ScanResultCache(db).lookup("https://example.com/app?a=1&b=2", max_age=86400)
+
+    assert set(fresh) == {"ssl_tls"}
+
+
+def test_scans_older_than_max_age_are_not_used(db):
+    store_scan(db, age_seconds=120)
+    cache = ScanResultCache(db)
+
+    assert cache.lookup("https://example.com/app?a=1&b=2", max_age=60) == (None, {})
+    assert cache.lookup("https://example.com/app?a=1&b=2", max_age=0) == (None, {})
+    assert cache.lookup("https://other.example.com") == (None, {})
+
+
+def test_reused_components_keep_their_original_expiry(db):
+    stored = store_scan(db, age_seconds=60)
+    cache = ScanResultCache(db)
+    _, fresh = cache.lookup("https://example.com/app?a=1&b=2")
+
+    expires = cache.expiries(SCAN_RESULTS, stored, {"dns_security": fresh["dns_security"]})
+
+    previous = json.loads(stored.component_expires_json)
+    assert expires["dns_security"] == previous["dns_security"]
+    assert expires["http_headers"] > previous["http_headers"]
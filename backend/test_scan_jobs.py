@@ -0,0 +1,154 @@
+"""
+Tests for the asynchronous scan job queue and its result endpoint
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.api import website_scanner
+from app.security.cancellation import ScanCancelledError
+from app.services.scan_jobs import QueueFullError, ScanJob, ScanJobQueue
+
+
+async def wait_until_finished(queue, *scan_ids):
+    while not all(queue.get(scan_id).is_finished for scan_id in scan_ids):
+        await asyncio.sleep(0.01)
+
+
+def test_worker_pool_bounds_concurrent_scans():
+    queue = ScanJobQueue(workers=2, max_queue=10)
+    running = 0
+    peak = 0
+
+    async def scan():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "report"
+
+    async def main():
+        for index in range(6):
+            queue.submit(f"scan-{index}", "https://example.com", scan)
+        await wait_until_finished(queue, *(f"scan-{index}" for index in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == 2
+    assert all(queue.get(f"scan-{index}").result == "report" for index in range(6))
+    assert queue.stats()["completed"] == 6
+
+
+def test_full_queue_rejects_submissions():
+    queue = ScanJobQueue(workers=1, max_queue=2)
+    release = None
+
+    async def blocked():
+        await release.wait()
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue.submit("running", "https://example.com", blocked)
+        await asyncio.sleep(0)  # The worker takes the first job
+        queue.submit("waiting-1", "https://example.com", blocked)
+        queue.submit("waiting-2", "https://example.com", blocked)
+
+        with pytest.raises(QueueFullError):
+            queue.check_capacity()
+        with pytest.raises(QueueFullError):
+            queue.submit("rejected", "https://example.com", blocked)
+        assert not queue.stats()["accepting"]
+
+        release.set()
+        await wait_until_finished(queue, "running", "waiting-1", "waiting-2")
+
+    asyncio.run(main())
+
+    assert queue.get("rejected") is None
+    assert queue.stats()["rejected"] == 2
+
+
+def test_failures_and_cancellations_keep_their_status_codes():
+    queue = ScanJobQueue(workers=2)
+
+    async def rejected():
+        raise HTTPException(status_code=400, detail="Domain not allowed")
+
+    async def cancelled():
+        raise ScanCancelledError("Scan was cancelled")
+
+    async def main():
+        queue.submit("rejected", "https://example.com", rejected)
+        queue.submit("cancelled", "https://example.com", cancelled)
+        await wait_until_finished(queue, "rejected", "cancelled")
+
+    asyncio.run(main())
+
+    failed = queue.get("rejected")
+    assert (failed.status, failed.error_status_code, failed.error_message) == (
+        ScanJob.FAILED, 400, "Domain not allowed"
+    )
+    cancelled_job = queue.get("cancelled")
+    assert (cancelled_job.status, cancelled_job.error_status_code) == (ScanJob.CANCELLED, 409)
+
+
+def test_only_the_newest_finished_jobs_are_retained():
+    queue = ScanJobQueue(workers=1, retention=2)
+
+    async def scan():
+        return None
+
+    async def main():
+        for index in range(4):
+            queue.submit(f"scan-{index}", "https://example.com", scan)
+            await wait_until_finished(queue, f"scan-{index}")
+        queue.submit("scan-4", "https://example.com", scan)
+        await wait_until_finished(queue, "scan-4")
+
+    asyncio.run(main())
+
+    assert [queue.get(f"scan-{index}") is not None for index in range(5)] == [False, False, True, True, True]
+
+
+def test_result_endpoint_reports_pending_failed_and_finished_jobs(monkeypatch):
+    queue = ScanJobQueue(workers=1)
+    monkeypatch.setattr(website_scanner, "get_scan_job_queue", lambda: queue)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def scan():
+            await release.wait()
+            return {"report": True}
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        queue.submit("scan", "https://example.com", scan)
+        queue.submit("broken", "https://example.com", broken)
+
+        pending = await website_scanner.get_scan_job_result("scan")
+        assert pending.status_code == 202
+        assert pending.headers["Retry-After"] == "2"
+
+        release.set()
+        await wait_until_finished(queue, "scan", "broken")
+
+        assert await website_scanner.get_scan_job_result("scan") == {"report": True}
+        with pytest.raises(HTTPException) as error:
+            await website_scanner.get_scan_job_result("broken")
+        assert (error.value.status_code, error.value.detail) == (500, "boom")
+        with pytest.raises(HTTPException) as error:
+            await website_scanner.get_scan_job_result("unknown")
+        assert error.value.status_code == 404
+
+    asyncio.run(main())
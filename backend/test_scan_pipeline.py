@@ -0,0 +1,135 @@
+"""
+Tests for the concurrent scan stage scheduler
+Covers dependency ordering, concurrency, failures and cancellation
+"""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.cancellation import CancellationToken, ScanCancelledError
+from app.services.scan_pipeline import ScanStage, StageScheduler
+
+
+def run(scheduler, **kwargs):
+    return asyncio.run(scheduler.run(**kwargs))
+
+
+def test_stages_run_after_their_dependencies():
+    """Every stage receives its dependencies' results and starts after them."""
+    finished = []
+    lock = threading.Lock()
+
+    def stage(name, value):
+        def func(inputs):
+            with lock:
+                finished.append(name)
+            return value + sum(inputs.values())
+        return func
+
+    scheduler = StageScheduler([
+        ScanStage("total", stage("total", 0), depends_on=("a", "b")),
+        ScanStage("a", stage("a", 1)),
+        ScanStage("b", stage("b", 2), depends_on=("a",)),
+    ], executor=ThreadPoolExecutor(4))
+
+    results = run(scheduler)
+
+    assert scheduler.order == ["a", "b", "total"]
+    assert finished == ["a", "b", "total"]
+    assert results == {"a": 1, "b": 3, "total": 4}
+    assert all(t["status"] == StageScheduler.COMPLETED for t in scheduler.timings.values())
+
+
+def test_independent_stages_run_concurrently():
+    """Stages without dependencies between them overlap instead of adding up."""
+    barrier = threading.Barrier(3, timeout=2)
+
+    def wait_for_others(inputs):
+        barrier.wait()  # Raises BrokenBarrierError unless all three run at once
+        return True
+
+    scheduler = StageScheduler(
+        [ScanStage(name, wait_for_others) for name in ("http", "tls", "dns")],
+        executor=ThreadPoolExecutor(3)
+    )
+
+    assert run(scheduler) == {"http": True, "tls": True, "dns": True}
+
+
+def test_invalid_graphs_are_rejected():
+    """Unknown dependencies, cycles and duplicate names fail at construction."""
+    noop = lambda inputs: None
+    with pytest.raises(ValueError):
+        StageScheduler([ScanStage("a", noop, depends_on=("missing",))])
+    with pytest.raises(ValueError):
+        StageScheduler([ScanStage("a", noop, depends_on=("b",)), ScanStage("b", noop, depends_on=("a",))])
+    with pytest.raises(ValueError):
+        StageScheduler([ScanStage("a", noop), ScanStage("a", noop)])
+
+
+def test_labelled_stage_failure_becomes_error_result():
+    """A stage with an error label reports {"error": ...} and its dependents still run."""
+    def broken(inputs):
+        raise RuntimeError("boom")
+
+    scheduler = StageScheduler([
+        ScanStage("ssl_tls", broken, error_label="SSL scan"),
+        ScanStage("risk", lambda inputs: {"inputs": inputs}, depends_on=("ssl_tls",)),
+    ], executor=ThreadPoolExecutor(2))
+
+    results = run(scheduler)
+
+    assert results["ssl_tls"] == {"error": "SSL scan failed: boom"}
+    assert results["risk"] == {"inputs": {"ssl_tls": results["ssl_tls"]}}
+    assert scheduler.timings["ssl_tls"]["status"] == StageScheduler.FAILED
+    assert scheduler.timings["risk"]["status"] == StageScheduler.COMPLETED
+
+
+def test_cancellation_returns_without_waiting_for_running_stages():
+    """Cancelling mid-run raises at once; running stages are cancelled, later ones skipped."""
+    token = CancellationToken()
+    release = threading.Event()
+
+    def slow(inputs):
+        token.cancel()
+        release.wait(5)
+        return "late"
+
+    scheduler = StageScheduler([
+        ScanStage("slow", slow),
+        ScanStage("after", lambda inputs: "never", depends_on=("slow",)),
+    ], executor=ThreadPoolExecutor(2))
+
+    started = time.perf_counter()
+    try:
+        with pytest.raises(ScanCancelledError):
+            run(scheduler, cancel_token=token)
+        assert time.perf_counter() - started < 2
+    finally:
+        release.set()
+
+    assert scheduler.timings["slow"]["status"] == StageScheduler.CANCELLED
+    assert scheduler.timings["after"]["status"] == StageScheduler.SKIPPED
+
+
+def test_cancelled_token_skips_every_stage():
+    """A scan cancelled before it starts runs no stage at all."""
+    token = CancellationToken()
+    token.cancel()
+    ran = []
+
+    scheduler = StageScheduler([ScanStage("a", ran.append)], executor=ThreadPoolExecutor(1))
+
+    with pytest.raises(ScanCancelledError):
+        run(scheduler, cancel_token=token)
+    assert ran == []
+    assert scheduler.timings["a"]["status"] == StageScheduler.SKIPPED
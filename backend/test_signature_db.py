@@ -0,0 +1,108 @@
+"""
+Tests for the technology signature index and its on-disk cache
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security import signature_db
+from app.security.signature_db import SignatureIndex, build_signature_index
+
+
+TECHNOLOGIES = {
+    "Nginx": {"categories": ["web_server"], "headers": {"Server": "nginx(?:/([0-9.]+))?"}},
+    "Laravel": {"categories": ["framework"], "cookies": {"laravel_session": ""}},
+    "WordPress": {"categories": ["cms"], "html": ["wp-content"], "meta": {"generator": "WordPress ?([0-9.]+)?"}},
+    "Stripe": {"categories": ["payment"], "script_src": {"stripe.com": ""}},
+    "jQuery": {"categories": ["javascript_library"], "script_src": {"*": "jquery-([0-9.]+[0-9])"}},
+}
+
+
+@pytest.fixture
+def signatures_path(tmp_path):
+    path = tmp_path / "tech_signatures.json"
+    path.write_text(json.dumps({"schema_version": 1, "technologies": TECHNOLOGIES}))
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+def test_signatures_match_only_where_they_apply():
+    index = SignatureIndex(TECHNOLOGIES)
+    html = (
+        '<meta name="generator" content="WordPress 6.4.2">'
+        '<script src="https://js.stripe.com/v3/"></script>'
+        '<script src="/assets/jquery-3.7.1.min.js"></script>'
+    )
+
+    hits = index.match(
+        {"Server": "nginx/1.25.3", "Set-Cookie": "laravel_session=abc; Path=/, XSRF-TOKEN=x; expires=Wed, 21 Oct 2026"},
+        html
+    )
+
+    assert hits == {
+        "Nginx": "1.25.3", "Laravel": None, "WordPress": "6.4.2", "Stripe": None, "jQuery": "3.7.1"
+    }
+    # A header name in the body, or a cookie name in another header, is not a match
+    assert index.match({"X-Note": "laravel_session=1"}, "Server: nginx/1.0") == {}
+
+
+def test_index_is_cached_and_reused(signatures_path, cache_dir, monkeypatch):
+    first = build_signature_index(signatures_path, cache_dir)
+    cached = list(cache_dir.glob("tech_signatures-*.index.pkl"))
+    assert len(cached) == 1
+    assert cached[0].stat().st_mode & 0o777 == 0o600
+
+    # The cache is loaded instead of indexing the data file again (unpickling skips __init__)
+    monkeypatch.setattr(SignatureIndex, "__init__", lambda self, technologies: pytest.fail("rebuilt"))
+    second = build_signature_index(signatures_path, cache_dir)
+
+    assert second.categories == first.categories
+    assert second.match({"Server": "nginx/1.25.3"}, "") == {"Nginx": "1.25.3"}
+
+
+def test_changed_signatures_replace_the_cache(signatures_path, cache_dir):
+    build_signature_index(signatures_path, cache_dir)
+    technologies = {**TECHNOLOGIES, "Caddy": {"categories": ["web_server"], "headers": {"Server": "caddy"}}}
+    signatures_path.write_text(json.dumps({"schema_version": 1, "technologies": technologies}))
+
+    index = build_signature_index(signatures_path, cache_dir)
+
+    assert "Caddy" in index.categories
+    assert len(list(cache_dir.glob("tech_signatures-*.index.pkl"))) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_writable_cache_is_never_unpickled(signatures_path, cache_dir, monkeypatch):
+    """A cache file or directory others can write to is ignored, not loaded."""
+    build_signature_index(signatures_path, cache_dir)
+    cached = next(cache_dir.glob("tech_signatures-*.index.pkl"))
+    loads = []
+    monkeypatch.setattr(signature_db.pickle, "load", lambda f: loads.append(f) or pytest.fail("unpickled"))
+
+    cached.chmod(0o666)
+    assert "Nginx" in build_signature_index(signatures_path, cache_dir).categories
+
+    cached.chmod(0o600)
+    cache_dir.chmod(0o777)
+    try:
+        assert "Nginx" in build_signature_index(signatures_path, cache_dir).categories
+    finally:
+        cache_dir.chmod(0o700)
+    assert loads == []
+
+
+def test_bundled_signatures_load():
+    index = build_signature_index(cache_dir=None)
+
+    assert {"WordPress", "jQuery", "Nginx", "PHP"} <= set(index.categories)
@@ -0,0 +1,167 @@
+"""
+Tests for the single-pass signature matcher and technology detection
+"""
+import pickle
+import re
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security import signature_db
+from app.security.signature_matcher import SignatureMatcher, literal_anchor
+from app.security.tech_detector import TechnologyDetector
+
+
+SIGNATURES = [
+    ("jQuery", r"jquery[-.@/]v?([0-9]+(?:\.[0-9]+)+)"),
+    ("jQuery", r"jquery"),
+    ("jQuery UI", r"jquery-ui(?:\.min)?\.js"),
+    ("React", r"react(?:-dom)?(?:\.production)?\.min\.js"),
+    ("Bootstrap", r"bootstrap(?:\.min)?\.(?:css|js)"),
+    ("Next.js", r"__NEXT_DATA__"),
+    ("Angular", r"ng-version=\"([0-9.]+)\""),
+    ("Vue.js", r"(?:vue|vuejs)"),  # No common prefix: always evaluated
+]
+
+
+@pytest.mark.parametrize("pattern, anchor", [
+    (r"jquery[-.@/]v?([0-9.]+)", "jquery"),
+    (r"wp-content", "wp-content"),
+    (r"WordPress ?([0-9.]+)?", "wordpress"),  # The optional space is not part of every match
+    (r"\/sites\/default\/", "/sites/default/"),
+    (r"__NEXT_DATA__", "__next_data__"),
+    (r"ab(?:c)", None),  # Too short
+    (r"vue|vuejs", None),  # Top-level alternatives
+    (r"(?:vue|vuejs)", None),
+    (r"", None),
+])
+def test_literal_anchor(pattern, anchor):
+    assert literal_anchor(pattern) == anchor
+
+
+PAGE = """
+<html><head>
+<script src="/static/jquery-3.6.0.min.js"></script>
+<script src="/static/react-dom.production.min.js"></script>
+<link href="/css/bootstrap.min.css" rel="stylesheet">
+</head><body><app-root ng-version="16.2.1"></app-root>
+<script id="__NEXT_DATA__" type="application/json">{}</script></body></html>
+"""
+
+
+def naive_scan(text):
+    """Every signature run over the whole text: what the matcher must reproduce."""
+    hits = {}
+    for name, pattern in SIGNATURES:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match is not None and hits.get(name) is None:
+            hits[name] = match.group(1) if match.re.groups else None
+    return hits
+
+
+@pytest.mark.parametrize("text", [PAGE, PAGE.upper(), "", "nothing to see here", "JQUERY-UI.JS and vuejs"])
+def test_single_pass_matches_every_signature_run_separately(text):
+    assert SignatureMatcher(SIGNATURES).scan(text) == naive_scan(text)
+
+
+def test_version_comes_from_the_first_capturing_match():
+    hits = SignatureMatcher(SIGNATURES).scan(PAGE)
+
+    assert hits["jQuery"] == "3.6.0"
+    assert hits["Angular"] == "16.2.1"
+    assert hits["Bootstrap"] is None
+
+
+def test_empty_pattern_matches_any_value():
+    """Presence-only signatures (e.g. a header that just has to exist)."""
+    matcher = SignatureMatcher([("Cloudflare", "")])
+
+    assert matcher.scan("") == {"Cloudflare": None}
+    assert matcher.scan("8c1f2a") == {"Cloudflare": None}
+
+
+def test_pickled_matcher_recompiles_on_first_scan():
+    matcher = SignatureMatcher(SIGNATURES)
+    matcher.scan(PAGE)
+
+    restored = pickle.loads(pickle.dumps(matcher))
+
+    assert restored._compiled is None
+    assert restored.scan(PAGE) == matcher.scan(PAGE)
+
+
+def test_concurrent_first_scans_compile_once(monkeypatch):
+    matcher = SignatureMatcher(SIGNATURES)
+    compiles = []
+    original = matcher._compile
+
+    def counting_compile():
+        compiles.append(1)
+        return original()
+
+    monkeypatch.setattr(matcher, "_compile", counting_compile)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def scan():
+        barrier.wait()
+        results.append(matcher.scan(PAGE))
+
+    threads = [threading.Thread(target=scan) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(compiles) == 1
+    assert all(result == results[0] for result in results)
+
+
+@pytest.fixture
+def signature_index(monkeypatch):
+    """The bundled signatures, indexed without touching the on-disk cache."""
+    monkeypatch.setattr(signature_db, "_signature_index", signature_db.build_signature_index(cache_dir=None))
+
+
+def detect(headers, html):
+    result = {
+        "web_server": None, "web_server_version": None, "programming_language": [], "frameworks": [],
+        "content_management_system": None, "javascript_libraries": [], "cdn": None,
+        "security_technologies": [], "technology_versions": {},
+    }
+    detector = TechnologyDetector()
+    headers = CaseInsensitiveDict(headers)
+    detector._detect_from_headers(headers, result)
+    detector._detect_from_signatures(headers, html, result)
+    return result
+
+
+def test_detector_reports_categories_and_versions(signature_index):
+    result = detect(
+        {"Server": "nginx/1.24.0", "X-Powered-By": "PHP/8.2.1", "CF-RAY": "8c1f2a"},
+        '<script src="https://code.jquery.com/jquery-3.7.1.min.js"></script>'
+    )
+
+    assert (result["web_server"], result["web_server_version"]) == ("nginx", "1.24.0")
+    assert result["programming_language"] == ["PHP 8.2.1"]
+    assert "PHP" in result["frameworks"]
+    assert result["cdn"] == "Cloudflare"
+    assert result["javascript_libraries"] == ["jQuery"]
+    assert result["technology_versions"]["jQuery"] == "3.7.1"
+
+
+def test_meta_generator_names_the_cms(signature_index):
+    """The generator tag wins over body patterns of another CMS."""
+    result = detect({}, (
+        '<meta name="generator" content="Joomla! - Open Source Content Management">'
+        '<link href="/wp-content/themes/site.css">'
+    ))
+
+    assert result["content_management_system"] == "Joomla"
@@ -0,0 +1,169 @@
+"""
+Tests for SPF include-tree expansion and the shared include memo
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import dns.exception
+import dns.resolver
+import dns.rrset
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.spf_evaluator import SPFExpander, clear_spf_memo, parse_spf
+
+
+class Answer:
+    """The parts of dns.resolver.Answer the expander uses."""
+
+    def __init__(self, rrset):
+        self.rrset = rrset
+
+    def __iter__(self):
+        return iter(self.rrset)
+
+
+class FakeResolver:
+    """TXT answers from a {domain: record} map, counting lookups per domain."""
+
+    def __init__(self, records, failing=()):
+        self.records = records
+        self.failing = set(failing)
+        self.lookups = {}
+
+    async def resolve(self, name, rdtype):
+        self.lookups[name] = self.lookups.get(name, 0) + 1
+        if name in self.failing:
+            raise dns.exception.Timeout()
+        if name not in self.records:
+            raise dns.resolver.NXDOMAIN()
+        return Answer(dns.rrset.from_text(name + ".", 300, "IN", "TXT", f'"{self.records[name]}"'))
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    clear_spf_memo()
+    yield
+    clear_spf_memo()
+
+
+def expand(resolver, domain):
+    return asyncio.run(SPFExpander(resolver.resolve).expand(domain, resolver.records[domain], 300))
+
+
+def test_parse_spf_splits_mechanisms_and_modifiers():
+    mechanisms, modifiers = parse_spf("v=spf1 ip4:192.0.2.0/24 -include:bad.test a/24 ~all redirect=_spf.test")
+
+    assert mechanisms == [
+        ("+", "ip4", "192.0.2.0/24"), ("-", "include", "bad.test"), ("+", "a", None), ("~", "all", None)
+    ]
+    assert modifiers == {"redirect": "_spf.test"}
+
+
+def test_lookups_are_counted_across_the_include_tree():
+    resolver = FakeResolver({
+        "example.test": "v=spf1 mx include:_spf.one.test include:_spf.two.test -all",
+        "_spf.one.test": "v=spf1 a include:_nested.one.test ~all",
+        "_nested.one.test": "v=spf1 ip4:192.0.2.1 ~all",
+        "_spf.two.test": "v=spf1 ip6:2001:db8::/32 ~all",
+    })
+
+    result = expand(resolver, "example.test")
+
+    # mx + 2 includes at the top, a + include below _spf.one.test
+    assert result["lookup_count"] == 5
+    assert not result["lookup_limit_exceeded"]
+    assert result["errors"] == []
+    assert result["all_qualifier"] == "-"
+    tree = result["include_tree"]
+    assert [child["domain"] for child in tree["includes"]] == ["_spf.one.test", "_spf.two.test"]
+    assert tree["includes"][0]["includes"][0]["domain"] == "_nested.one.test"
+
+
+def test_records_over_the_lookup_limit_fail():
+    records = {"example.test": "v=spf1 " + " ".join(f"include:_spf{index}.test" for index in range(6)) + " -all"}
+    for index in range(6):
+        records[f"_spf{index}.test"] = "v=spf1 a mx -all"
+    resolver = FakeResolver(records)
+
+    result = expand(resolver, "example.test")
+
+    assert result["lookup_count"] == 18
+    assert result["lookup_limit_exceeded"]
+    assert result["errors"][0] == "18 DNS lookups exceed the limit of 10"
+
+
+def test_void_lookups_over_the_limit_fail():
+    resolver = FakeResolver({
+        "example.test": "v=spf1 include:gone1.test include:gone2.test include:gone3.test -all",
+    })
+
+    result = expand(resolver, "example.test")
+
+    assert result["void_lookup_count"] == 3
+    assert result["errors"][0] == "3 void lookups exceed the limit of 2"
+    assert "gone1.test has no SPF record" in result["errors"]
+
+
+def test_shared_includes_are_resolved_once_per_ttl():
+    """A hosted sender included by many scanned domains is looked up once."""
+    resolver = FakeResolver({
+        "one.test": "v=spf1 include:_spf.hosted.test -all",
+        "two.test": "v=spf1 include:_spf.hosted.test ~all",
+        "_spf.hosted.test": "v=spf1 include:_netblocks.hosted.test ~all",
+        "_netblocks.hosted.test": "v=spf1 ip4:198.51.100.0/24 ~all",
+    })
+
+    first = expand(resolver, "one.test")
+    expander = SPFExpander(resolver.resolve)
+    second = asyncio.run(expander.expand("two.test", resolver.records["two.test"], 300))
+
+    assert resolver.lookups == {"_spf.hosted.test": 1, "_netblocks.hosted.test": 1}
+    assert expander.memo_hits == 1
+    assert first["lookup_count"] == second["lookup_count"] == 2
+
+
+def test_temporary_failures_are_not_memoized():
+    resolver = FakeResolver({"example.test": "v=spf1 include:_spf.flaky.test -all"}, failing={"_spf.flaky.test"})
+
+    first = expand(resolver, "example.test")
+    expand(resolver, "example.test")
+
+    assert first["temporary_errors"] == ["_spf.flaky.test: Timeout"]
+    assert first["errors"] == []
+    assert resolver.lookups["_spf.flaky.test"] == 2
+
+
+def test_include_loops_are_reported():
+    resolver = FakeResolver({
+        "example.test": "v=spf1 include:_spf.a.test -all",
+        "_spf.a.test": "v=spf1 include:_spf.b.test -all",
+        "_spf.b.test": "v=spf1 include:_spf.a.test -all",
+    })
+
+    result = expand(resolver, "example.test")
+
+    assert "Include loop via _spf.a.test" in result["errors"]
+
+
+def test_redirect_and_permissive_includes():
+    resolver = FakeResolver({
+        "example.test": "v=spf1 include:_spf.open.test redirect=_spf.policy.test",
+        "_spf.open.test": "v=spf1 +all",
+        "_spf.policy.test": "v=spf1 mx ~all",
+        "with-all.test": "v=spf1 -all redirect=_spf.policy.test",
+    })
+
+    result = expand(resolver, "example.test")
+    ignored = expand(resolver, "with-all.test")
+
+    assert result["all_qualifier"] == "~"
+    assert result["permissive_includes"] == ["_spf.open.test"]
+    assert result["lookup_count"] == 3  # include, redirect, mx
+    # redirect= is ignored when the record has an all mechanism
+    assert ignored["include_tree"]["redirect"] is None
+    assert ignored["lookup_count"] == 0
@@ -0,0 +1,152 @@
+"""
+Tests for resolved target pinning: validation pins the approved addresses,
+the HTTP client connects only to them, and redirect hops are validated
+"""
+import asyncio
+import http.server
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security import safety_validator
+from app.security.http_client import PooledHTTPClient, RedirectBlockedError
+from app.security.safety_validator import SafetyValidator, TargetValidator
+from app.security.target_pins import TargetPins, get_target_pins
+
+
+def test_pins_are_normalized_and_expire():
+    pins = TargetPins(ttl_seconds=0.2)
+    pins.pin("Shop.Example.", ["93.184.216.34", "2606:2800:220:1::1"])
+
+    assert pins.addresses("shop.example") == ["93.184.216.34", "2606:2800:220:1::1"]
+    family4, address4 = pins.socket_addresses("shop.example", 443)[0]
+    family6, address6 = pins.socket_addresses("shop.example", 443)[1]
+    assert address4 == ("93.184.216.34", 443)
+    assert address6 == ("2606:2800:220:1::1", 443, 0, 0)
+    assert family4 != family6
+
+    time.sleep(0.3)
+    assert pins.addresses("shop.example") is None
+    assert pins.socket_addresses("shop.example", 443) is None
+
+
+def test_empty_pin_is_ignored():
+    pins = TargetPins()
+    pins.pin("host.example", [])
+
+    assert pins.addresses("host.example") is None
+
+
+def resolving_to(*addresses):
+    async def resolve(hostname, port, timeout=None):
+        return [(None, (address, port)) for address in addresses]
+    return resolve
+
+
+def test_validation_pins_approved_addresses(monkeypatch):
+    pins = TargetPins()
+    monkeypatch.setattr(safety_validator, "get_target_pins", lambda: pins)
+    monkeypatch.setattr(safety_validator, "resolve_host_async", resolving_to("93.184.216.34", "93.184.216.35"))
+
+    valid, error = asyncio.run(
+        SafetyValidator().validate_target("https://shop.example/", True, True, True)
+    )
+
+    assert valid, error
+    assert pins.addresses("shop.example") == ["93.184.216.34", "93.184.216.35"]
+
+
+def test_target_with_any_private_address_is_refused_and_not_pinned(monkeypatch):
+    pins = TargetPins()
+    monkeypatch.setattr(safety_validator, "get_target_pins", lambda: pins)
+    monkeypatch.setattr(safety_validator, "resolve_host_async", resolving_to("93.184.216.34", "10.0.0.5"))
+
+    valid, error = asyncio.run(
+        SafetyValidator().validate_target("https://rebind.example/", True, True, True)
+    )
+
+    assert not valid
+    assert "private" in error
+    assert pins.addresses("rebind.example") is None
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Echoes the Host header; /to-* paths redirect."""
+
+    redirects = {}
+
+    def do_GET(self):
+        location = self.redirects.get(self.path)
+        if location is not None:
+            self.send_response(302)
+            self.send_header("Location", location.format(port=self.server.server_address[1]))
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(self.headers["Host"].encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+def test_http_client_connects_only_to_pinned_addresses(server):
+    """A pinned hostname is never resolved; the first pinned address that answers is used."""
+    # Does not exist in DNS: only the pin can make it reachable; 127.0.0.2 refuses
+    get_target_pins().pin("pinned-target.invalid", ["127.0.0.2", "127.0.0.1"])
+    client = PooledHTTPClient(http2=False)
+    with client.stream(f"http://pinned-target.invalid:{server}/", {}, 5) as response:
+        body = b"".join(response.iter_content())
+
+    assert response.status_code == 200
+    assert body == f"pinned-target.invalid:{server}".encode()
+
+
+def test_redirects_to_the_requested_host_are_followed(server, monkeypatch):
+    monkeypatch.setattr(Handler, "redirects", {"/to-self": "/landing"})
+    get_target_pins().pin("site.invalid", ["127.0.0.1"])
+    client = PooledHTTPClient(http2=False)
+
+    with client.stream(f"http://site.invalid:{server}/to-self", {}, 5) as response:
+        assert response.status_code == 200
+        assert response.url.endswith("/landing")
+        assert response.history[0]["status_code"] == 302
+
+
+@pytest.mark.parametrize("location", [
+    "http://localhost:{port}/admin",
+    "http://127.0.0.1:{port}/admin",
+    "http://[::1]:{port}/",
+    "http://169.254.169.254/latest/meta-data/",
+])
+def test_redirects_into_internal_addresses_are_refused(server, monkeypatch, location):
+    """Not even a test domain (localhost) makes an internal redirect target acceptable."""
+    monkeypatch.setattr(Handler, "redirects", {"/to-internal": location})
+    get_target_pins().pin("public.invalid", ["127.0.0.1"])
+    client = PooledHTTPClient(http2=False)
+
+    with pytest.raises(RedirectBlockedError):
+        with client.stream(f"http://public.invalid:{server}/to-internal", {}, 5):
+            pass
+
+
+def test_redirect_validation_checks_test_domain_addresses():
+    allowed, reason, _ = TargetValidator.is_allowed_redirect("http://localhost/")
+
+    assert not allowed
+    assert "private" in reason
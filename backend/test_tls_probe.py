@@ -0,0 +1,203 @@
+"""
+Tests for the TLS capability probe matrix
+Runs against local TLS and unresponsive servers, so no network access is needed
+"""
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_path))
+
+from app.security.cancellation import CancellationToken
+from app.security.tls_probe import (
+    ERROR,
+    NOT_SUPPORTED,
+    NOT_TESTED,
+    SUPPORTED,
+    TIMEOUT,
+    UNTESTABLE,
+    TLSProbeMatrix,
+)
+
+
+class SilentServer:
+    """Accepts connections and never answers."""
+
+    def __init__(self):
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(64)
+        self.address = self.listener.getsockname()
+        self.accepted = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.accepted.append(conn.getpeername())
+            threading.Thread(target=self._hold, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _hold(conn):
+        with conn:
+            try:
+                while conn.recv(4096):
+                    pass
+            except OSError:
+                pass
+
+    def close(self):
+        self.listener.close()
+
+
+@pytest.fixture
+def silent_server():
+    server = SilentServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl command not available")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+@pytest.fixture
+def tls_server(certificate):
+    """TLS 1.2+ server with the default (modern) cipher configuration."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+
+    def handshake(conn):
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls:
+                tls.recv(1)
+        except (OSError, ssl.SSLError):
+            conn.close()
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handshake, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield listener.getsockname()
+    listener.close()
+
+
+def statuses(matrix):
+    return {*matrix["protocols"].values(), *matrix["cipher_families"].values()}
+
+
+def test_matrix_reports_what_the_server_accepts(tls_server):
+    matrix = TLSProbeMatrix("localhost", tls_server, deadline_seconds=10).run()
+
+    assert matrix["complete"]
+    assert matrix["protocols"]["TLSv1.2"] == SUPPORTED
+    assert matrix["protocols"]["TLSv1.3"] == SUPPORTED
+    assert matrix["protocols"]["TLSv1.0"] in (NOT_SUPPORTED, UNTESTABLE)
+    assert matrix["cipher_families"]["AES-GCM"] == SUPPORTED
+    assert matrix["cipher_families"]["RC4"] in (NOT_SUPPORTED, UNTESTABLE)
+    assert list(matrix["protocols"]) == ["TLSv1.0", "TLSv1.1", "TLSv1.2", "TLSv1.3"]
+
+
+def test_unresponsive_server_times_out_each_probe(silent_server):
+    """Every probe that ran gets its own timeout; none is reported as not tested."""
+    matrix = TLSProbeMatrix(
+        "localhost", silent_server.address, deadline_seconds=10, probe_timeout=0.2, concurrency=4
+    ).run()
+
+    assert matrix["complete"]
+    assert statuses(matrix) <= {TIMEOUT, UNTESTABLE}
+    assert TIMEOUT in statuses(matrix)
+
+
+def test_probes_of_one_scan_are_capped(silent_server, monkeypatch):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    probe = TLSProbeMatrix._probe
+
+    def counting_probe(self, context):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            return probe(self, context)
+        finally:
+            with lock:
+                running -= 1
+
+    monkeypatch.setattr(TLSProbeMatrix, "_probe", counting_probe)
+    TLSProbeMatrix(
+        "localhost", silent_server.address, deadline_seconds=10, probe_timeout=0.1, concurrency=2
+    ).run()
+
+    assert peak == 2
+    assert len(silent_server.accepted) > 2
+
+
+def test_deadline_reports_unfinished_probes_as_not_tested(silent_server):
+    """Probes cut off by the matrix deadline are not tested, not server timeouts."""
+    started = time.perf_counter()
+    matrix = TLSProbeMatrix(
+        "localhost", silent_server.address, deadline_seconds=0.3, probe_timeout=5, concurrency=2
+    ).run()
+
+    assert time.perf_counter() - started < 1.5
+    assert not matrix["complete"]
+    assert statuses(matrix) <= {NOT_TESTED, UNTESTABLE}
+
+
+def test_cancellation_aborts_running_probes(silent_server):
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+
+    started = time.perf_counter()
+    matrix = TLSProbeMatrix(
+        "localhost", silent_server.address, deadline_seconds=10, cancel_token=token, probe_timeout=5
+    ).run()
+
+    assert time.perf_counter() - started < 1.5
+    assert not matrix["complete"]
+    assert statuses(matrix) <= {NOT_TESTED, UNTESTABLE}
+
+
+def test_refused_connection_is_an_error():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        address = unused.getsockname()
+
+    matrix = TLSProbeMatrix("localhost", address, deadline_seconds=10).run()
+
+    assert matrix["complete"]
+    assert statuses(matrix) <= {ERROR, UNTESTABLE}
@@ -8,6 +8,7 @@ class ScanProgressTracker {
         this.container = document.getElementById(containerId);
         this.scanId = null;
         this.pollInterval = null;
+        this.eventSource = null;
         this.isComplete = false;
         this.progressData = null;
     }
@@ -19,7 +20,7 @@ class ScanProgressTracker {
         this.scanId = scanId;
         this.isComplete = false;
         this.render(url);
-        this.startPolling();
+        this.startStreaming();
     }
 
     /**
@@ -100,6 +101,33 @@ class ScanProgressTracker {
         document.getElementById('cancel-scan-btn')?.addEventListener('click', () => this.cancelScan());
     }
 
+    /**
+     * Subscribe to pushed progress events (Server-Sent Events),
+     * falling back to polling if the stream is unavailable
+     */
+    startStreaming() {
+        if (typeof EventSource === 'undefined') {
+            this.startPolling();
+            return;
+        }
+
+        this.eventSource = new EventSource(`${API_BASE_URL}/scan-progress/${this.scanId}/events`);
+
+        this.eventSource.addEventListener('progress', (event) => {
+            this.handleProgress(JSON.parse(event.data));
+        });
+
+        this.eventSource.onerror = () => {
+            if (this.isComplete) return;
+            // Stream dropped or unsupported by a proxy - switch to polling
+            this.eventSource.close();
+            this.eventSource = null;
+            if (!this.pollInterval) {
+                this.startPolling();
+            }
+        };
+    }
+
     /**
      * Start polling for progress updates
      */
@@ -122,20 +150,29 @@ class ScanProgressTracker {
             }
 
             const data = await response.json();
-            this.progressData = data;
-            this.updateUI(data);
-
-            // Stop polling if complete or error
-            if (data.is_complete || data.has_error || data.is_cancelled) {
-                this.stopPolling();
-                this.isComplete = true;
-                this.showCompletionState(data);
-            }
+            this.handleProgress(data);
         } catch (error) {
             console.error('Error fetching progress:', error);
         }
     }
 
+    /**
+     * Apply a progress update (pushed or polled)
+     */
+    handleProgress(data) {
+        if (this.isComplete) return;
+
+        this.progressData = data;
+        this.updateUI(data);
+
+        // Stop listening if complete or error
+        if (data.is_complete || data.has_error || data.is_cancelled) {
+            this.stopPolling();
+            this.isComplete = true;
+            this.showCompletionState(data);
+        }
+    }
+
     /**
      * Update UI with progress data
      */
@@ -309,6 +346,10 @@ class ScanProgressTracker {
             clearInterval(this.pollInterval);
             this.pollInterval = null;
         }
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
     }
 
     /**